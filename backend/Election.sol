@@ -19,10 +19,22 @@ contract Election {
     mapping(uint => Candidate) public candidates;
     mapping(address => bool) public hasVoted;
 
+    // Merkle roots of off-chain ballot batches (ledger mode)
+    bytes32[] public ballotRoots;
+    uint public anchoredBallots;
+
+    // EIP-712 typed data for relayed ballots; the domain binds each signature
+    // to this contract on this chain, so it cannot be replayed elsewhere.
+    bytes32 public constant DOMAIN_TYPEHASH =
+        keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)");
+    bytes32 public constant BALLOT_TYPEHASH = keccak256("Ballot(uint256[] candidateIds)");
+
     event VoteCast(address indexed voter, uint indexed candidateId, uint timestamp);
     event CandidateAdded(uint indexed candidateId, string name, string position);
     event VotingStarted(uint timestamp);
     event VotingEnded(uint timestamp);
+    event BallotRejected(address indexed voter, string reason);
+    event BallotRootAnchored(uint indexed batchIndex, bytes32 root, uint ballotCount, uint timestamp);
 
     modifier onlyAdmin() {
         require(msg.sender == admin, "Only admin can perform this action");
@@ -51,6 +63,28 @@ contract Election {
         string memory _position,
         string memory _symbol
     ) public onlyAdmin votingIsClosed {
+        _addCandidate(_name, _position, _symbol);
+    }
+
+    function addCandidates(
+        string[] memory _names,
+        string[] memory _positions,
+        string[] memory _symbols
+    ) public onlyAdmin votingIsClosed {
+        require(
+            _names.length == _positions.length && _names.length == _symbols.length,
+            "Candidate field arrays must have equal length"
+        );
+        for (uint i = 0; i < _names.length; i++) {
+            _addCandidate(_names[i], _positions[i], _symbols[i]);
+        }
+    }
+
+    function _addCandidate(
+        string memory _name,
+        string memory _position,
+        string memory _symbol
+    ) internal {
         candidateCount++;
         candidates[candidateCount] = Candidate({
             id: candidateCount,
@@ -92,6 +126,127 @@ contract Election {
         totalVotes++; // Increment total voters count
     }
 
+    // Relayed submission: many voter-signed ballots in one transaction, sent
+    // by the admin (the relayer). Each ballot must list candidate ids in
+    // strictly ascending order and be signed (eth_signTypedData_v4) over the
+    // EIP-712 digest returned by ballotDigest(). Invalid or duplicate ballots
+    // are skipped with BallotRejected so one bad ballot does not revert the
+    // whole batch.
+    function castBallots(
+        address[] memory _voters,
+        uint[][] memory _candidateIds,
+        bytes[] memory _signatures
+    ) public onlyAdmin votingIsOpen returns (uint accepted) {
+        require(
+            _voters.length == _candidateIds.length && _voters.length == _signatures.length,
+            "Ballot arrays must have equal length"
+        );
+
+        for (uint b = 0; b < _voters.length; b++) {
+            address voter = _voters[b];
+            uint[] memory ids = _candidateIds[b];
+
+            if (hasVoted[voter]) {
+                emit BallotRejected(voter, "You have already voted");
+                continue;
+            }
+            if (!_validBallot(ids)) {
+                emit BallotRejected(voter, "Invalid candidate ID");
+                continue;
+            }
+            if (_recover(ballotDigest(ids), _signatures[b]) != voter) {
+                emit BallotRejected(voter, "Invalid signature");
+                continue;
+            }
+
+            hasVoted[voter] = true;
+            for (uint i = 0; i < ids.length; i++) {
+                candidates[ids[i]].voteCount++;
+                emit VoteCast(voter, ids[i], block.timestamp);
+            }
+            totalVotes++;
+            accepted++;
+        }
+    }
+
+    function domainSeparator() public view returns (bytes32) {
+        return keccak256(abi.encode(
+            DOMAIN_TYPEHASH, keccak256("Electra"), keccak256("1"), block.chainid, address(this)
+        ));
+    }
+
+    function ballotDigest(uint[] memory _candidateIds) public view returns (bytes32) {
+        bytes32 structHash = keccak256(abi.encode(BALLOT_TYPEHASH, keccak256(abi.encodePacked(_candidateIds))));
+        return keccak256(abi.encodePacked("\x19\x01", domainSeparator(), structHash));
+    }
+
+    // Ledger mode: ballots are kept off-chain and only the Merkle root of each
+    // batch is anchored here. Inner nodes hash the sorted pair of children.
+    function anchorBallotRoot(bytes32 _root, uint _ballotCount) public onlyAdmin returns (uint batchIndex) {
+        require(_root != bytes32(0), "Empty ballot root");
+        require(_ballotCount > 0, "Empty ballot batch");
+        ballotRoots.push(_root);
+        anchoredBallots += _ballotCount;
+        batchIndex = ballotRoots.length - 1;
+        emit BallotRootAnchored(batchIndex, _root, _ballotCount, block.timestamp);
+    }
+
+    function ballotRootCount() public view returns (uint) {
+        return ballotRoots.length;
+    }
+
+    function verifyBallotProof(
+        uint _batchIndex,
+        bytes32 _leaf,
+        bytes32[] memory _proof
+    ) public view returns (bool) {
+        require(_batchIndex < ballotRoots.length, "Unknown ballot batch");
+        bytes32 node = _leaf;
+        for (uint i = 0; i < _proof.length; i++) {
+            node = node < _proof[i]
+                ? keccak256(abi.encodePacked(node, _proof[i]))
+                : keccak256(abi.encodePacked(_proof[i], node));
+        }
+        return node == ballotRoots[_batchIndex];
+    }
+
+    function _validBallot(uint[] memory _ids) internal view returns (bool) {
+        if (_ids.length == 0) {
+            return false;
+        }
+        for (uint i = 0; i < _ids.length; i++) {
+            if (_ids[i] == 0 || _ids[i] > candidateCount || !candidates[_ids[i]].exists) {
+                return false;
+            }
+            if (i > 0 && _ids[i] <= _ids[i - 1]) {
+                return false;
+            }
+        }
+        return true;
+    }
+
+    function _recover(bytes32 _digest, bytes memory _sig) internal pure returns (address) {
+        if (_sig.length != 65) {
+            return address(0);
+        }
+        bytes32 r;
+        bytes32 s;
+        uint8 v;
+        assembly {
+            r := mload(add(_sig, 32))
+            s := mload(add(_sig, 64))
+            v := byte(0, mload(add(_sig, 96)))
+        }
+        if (v < 27) {
+            v += 27;
+        }
+        // Reject malleable (high-s) signatures
+        if ((v != 27 && v != 28) || uint(s) > 0x7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF5D576E7357A4501DDFE92F46681B20A0) {
+            return address(0);
+        }
+        return ecrecover(_digest, v, r, s);
+    }
+
     function getCandidate(uint _id) public view returns (
         uint id,
         string memory name,
@@ -104,6 +259,47 @@ contract Election {
         return (c.id, c.name, c.position, c.symbol, c.voteCount);
     }
 
+    function getCandidates(uint _offset, uint _limit) public view returns (
+        uint[] memory ids,
+        string[] memory names,
+        string[] memory positions,
+        string[] memory symbols,
+        uint[] memory voteCounts
+    ) {
+        uint n = 0;
+        if (_offset < candidateCount) {
+            n = candidateCount - _offset;
+            if (_limit < n) {
+                n = _limit;
+            }
+        }
+
+        ids = new uint[](n);
+        names = new string[](n);
+        positions = new string[](n);
+        symbols = new string[](n);
+        voteCounts = new uint[](n);
+
+        for (uint i = 0; i < n; i++) {
+            Candidate storage c = candidates[_offset + i + 1];
+            ids[i] = c.id;
+            names[i] = c.name;
+            positions[i] = c.position;
+            symbols[i] = c.symbol;
+            voteCounts[i] = c.voteCount;
+        }
+    }
+
+    function getAllCandidates() public view returns (
+        uint[] memory ids,
+        string[] memory names,
+        string[] memory positions,
+        string[] memory symbols,
+        uint[] memory voteCounts
+    ) {
+        return getCandidates(0, candidateCount);
+    }
+
     function getStatus() public view returns (
         bool _votingOpen,
         uint _candidateCount,
@@ -0,0 +1,214 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+// Gas-optimized variant of Election.sol with the same admin/voter entry points.
+//  - status fields share one storage slot with the admin address
+//  - candidate metadata is stored as a keccak256 hash; the strings are only
+//    emitted in CandidateAdded
+//  - vote counters are packed eight uint32 lanes per storage slot
+//  - voted flags live in a bitmap
+//  - a ballot emits one BallotCast event carrying the id array
+contract ElectionOptimized {
+    // admin (20 bytes) + votingOpen (1) + candidateCount (4) + totalVotes (4) = one slot
+    address public admin;
+    bool public votingOpen;
+    uint32 public candidateCount;
+    uint32 public totalVotes;
+
+    mapping(uint => bytes32) public candidateMetaHash;
+    // candidate id i is lane (i & 7) of word (i >> 3)
+    mapping(uint => uint) private voteWords;
+    // voter address a is bit (a & 0xff) of word (a >> 8)
+    mapping(uint => uint) private votedWords;
+
+    // Merkle roots of off-chain ballot batches (ledger mode)
+    bytes32[] public ballotRoots;
+    uint public anchoredBallots;
+
+    event CandidateAdded(uint indexed candidateId, string name, string position, string symbol);
+    event BallotCast(address indexed voter, uint[] candidateIds, uint timestamp);
+    event VotingStarted(uint timestamp);
+    event VotingEnded(uint timestamp);
+    event BallotRootAnchored(uint indexed batchIndex, bytes32 root, uint ballotCount, uint timestamp);
+
+    modifier onlyAdmin() {
+        require(msg.sender == admin, "Only admin can perform this action");
+        _;
+    }
+
+    modifier votingIsOpen() {
+        require(votingOpen, "Voting is not open");
+        _;
+    }
+
+    modifier votingIsClosed() {
+        require(!votingOpen, "Voting must be closed");
+        _;
+    }
+
+    constructor() {
+        admin = msg.sender;
+    }
+
+    function electionVariant() public pure returns (string memory) {
+        return "ElectionOptimized";
+    }
+
+    function addCandidate(
+        string memory _name,
+        string memory _position,
+        string memory _symbol
+    ) public onlyAdmin votingIsClosed {
+        _addCandidate(_name, _position, _symbol);
+    }
+
+    function addCandidates(
+        string[] memory _names,
+        string[] memory _positions,
+        string[] memory _symbols
+    ) public onlyAdmin votingIsClosed {
+        require(
+            _names.length == _positions.length && _names.length == _symbols.length,
+            "Candidate field arrays must have equal length"
+        );
+        for (uint i = 0; i < _names.length; i++) {
+            _addCandidate(_names[i], _positions[i], _symbols[i]);
+        }
+    }
+
+    function _addCandidate(
+        string memory _name,
+        string memory _position,
+        string memory _symbol
+    ) internal {
+        uint32 id = candidateCount + 1;
+        candidateCount = id;
+        candidateMetaHash[id] = keccak256(abi.encode(_name, _position, _symbol));
+        emit CandidateAdded(id, _name, _position, _symbol);
+    }
+
+    function startVoting() public onlyAdmin votingIsClosed {
+        require(candidateCount > 0, "Add at least one candidate before starting");
+        votingOpen = true;
+        emit VotingStarted(block.timestamp);
+    }
+
+    function endVoting() public onlyAdmin votingIsOpen {
+        votingOpen = false;
+        emit VotingEnded(block.timestamp);
+    }
+
+    function castBallot(uint[] calldata _candidateIds) external votingIsOpen {
+        uint n = _candidateIds.length;
+        require(n > 0, "No candidates selected");
+
+        uint key = uint(uint160(msg.sender));
+        uint votedIndex = key >> 8;
+        uint votedMask = 1 << (key & 0xff);
+        uint votedWord = votedWords[votedIndex];
+        require(votedWord & votedMask == 0, "You have already voted");
+        votedWords[votedIndex] = votedWord | votedMask;
+
+        uint count = candidateCount;
+        uint wordIndex = type(uint).max;
+        uint word;
+        for (uint i = 0; i < n; i++) {
+            uint cid = _candidateIds[i];
+            require(cid > 0 && cid <= count, "Invalid candidate ID");
+            // Consecutive ids in the same word cost one SLOAD/SSTORE pair
+            if (cid >> 3 != wordIndex) {
+                if (wordIndex != type(uint).max) {
+                    voteWords[wordIndex] = word;
+                }
+                wordIndex = cid >> 3;
+                word = voteWords[wordIndex];
+            }
+            word += 1 << ((cid & 7) * 32);
+        }
+        voteWords[wordIndex] = word;
+
+        totalVotes += 1;
+        emit BallotCast(msg.sender, _candidateIds, block.timestamp);
+    }
+
+    // Ledger mode: ballots are kept off-chain and only the Merkle root of each
+    // batch is anchored here. Inner nodes hash the sorted pair of children.
+    function anchorBallotRoot(bytes32 _root, uint _ballotCount) public onlyAdmin returns (uint batchIndex) {
+        require(_root != bytes32(0), "Empty ballot root");
+        require(_ballotCount > 0, "Empty ballot batch");
+        ballotRoots.push(_root);
+        anchoredBallots += _ballotCount;
+        batchIndex = ballotRoots.length - 1;
+        emit BallotRootAnchored(batchIndex, _root, _ballotCount, block.timestamp);
+    }
+
+    function ballotRootCount() public view returns (uint) {
+        return ballotRoots.length;
+    }
+
+    function verifyBallotProof(
+        uint _batchIndex,
+        bytes32 _leaf,
+        bytes32[] memory _proof
+    ) public view returns (bool) {
+        require(_batchIndex < ballotRoots.length, "Unknown ballot batch");
+        bytes32 node = _leaf;
+        for (uint i = 0; i < _proof.length; i++) {
+            node = node < _proof[i]
+                ? keccak256(abi.encodePacked(node, _proof[i]))
+                : keccak256(abi.encodePacked(_proof[i], node));
+        }
+        return node == ballotRoots[_batchIndex];
+    }
+
+    function hasVoted(address _voter) public view returns (bool) {
+        uint key = uint(uint160(_voter));
+        return votedWords[key >> 8] & (1 << (key & 0xff)) != 0;
+    }
+
+    function _voteCount(uint _id) internal view returns (uint) {
+        return (voteWords[_id >> 3] >> ((_id & 7) * 32)) & 0xffffffff;
+    }
+
+    function getCandidate(uint _id) public view returns (
+        uint id,
+        bytes32 metaHash,
+        uint voteCount
+    ) {
+        require(_id > 0 && _id <= candidateCount, "Invalid candidate ID");
+        return (_id, candidateMetaHash[_id], _voteCount(_id));
+    }
+
+    function getCandidates(uint _offset, uint _limit) public view returns (
+        uint[] memory ids,
+        bytes32[] memory metaHashes,
+        uint[] memory voteCounts
+    ) {
+        uint n = 0;
+        if (_offset < candidateCount) {
+            n = candidateCount - _offset;
+            if (_limit < n) {
+                n = _limit;
+            }
+        }
+
+        ids = new uint[](n);
+        metaHashes = new bytes32[](n);
+        voteCounts = new uint[](n);
+
+        for (uint i = 0; i < n; i++) {
+            uint id = _offset + i + 1;
+            ids[i] = id;
+            metaHashes[i] = candidateMetaHash[id];
+            voteCounts[i] = _voteCount(id);
+        }
+    }
+
+    function getStatus() public view returns (
+        bool _votingOpen,
+        uint _candidateCount,
+        uint _totalVotes
+    ) {
+        return (votingOpen, candidateCount, totalVotes);
+    }
+}
@@ -1,6 +1,7 @@
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
@@ -9,20 +10,45 @@ import os
 import jwt
 import datetime
 import base64
+import re
 import json
 import uuid
+
+# Load environment variables before the modules below read their settings at import
+load_dotenv()
+
 import blockchain
+import vote_pipeline
+import indexer
+import ledger
+import signatures
+import tally
+import wallets
+import voted_set
+import blobstore
+import principals
+import candidate_meta
+import candidate_sync
 import random
 import string
-from eth_account.messages import encode_defunct
-
-# Load environment variables
-load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
 JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_EXPIRES_MINUTES = int(os.getenv("JWT_EXPIRES_MINUTES", 60))
+# Carry role and voter_id in the token so read-only routes skip the users lookup
+JWT_ROLE_CLAIMS = os.getenv("JWT_ROLE_CLAIMS", "false").lower() in ("1", "true", "yes")
+# "async" returns a ballot ticket as soon as the vote tx is sent; "sync" waits for the receipt;
+# "relayed" queues the signed ballot and a relayer submits many ballots per castBallots transaction
+VOTE_SUBMISSION_MODE = os.getenv("VOTE_SUBMISSION_MODE", "async").strip().lower()
+RECEIPT_POLL_INTERVAL = float(os.getenv("RECEIPT_POLL_INTERVAL", 1.0))
+RELAY_BATCH_SIZE = int(os.getenv("RELAY_BATCH_SIZE", 25))
+RELAY_INTERVAL = float(os.getenv("RELAY_INTERVAL", 1.0))
+# "chain" reads status/candidates/results from contract storage; "index" serves them from the event indexer
+RESULTS_SOURCE = os.getenv("RESULTS_SOURCE", "chain").strip().lower()
+# /api/voters page size (default and upper bound of ?limit=)
+VOTERS_PAGE_SIZE = int(os.getenv("VOTERS_PAGE_SIZE", 100))
+VOTERS_MAX_PAGE_SIZE = int(os.getenv("VOTERS_MAX_PAGE_SIZE", 1000))
 
 # Flask app
 app = Flask(__name__)
@@ -62,7 +88,14 @@ candidate_applications = db["candidate_applications"]
 election_config = db["election_config"]
 blockchain_config = db["blockchain_config"]
 votes = db["votes"] 
+ledger_batches = db["ledger_batches"]  # Merkle roots of anchored ballot batches (ledger mode)
 metamask_nonces = db["metamask_nonces"] # Collection for MetaMask auth nonces
+voter_blobs = blobstore.BlobStore(db)  # Voter photos and fingerprint templates (GridFS)
+principal_cache = principals.PrincipalCache(users)  # Authenticated users, by user id
+candidate_details = candidate_meta.CandidateMetadata(candidate_applications)  # Application details of on-chain candidates
+
+# Projection for user lookups: records not yet moved by migrate_voter_blobs.py still hold the blobs inline
+USER_LEAN = {"photo_data": 0, "fingerprint_template": 0}
 
 try:
     candidate_applications.create_index([("voter_id", 1)], unique=True)
@@ -74,11 +107,68 @@ try:
 except Exception:
     pass
 
+try:
+    candidate_meta.ensure_indexes(candidate_applications)
+    candidate_sync.ensure_indexes(db["candidate_sync"])
+except Exception:
+    pass
+
 try:
     election_config.create_index([("key", 1)], unique=True)
 except Exception:
     pass
 
+try:
+    # Keyset pages of /api/voters, unfiltered and per filter, in (created_at, _id) order
+    users.create_index([("user_type", 1), ("created_at", -1), ("_id", -1)])
+    users.create_index([("user_type", 1), ("branch_name", 1), ("created_at", -1), ("_id", -1)])
+    users.create_index([("user_type", 1), ("has_account", 1), ("created_at", -1), ("_id", -1)])
+    users.create_index([("user_type", 1), ("full_name", 1)])
+except Exception:
+    pass
+
+try:
+    # Custodial voter accounts (HD-wallet mode), joined against ballot senders
+    users.create_index([("custodial_address", 1)], sparse=True)
+    # Blob references, checked before a deleted voter's blobs are removed
+    users.create_index([("photo_ref", 1)], sparse=True)
+    users.create_index([("fingerprint_ref", 1)], sparse=True)
+except Exception:
+    pass
+
+try:
+    votes.create_index([("status", 1), ("timestamp", 1)])
+    votes.create_index([("tx_hash", 1)])
+    votes.create_index([("status", 1), ("batch_id", 1)])
+    ledger_batches.create_index([("batch_id", 1)], unique=True)
+    ledger_batches.create_index([("status", 1), ("created_at", 1)])
+except Exception:
+    pass
+
+try:
+    # One ballot record per voter per election; failed attempts are deleted before a retry is inserted
+    votes.create_index([("election_id", 1), ("voter_id", 1)], unique=True)
+except Exception as e:
+    print(f"⚠️  votes (election_id, voter_id) unique index not created: {e}")
+
+voted_voters = voted_set.VotedSet(votes)
+voted_voters.start()
+
+receipt_poller = vote_pipeline.ReceiptPoller(votes, interval=RECEIPT_POLL_INTERVAL)
+ballot_relayer = vote_pipeline.BallotRelayer(votes, interval=RELAY_INTERVAL, batch_size=RELAY_BATCH_SIZE)
+if VOTE_SUBMISSION_MODE in ["async", "relayed"]:
+    receipt_poller.start()
+if VOTE_SUBMISSION_MODE == "relayed":
+    ballot_relayer.start()
+
+ledger_anchorer = ledger.LedgerAnchorer(votes, ledger_batches)
+if VOTE_SUBMISSION_MODE == "ledger":
+    ledger_anchorer.start()
+
+chain_indexer = indexer.IndexerThread(db)
+if RESULTS_SOURCE == "index":
+    chain_indexer.start()
+
 
 def _allowed_ext(filename, allowed_exts):
     ext = os.path.splitext(filename or "")[1].lower().lstrip(".")
@@ -124,7 +214,7 @@ def _format_deadline_text(nomination_last_date):
 
 @app.route("/api/election-config", methods=["GET"])
 def get_election_config():
-    user, error_response, status_code = verify_token_and_get_user()
+    user, error_response, status_code = verify_token_and_get_user(claims_ok=True)
     if error_response:
         return error_response, status_code
 
@@ -412,7 +502,7 @@ def submit_candidate_application():
 
 @app.route("/api/candidate-applications", methods=["GET"])
 def list_candidate_applications():
-    user, error_response, status_code = verify_token_and_get_user()
+    user, error_response, status_code = verify_token_and_get_user(claims_ok=True)
     if error_response:
         return error_response, status_code
 
@@ -482,6 +572,7 @@ def review_candidate_application(app_id):
         result = candidate_applications.update_one({"_id": obj_id}, {"$set": update})
         if result.matched_count == 0:
             return jsonify({"success": False, "message": "Application not found"}), 404
+        candidate_details.invalidate()
 
         updated = candidate_applications.find_one({"_id": obj_id})
         updated_out = {k: updated.get(k) for k in updated.keys() if k != "_id"}
@@ -496,11 +587,14 @@ def review_candidate_application(app_id):
         return jsonify({"success": False, "message": f"Failed to update application: {str(e)}"}), 500
 
 # Generate JWT token
-def generate_token(user_id):
+def generate_token(user_id, user=None):
     payload = {
         "user_id": str(user_id),
         "exp": datetime.datetime.utcnow() + datetime.timedelta(minutes=JWT_EXPIRES_MINUTES)
     }
+    if JWT_ROLE_CLAIMS and user is not None:
+        payload["role"] = user.get("user_type")
+        payload["voter_id"] = user.get("voter_id")
     token = jwt.encode(payload, JWT_SECRET, algorithm="HS256")
     return token
 
@@ -573,7 +667,12 @@ def send_email_otp(email, otp):
         return True  # Return True so signup doesn't fail
 
 # Verify JWT token and get user
-def verify_token_and_get_user():
+def verify_token_and_get_user(claims_ok=False):
+    """
+    Resolve the bearer token to its user's principal (see principals.py).
+    Read-only routes that only check user_type / voter_id pass claims_ok=True
+    to take them from the token itself when it carries JWT_ROLE_CLAIMS.
+    """
     auth_header = request.headers.get("Authorization")
     
     if not auth_header or not auth_header.startswith("Bearer "):
@@ -583,11 +682,9 @@ def verify_token_and_get_user():
     
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-        user_id = payload.get("user_id")
-        try:
-            user = users.find_one({"_id": ObjectId(user_id)})
-        except:
-            user = None
+        user = principals.from_claims(payload) if claims_ok else None
+        if user is None:
+            user = principal_cache.get(payload.get("user_id"))
         return user, None, None
     except jwt.ExpiredSignatureError:
         return None, jsonify({"success": False, "message": "Token has expired"}), 401
@@ -611,7 +708,7 @@ def signup():
     if user_type != "voter":
         if not email:
             return jsonify({"success": False, "message": "Email is required"}), 400
-        if users.find_one({"email": email}):
+        if users.find_one({"email": email}, USER_LEAN):
             return jsonify({"success": False, "message": "Email already exists"}), 409
 
     # Password validation - must be exactly 6 digits for voters
@@ -646,7 +743,7 @@ def signup():
             return jsonify({"success": False, "message": "Name and Voter ID are required for voter signup"}), 400
 
         # Verify voter exists in database
-        voter = users.find_one({"voter_id": voter_id, "user_type": "voter"})
+        voter = users.find_one({"voter_id": voter_id, "user_type": "voter"}, USER_LEAN)
         if not voter:
             return jsonify({"success": False, "message": "Voter ID not found. Please contact admin."}), 404
 
@@ -677,7 +774,7 @@ def signup():
             return jsonify({"success": False, "message": "OTP has expired. Please request a new one."}), 400
 
         # Check if email already exists (for account creation)
-        if users.find_one({"email": email, "has_account": True}):
+        if users.find_one({"email": email, "has_account": True}, USER_LEAN):
             return jsonify({"success": False, "message": "Account already exists for this email"}), 409
         
         user_data["name"] = name
@@ -714,12 +811,13 @@ def signup():
 
         if update_result.matched_count == 0:
             return jsonify({"success": False, "message": "Voter record not found for update"}), 404
+        principal_cache.invalidate(voter_id=voter_id)
 
         # Clean up verified OTP
         otp_storage.delete_many({"voter_id": voter_id})
 
         # Return success with the existing user's id
-        updated_user = users.find_one({"voter_id": voter_id, "user_type": "voter"})
+        updated_user = users.find_one({"voter_id": voter_id, "user_type": "voter"}, USER_LEAN)
         return jsonify({
             "success": True,
             "message": "Signup successful",
@@ -746,7 +844,7 @@ def login():
     if not email or not password:
         return jsonify({"success": False, "message": "Email and password are required"}), 400
 
-    user = users.find_one({"email": email})
+    user = users.find_one({"email": email}, USER_LEAN)
     if not user:
         return jsonify({"success": False, "message": "User not found"}), 404
 
@@ -760,7 +858,7 @@ def login():
             "message": f"This account is registered as {user.get('user_type', 'voter')}, not {user_type}"
         }), 403
 
-    token = generate_token(user["_id"])
+    token = generate_token(user["_id"], user)
 
     response_data = {
         "success": True,
@@ -866,17 +964,15 @@ def verify_metamask_signature():
     
     # Verification message matches what frontend will sign
     message_text = f"Sign this message to authenticate with Electra: {nonce}"
-    msghash = encode_defunct(text=message_text)
     
     try:
-        from web3 import Web3
-        w3 = Web3()
-        recovered_address = w3.eth.account.recover_message(msghash, signature=signature)
+        # Recovery runs in the signature worker pool, off the request thread
+        recovered_address = signatures.recover_signer(message_text, signature)
         
-        if recovered_address.lower() == address:
+        if recovered_address and recovered_address.lower() == address:
             # Signature is valid!
             # Find user by wallet address
-            user = users.find_one({"wallet_address": address})
+            user = users.find_one({"wallet_address": address}, USER_LEAN)
             
             if not user:
                 # If user doesn't exist, we might want to register them or return an error
@@ -887,7 +983,7 @@ def verify_metamask_signature():
                 }), 404
             
             # Create token
-            token = generate_token(user["_id"])
+            token = generate_token(user["_id"], user)
             
             # Clean up nonce
             metamask_nonces.delete_one({"address": address})
@@ -937,7 +1033,7 @@ def link_wallet():
     address = address.lower()
     
     # Check if this wallet is already linked to another account
-    existing = users.find_one({"wallet_address": address})
+    existing = users.find_one({"wallet_address": address}, USER_LEAN)
     if existing and str(existing["_id"]) != str(user["_id"]):
         return jsonify({"success": False, "message": "This wallet is already linked to another account"}), 409
     
@@ -946,6 +1042,7 @@ def link_wallet():
         {"_id": user["_id"]},
         {"$set": {"wallet_address": address, "updated_at": datetime.datetime.utcnow()}}
     )
+    principal_cache.invalidate(user_id=user["_id"])
     
     return jsonify({"success": True, "message": "Wallet linked successfully"}), 200
 
@@ -983,7 +1080,7 @@ def verify_token():
 @app.route("/api/notifications", methods=["GET"])
 def get_notifications():
     """Get all notifications for voters"""
-    user, error_response, status_code = verify_token_and_get_user()
+    user, error_response, status_code = verify_token_and_get_user(claims_ok=True)
     if error_response:
         return error_response, status_code
     
@@ -1107,22 +1204,17 @@ def add_voter():
         return jsonify({"success": False, "message": "Fingerprint is required"}), 400
     
     # Check if voter_id already exists
-    if users.find_one({"voter_id": voter_id}):
+    if users.find_one({"voter_id": voter_id}, USER_LEAN):
         return jsonify({"success": False, "message": "Voter ID already exists"}), 409
     
     # Check if email already exists
-    if users.find_one({"email": email}):
+    if users.find_one({"email": email}, USER_LEAN):
         return jsonify({"success": False, "message": "Email already exists"}), 409
     
     # Save photo
-    # We'll store the image both on disk (for compatibility) and as base64 in DB
+    # The image goes to disk (served at photo_url) and, as raw bytes, to the blob store
     try:
-        # Read file bytes for DB storage
         photo_bytes = photo_file.read()
-        try:
-            photo_b64 = base64.b64encode(photo_bytes).decode('utf-8')
-        except Exception:
-            photo_b64 = None
 
         # Reset stream pointer so we can save to disk
         try:
@@ -1162,6 +1254,13 @@ def add_voter():
     phone_digits = ''.join(filter(str.isdigit, phone_no or ''))
     if not phone_digits or len(phone_digits) != 10:
         return jsonify({"success": False, "message": "Phone number must be exactly 10 digits"}), 400
+
+    # Blobs are stored apart from the users record, which keeps only their references
+    try:
+        photo_ref = voter_blobs.put(photo_bytes, photo_file.mimetype or "application/octet-stream")
+        fingerprint_ref = voter_blobs.put_fingerprint(fingerprint_data)
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error storing photo/fingerprint: {str(e)}"}), 500
     
     # Create voter data for MongoDB
     voter_data = {
@@ -1173,8 +1272,8 @@ def add_voter():
         "phone_no": phone_no,
         "branch_name": branch_name,
         "photo_url": photo_url,
-        "photo_data": photo_b64,
-        "fingerprint_template": fingerprint_data,
+        "photo_ref": photo_ref,
+        "fingerprint_ref": fingerprint_ref,
         "user_type": "voter",
         "has_account": False,  # Track if voter has created account
         "created_at": datetime.datetime.utcnow(),
@@ -1247,7 +1346,7 @@ def verify_voter_id():
         return jsonify({"success": False, "message": "Voter ID is required"}), 400
     
     # Check if voter exists
-    voter = users.find_one({"voter_id": voter_id, "user_type": "voter"})
+    voter = users.find_one({"voter_id": voter_id, "user_type": "voter"}, USER_LEAN)
     
     if not voter:
         return jsonify({"success": False, "message": "Voter ID not found in database"}), 404
@@ -1276,7 +1375,7 @@ def send_otp():
         return jsonify({"success": False, "message": "Voter ID and email are required"}), 400
     
     # Verify voter exists and email matches
-    voter = users.find_one({"voter_id": voter_id, "email": email})
+    voter = users.find_one({"voter_id": voter_id, "email": email}, USER_LEAN)
     
     if not voter:
         return jsonify({"success": False, "message": "Voter ID and email do not match"}), 404
@@ -1623,10 +1722,44 @@ def capture_mantra_fingerprint():
     except Exception as e:
         raise Exception(f"Fingerprint capture failed: {str(e)}")
 
+# Fields /api/voters returns when ?fields= is not given; blobs and secrets are left out
+VOTER_LIST_FIELDS = [
+    "voter_id", "full_name", "date_of_birth", "address", "email", "phone_no", "branch_name",
+    "photo_url", "has_account", "user_type", "created_at", "updated_at",
+]
+# Large or sensitive fields only admins may request explicitly
+VOTER_ADMIN_FIELDS = ["photo_ref", "fingerprint_ref", "wallet_address"]
+
+
+def _encode_voter_cursor(doc):
+    created_at = doc.get("created_at")
+    key = f"{created_at.isoformat() if isinstance(created_at, datetime.datetime) else ''}|{doc['_id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _voter_cursor_query(cursor):
+    """Filter for the voters after cursor in (created_at desc, _id desc) order."""
+    created_at, _, oid = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+    oid = ObjectId(oid)
+    if not created_at:
+        # Voters without created_at sort last; page through them by _id alone
+        return {"created_at": None, "_id": {"$lt": oid}}
+    created_at = datetime.datetime.fromisoformat(created_at)
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": oid}},
+        {"created_at": None},
+    ]}
+
+
 @app.route("/api/voters", methods=["GET"])
 def get_voters():
-    """Return all voters stored in the users collection (user_type == 'voter')."""
-    user, error_response, status_code = verify_token_and_get_user()
+    """
+    Page through voters (user_type == 'voter'), newest first.
+    Query: limit, cursor (next_cursor of the previous page), branch, has_account,
+    name_prefix, voter_id, fields (comma-separated), include_total=1.
+    """
+    user, error_response, status_code = verify_token_and_get_user(claims_ok=True)
     if error_response:
         return error_response, status_code
 
@@ -1641,19 +1774,52 @@ def get_voters():
                 query["has_account"] = True
             elif has_account.lower() in ["false", "0"]:
                 query["has_account"] = False
+        if request.args.get("branch"):
+            query["branch_name"] = request.args["branch"]
+        if request.args.get("voter_id"):
+            query["voter_id"] = request.args["voter_id"]
+        if request.args.get("name_prefix"):
+            # Anchored, case-sensitive prefix so the full_name index bounds the scan
+            query["full_name"] = {"$regex": "^" + re.escape(request.args["name_prefix"])}
+
+        allowed = VOTER_LIST_FIELDS + (VOTER_ADMIN_FIELDS if user.get("user_type") == "admin" else [])
+        fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()] or VOTER_LIST_FIELDS
+        unknown = [f for f in fields if f not in allowed]
+        if unknown:
+            return jsonify({"success": False, "message": f"Unknown or restricted fields: {', '.join(unknown)}"}), 400
+        # created_at is always read for the cursor
+        projection = {f: 1 for f in fields + ["created_at"]}
+
+        try:
+            limit = min(max(int(request.args.get("limit", VOTERS_PAGE_SIZE)), 1), VOTERS_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({"success": False, "message": "limit must be a number"}), 400
+
+        page_query = dict(query)
+        if request.args.get("cursor"):
+            try:
+                page_query = {"$and": [query, _voter_cursor_query(request.args["cursor"])]}
+            except Exception:
+                return jsonify({"success": False, "message": "Invalid cursor"}), 400
+
+        # One extra document tells whether another page exists
+        docs = list(users.find(page_query, projection).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1))
+        next_cursor = _encode_voter_cursor(docs[limit - 1]) if len(docs) > limit else None
 
-        voters_cursor = users.find(query).sort("created_at", -1)
         voters = []
-        for v in voters_cursor:
-            v_obj = {k: v.get(k) for k in v.keys() if k != "_id"}
+        for v in docs[:limit]:
+            v_obj = {k: v.get(k) for k in fields}
             v_obj["_id"] = str(v.get("_id"))
-            if isinstance(v.get("created_at"), datetime.datetime):
+            if isinstance(v.get("created_at"), datetime.datetime) and "created_at" in fields:
                 v_obj["created_at"] = v.get("created_at").isoformat()
             if isinstance(v.get("updated_at"), datetime.datetime):
                 v_obj["updated_at"] = v.get("updated_at").isoformat()
             voters.append(v_obj)
 
-        return jsonify({"success": True, "voters": voters}), 200
+        out = {"success": True, "voters": voters, "next_cursor": next_cursor}
+        if request.args.get("include_total") in ["1", "true"]:
+            out["total"] = users.count_documents(query)
+        return jsonify(out), 200
     except Exception as e:
         return jsonify({"success": False, "message": f"Failed to fetch voters: {str(e)}"}), 500
 
@@ -1695,7 +1861,7 @@ def report_voter_error():
 @app.route("/api/reports", methods=["GET"])
 def get_reports():
     """Return all reports for admin review"""
-    user, error_response, status_code = verify_token_and_get_user()
+    user, error_response, status_code = verify_token_and_get_user(claims_ok=True)
     if error_response:
         return error_response, status_code
 
@@ -1719,6 +1885,43 @@ def get_reports():
         return jsonify({"success": False, "message": f"Failed to fetch reports: {str(e)}"}), 500
 
 
+@app.route("/api/voter/<voter_id>/photo", methods=["GET"])
+def get_voter_photo(voter_id):
+    """Voter photo from the blob store (admins, or the voter themselves)."""
+    user, error_response, status_code = verify_token_and_get_user(claims_ok=True)
+    if error_response:
+        return error_response, status_code
+    if not user:
+        return jsonify({"success": False, "message": "User not found"}), 404
+    if user.get("user_type") != "admin" and user.get("voter_id") != voter_id:
+        return jsonify({"success": False, "message": "Not allowed"}), 403
+
+    voter = users.find_one({"voter_id": voter_id, "user_type": "voter"}, {"photo_ref": 1})
+    blob = voter_blobs.get(voter["photo_ref"]) if voter and voter.get("photo_ref") else None
+    if blob is None:
+        return jsonify({"success": False, "message": "Photo not found"}), 404
+    data, content_type = blob
+    return app.response_class(data, mimetype=content_type, headers={"Cache-Control": "private, max-age=86400"})
+
+
+@app.route("/api/voter/<voter_id>/fingerprint", methods=["GET"])
+def get_voter_fingerprint(voter_id):
+    """Stored fingerprint template of a voter (Admin only)."""
+    user, error_response, status_code = verify_token_and_get_user(claims_ok=True)
+    if error_response:
+        return error_response, status_code
+    if not user:
+        return jsonify({"success": False, "message": "User not found"}), 404
+    if user.get("user_type") != "admin":
+        return jsonify({"success": False, "message": "Only admins can read fingerprint templates"}), 403
+
+    voter = users.find_one({"voter_id": voter_id, "user_type": "voter"}, {"fingerprint_ref": 1})
+    template = voter_blobs.get_fingerprint(voter["fingerprint_ref"]) if voter and voter.get("fingerprint_ref") else None
+    if template is None:
+        return jsonify({"success": False, "message": "Fingerprint not found"}), 404
+    return jsonify({"success": True, "voter_id": voter_id, "fingerprint_template": template}), 200
+
+
 @app.route("/api/voter/<voter_id>", methods=["DELETE"])
 def delete_voter(voter_id):
     """Delete a voter record (Admin only)"""
@@ -1731,9 +1934,17 @@ def delete_voter(voter_id):
         return jsonify({"success": False, "message": "Only admins can delete voters"}), 403
 
     try:
-        result = users.delete_one({"voter_id": voter_id, "user_type": "voter"})
-        if result.deleted_count == 0:
+        deleted = users.find_one_and_delete(
+            {"voter_id": voter_id, "user_type": "voter"}, {field: 1 for field in blobstore.REF_FIELDS}
+        )
+        if deleted is None:
             return jsonify({"success": False, "message": "Voter not found"}), 404
+        principal_cache.invalidate(voter_id=voter_id)
+        try:
+            # The photo and fingerprint template go with the record unless another voter shares them
+            voter_blobs.release([deleted.get(field) for field in blobstore.REF_FIELDS], users)
+        except Exception as e:
+            print(f"⚠️  Blobs of deleted voter {voter_id} not removed: {e}")
         return jsonify({"success": True, "message": "Voter deleted"}), 200
     except Exception as e:
         return jsonify({"success": False, "message": f"Failed to delete voter: {str(e)}"}), 500
@@ -1762,7 +1973,8 @@ def update_voter(voter_id):
         result = users.update_one({"voter_id": voter_id, "user_type": "voter"}, {"$set": update_fields})
         if result.matched_count == 0:
             return jsonify({"success": False, "message": "Voter not found"}), 404
-        updated = users.find_one({"voter_id": voter_id, "user_type": "voter"})
+        principal_cache.invalidate(voter_id=voter_id)
+        updated = users.find_one({"voter_id": voter_id, "user_type": "voter"}, USER_LEAN)
         updated["_id"] = str(updated["_id"])
         return jsonify({"success": True, "message": "Voter updated", "voter": updated}), 200
     except Exception as e:
@@ -1770,16 +1982,56 @@ def update_voter(voter_id):
 
 
 # ─── Blockchain Voting API ──────────────────────────────────────────────
+# Every /api/blockchain/* route also answers under /api/blockchain/<election_id>/...
+# The original single-election routes act on the "default" election, whose
+# registry entry keeps the historical key "active_contract".
+DEFAULT_ELECTION_ID = "default"
+
+
+def _election_key(election_id):
+    return "active_contract" if election_id == DEFAULT_ELECTION_ID else f"election:{election_id}"
+
+
+def _get_election(election_id):
+    """Registry entry (contract address, variant, ...) for an election, or None."""
+    return blockchain_config.find_one({"key": _election_key(election_id)})
+
+
+def _election_votes(election_id):
+    """votes filter for one election; records from before the registry belong to the default one."""
+    if election_id == DEFAULT_ELECTION_ID:
+        return {"election_id": {"$in": [DEFAULT_ELECTION_ID, None]}}
+    return {"election_id": election_id}
+
+
+@app.route("/api/elections", methods=["GET"])
+def list_elections():
+    """List registered elections and their contracts."""
+    elections = []
+    for cfg in blockchain_config.find({"address": {"$exists": True}}).sort("deployed_at", 1):
+        elections.append({
+            "election_id": cfg.get("election_id") or DEFAULT_ELECTION_ID,
+            "name": cfg.get("name"),
+            "branch_name": cfg.get("branch_name"),
+            "positions": cfg.get("positions"),
+            "contract_address": cfg.get("address"),
+            "contract_variant": cfg.get("contract_variant"),
+            "deployed_at": cfg.get("deployed_at"),
+        })
+    return jsonify({"success": True, "elections": elections}), 200
+
 
 @app.route("/api/blockchain/status", methods=["GET"])
-def get_blockchain_status():
+@app.route("/api/blockchain/<election_id>/status", methods=["GET"])
+def get_blockchain_status(election_id=DEFAULT_ELECTION_ID):
     """Get general status of the blockchain connection and contract."""
     connected = blockchain.is_connected()
-    config = blockchain_config.find_one({"key": "active_contract"})
+    config = _get_election(election_id)
     
     out = {
         "success": True,
         "ganache_connected": connected,
+        "election_id": election_id,
         "contract_deployed": bool(config),
         "contract_address": config.get("address") if config else None,
         "voting_open": False,
@@ -1787,40 +2039,74 @@ def get_blockchain_status():
         "total_votes": 0
     }
 
-    if connected and config:
+    indexed = indexer.get_indexed_status(db, config["address"]) if config and RESULTS_SOURCE == "index" else None
+    if indexed:
+        out.update(indexed)
+    elif connected and config:
         try:
             status = blockchain.get_status(config["address"])
             out.update(status)
         except Exception:
             pass
+
+    if config and connected and VOTE_SUBMISSION_MODE == "relayed":
+        try:
+            if blockchain.supports_relay(config["address"]):
+                # The voting page signs ballots as EIP-712 typed data over this domain
+                out["ballot_signing"] = "eip712"
+                out["ballot_domain"] = blockchain.ballot_domain(config["address"])
+        except Exception:
+            pass
+
+    if config and VOTE_SUBMISSION_MODE == "ledger":
+        # Ballots live in the off-chain ledger; the contract only holds their Merkle roots
+        out["total_votes"] = votes.count_documents({
+            "contract_address": config["address"], "leaf": {"$exists": True},
+            "status": {"$ne": vote_pipeline.VOTE_FAILED}
+        })
             
     return jsonify(out), 200
 
 
 @app.route("/api/blockchain/deploy", methods=["POST"])
-def deploy_blockchain_contract():
+@app.route("/api/blockchain/<election_id>/deploy", methods=["POST"])
+def deploy_blockchain_contract(election_id=DEFAULT_ELECTION_ID):
     """Deploy the Election contract to Ganache (Admin only)."""
     user, error_response, status_code = verify_token_and_get_user()
     if error_response: return error_response, status_code
     if user.get("user_type") != "admin":
         return jsonify({"success": False, "message": "Only admins can deploy contract"}), 403
 
+    data = request.get_json(silent=True) or {}
     try:
         result = blockchain.deploy_contract()
-        # Save to DB
+        # Save to the election registry
         blockchain_config.update_one(
-            {"key": "active_contract"},
+            {"key": _election_key(election_id)},
             {"$set": {
+                "election_id": election_id,
+                "name": data.get("name"),
+                "branch_name": data.get("branch_name"),
+                "positions": data.get("positions"),
                 "address": result["contract_address"],
                 "admin_address": result["admin_address"],
                 "deployed_at": datetime.datetime.utcnow(),
-                "tx_hash": result["tx_hash"]
-            }},
+                "tx_hash": result["tx_hash"],
+                "deployment_id": uuid.uuid4().hex,
+                "contract_variant": result["contract_variant"]
+            }, "$unset": {"candidate_sync_lease": ""}},
             upsert=True
         )
+        # A redeploy can reuse an address (tester://, a reset Ganache); nothing derived from the old contract applies
+        address = result["contract_address"]
+        indexer.drop_projection(db, address)
+        ledger_batches.delete_many({"contract": {"$in": [address, address.lower()]}})
+        candidate_sync.forget_contract(candidate_applications, address)
+        candidate_details.invalidate(address)
         return jsonify({
             "success": True, 
             "message": "Contract deployed successfully",
+            "election_id": election_id,
             "contract_address": result["contract_address"],
             "tx_hash": result["tx_hash"]
         }), 201
@@ -1829,59 +2115,61 @@ def deploy_blockchain_contract():
 
 
 @app.route("/api/blockchain/add-candidates", methods=["POST"])
-def sync_candidates_to_blockchain():
+@app.route("/api/blockchain/<election_id>/add-candidates", methods=["POST"])
+def sync_candidates_to_blockchain(election_id=DEFAULT_ELECTION_ID):
     """Sync approved candidate applications to the blockchain (Admin only)."""
     user, error_response, status_code = verify_token_and_get_user()
     if error_response: return error_response, status_code
     if user.get("user_type") != "admin":
         return jsonify({"success": False, "message": "Only admins can sync candidates"}), 403
 
-    config = blockchain_config.find_one({"key": "active_contract"})
+    config = _get_election(election_id)
     if not config:
         return jsonify({"success": False, "message": "No contract deployed"}), 400
 
     try:
-        # Get all approved candidates
-        approved_apps = list(candidate_applications.find({"status": "Approved"}))
+        approved_apps = candidate_sync.approved_applications(candidate_applications, config)
         if not approved_apps:
             return jsonify({"success": False, "message": "No approved candidates to sync"}), 400
 
-        # Get existing candidates on chain to avoid duplicates (simplified)
-        on_chain = blockchain.get_candidates(config["address"])
-        on_chain_names = {c["name"] for c in on_chain}
-
-        synced_count = 0
-        tx_hashes = []
-
-        for app in approved_apps:
-            name = app.get("full_name")
-            if name in on_chain_names: continue
-            
-            res = blockchain.add_candidate(
-                config["address"], 
-                name, 
-                app.get("position", "Standard"), 
-                app.get("symbol", "None")
-            )
-            tx_hashes.append(res["tx_hash"])
-            synced_count += 1
-
+        # Only applications the sync journal has not confirmed are sent; a crashed run is resumed first
+        summary = candidate_sync.CandidateSync(db, config).run(approved_apps)
+        candidate_details.invalidate(config["address"])
+        results = summary["results"]
+        # status None is a transaction still waiting for its receipt, not a failure
+        failed = [{"name": r["name"], "tx_hash": r["tx_hash"], "error": r["error"]} for r in results if r["status"] == 0]
+        pending = [{"name": r["name"], "tx_hash": r["tx_hash"]} for r in results if r["status"] is None]
+
+        message = f"Synced {summary['confirmed']} candidates"
+        if summary["already_synced"]:
+            message += f" ({summary['already_synced']} already on chain)"
+        if failed:
+            message += f", {len(failed)} failed"
+        if summary["in_flight"]:
+            message += f", {summary['in_flight']} still pending; sync again shortly"
         return jsonify({
-            "success": True, 
-            "message": f"Synced {synced_count} candidates",
-            "tx_hashes": tx_hashes
+            "success": not failed,
+            "message": message,
+            "tx_hashes": sorted({r["tx_hash"] for r in results if r["tx_hash"]}),
+            "failed": failed,
+            "pending": pending,
+            "in_flight": summary["in_flight"],
+            "results": results
         }), 200
+    except candidate_sync.SyncInProgress as e:
+        return jsonify({"success": False, "message": str(e)}), 409
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
 
 @app.route("/api/blockchain/start-voting", methods=["POST"])
-def start_blockchain_voting():
+@app.route("/api/blockchain/<election_id>/start-voting", methods=["POST"])
+def start_blockchain_voting(election_id=DEFAULT_ELECTION_ID):
     user, error_response, status_code = verify_token_and_get_user()
     if error_response: return error_response, status_code
     if user.get("user_type") != "admin": return jsonify({"success": False, "message": "Admin only"}), 403
 
-    config = blockchain_config.find_one({"key": "active_contract"})
+    config = _get_election(election_id)
     if not config: return jsonify({"success": False, "message": "No contract"}), 400
 
     try:
@@ -1892,12 +2180,13 @@ def start_blockchain_voting():
 
 
 @app.route("/api/blockchain/end-voting", methods=["POST"])
-def end_blockchain_voting():
+@app.route("/api/blockchain/<election_id>/end-voting", methods=["POST"])
+def end_blockchain_voting(election_id=DEFAULT_ELECTION_ID):
     user, error_response, status_code = verify_token_and_get_user()
     if error_response: return error_response, status_code
     if user.get("user_type") != "admin": return jsonify({"success": False, "message": "Admin only"}), 403
 
-    config = blockchain_config.find_one({"key": "active_contract"})
+    config = _get_election(election_id)
     if not config: return jsonify({"success": False, "message": "No contract"}), 400
 
     try:
@@ -1908,20 +2197,20 @@ def end_blockchain_voting():
 
 
 @app.route("/api/blockchain/candidates", methods=["GET"])
-def get_blockchain_candidates():
-    config = blockchain_config.find_one({"key": "active_contract"})
+@app.route("/api/blockchain/<election_id>/candidates", methods=["GET"])
+def get_blockchain_candidates(election_id=DEFAULT_ELECTION_ID):
+    config = _get_election(election_id)
     if not config:
         return jsonify({"success": True, "candidates": []}), 200
     
     try:
-        candidates = blockchain.get_candidates(config["address"])
+        candidates = None
+        if RESULTS_SOURCE == "index" and indexer.get_indexed_status(db, config["address"]):
+            candidates = indexer.get_indexed_candidates(db, config["address"])
+        if candidates is None:
+            candidates = blockchain.get_candidates(config["address"])
         # Merge with MongoDB data for photos/details
-        for c in candidates:
-            app = candidate_applications.find_one({"full_name": c["name"], "status": "Approved"})
-            if app:
-                c["candidate_photo_url"] = app.get("candidate_photo_url")
-                c["branch_name"] = app.get("branch_name")
-                c["statement"] = app.get("statement")
+        candidate_details.decorate(config["address"], candidates)
         
         return jsonify({"success": True, "candidates": candidates}), 200
     except Exception as e:
@@ -1929,31 +2218,72 @@ def get_blockchain_candidates():
 
 
 @app.route("/api/blockchain/voter-status", methods=["GET"])
-def get_voter_blockchain_status():
-    user, error_response, status_code = verify_token_and_get_user()
+@app.route("/api/blockchain/<election_id>/voter-status", methods=["GET"])
+def get_voter_blockchain_status(election_id=DEFAULT_ELECTION_ID):
+    user, error_response, status_code = verify_token_and_get_user(claims_ok=True)
     if error_response: return error_response, status_code
 
     voter_id = user.get("voter_id")
     if not voter_id:
         return jsonify({"success": False, "message": "Not a registered voter"}), 400
 
-    config = blockchain_config.find_one({"key": "active_contract"})
+    config = _get_election(election_id)
     if not config:
         return jsonify({"success": True, "has_voted": False}), 200
 
-    # Derive Ganache address from DB index or just use the blockchain.py helper
-    # For simulation, we'll try to find if they've voted in our Mongo 'votes' collection first
-    vote_record = votes.find_one({"voter_id": voter_id})
+    # Most voters have no record yet; the in-memory voted set answers that without a query
+    if not voted_voters.may_have_voted(election_id, voter_id):
+        return jsonify({"success": True, "has_voted": False, "vote_status": None, "ticket": None,
+                        "tx_hash": None, "block_number": None, "error": None}), 200
+
+    vote_record = votes.find_one({"voter_id": voter_id, **_election_votes(election_id)}, sort=[("timestamp", -1)])
+    # Records written before async submission have no status and were mined synchronously
+    vote_status = (vote_record.get("status") or vote_pipeline.VOTE_CONFIRMED) if vote_record else None
     
     return jsonify({
         "success": True, 
-        "has_voted": bool(vote_record),
-        "tx_hash": vote_record.get("tx_hash") if vote_record else None
+        "has_voted": bool(vote_record) and vote_status != vote_pipeline.VOTE_FAILED,
+        "vote_status": vote_status,
+        "ticket": vote_record.get("ticket") if vote_record else None,
+        "tx_hash": vote_record.get("tx_hash") if vote_record else None,
+        "block_number": vote_record.get("block_number") if vote_record else None,
+        "error": vote_record.get("error") if vote_record else None
     }), 200
 
 
+@app.route("/api/blockchain/ballot-proof", methods=["GET"])
+@app.route("/api/blockchain/<election_id>/ballot-proof", methods=["GET"])
+def get_ballot_inclusion_proof(election_id=DEFAULT_ELECTION_ID):
+    """Merkle inclusion proof for the voter's ledger ballot (ledger mode)."""
+    user, error_response, status_code = verify_token_and_get_user(claims_ok=True)
+    if error_response: return error_response, status_code
+
+    voter_id = user.get("voter_id")
+    if not voter_id:
+        return jsonify({"success": False, "message": "Not a registered voter"}), 400
+
+    config = _get_election(election_id)
+    if not config:
+        return jsonify({"success": False, "message": "Election not initialized"}), 400
+
+    proof = ledger.get_inclusion_proof(votes, ledger_batches, voter_id, config["address"])
+    if not proof:
+        return jsonify({"success": False, "message": "No ledger ballot found"}), 404
+
+    if proof["anchored"] and request.args.get("verify") == "chain":
+        try:
+            proof["verified_on_chain"] = blockchain.verify_ballot_proof(
+                proof["contract_address"], proof["batch_index"], proof["leaf"], proof["proof"]
+            )
+        except Exception as e:
+            return jsonify({"success": False, "message": str(e)}), 500
+
+    return jsonify({"success": True, **proof}), 200
+
+
 @app.route("/api/blockchain/cast-vote", methods=["POST"])
-def cast_blockchain_vote():
+@app.route("/api/blockchain/<election_id>/cast-vote", methods=["POST"])
+def cast_blockchain_vote(election_id=DEFAULT_ELECTION_ID):
     user, error_response, status_code = verify_token_and_get_user()
     if error_response: return error_response, status_code
     
@@ -1970,25 +2300,31 @@ def cast_blockchain_vote():
     if not candidate_ids or not isinstance(candidate_ids, list):
         return jsonify({"success": False, "message": "candidate_ids array required"}), 400
     
-    if not signature or not address or not message_text:
+    # Relayed ballots are signed as EIP-712 typed data instead of a personal_sign message
+    typed = data.get("signature_type") == "eip712"
+    if not signature or not address or not (message_text or typed):
         return jsonify({"success": False, "message": "MetaMask signature is required to vote"}), 400
 
-    config = blockchain_config.find_one({"key": "active_contract"})
+    config = _get_election(election_id)
     if not config:
         return jsonify({"success": False, "message": "Election not initialized"}), 400
 
-    # Prevent double voting in MongoDB
-    if votes.find_one({"voter_id": voter_id}):
+    # Prevent double voting in MongoDB (a failed transaction may be retried)
+    if voted_voters.may_have_voted(election_id, voter_id) and votes.find_one(
+            {"voter_id": voter_id, "status": {"$ne": vote_pipeline.VOTE_FAILED}, **_election_votes(election_id)}):
         return jsonify({"success": False, "message": "You have already cast your vote"}), 400
 
     # Verification: Ensure signature matches the address and user's linked wallet
     try:
         from web3 import Web3
-        w3 = Web3()
-        msghash = encode_defunct(text=message_text)
-        recovered_address = w3.eth.account.recover_message(msghash, signature=signature)
+        sorted_ids = sorted([int(cid) for cid in candidate_ids])
+        relayed = typed and VOTE_SUBMISSION_MODE == "relayed" and blockchain.supports_relay(config["address"])
+        if typed and not relayed:
+            return jsonify({"success": False, "message": "This election does not accept relayed ballots"}), 400
+        signed = blockchain.ballot_typed_data(config["address"], sorted_ids) if relayed else message_text
+        recovered_address = signatures.recover_signer(signed, signature)
         
-        if recovered_address.lower() != address.lower():
+        if not recovered_address or recovered_address.lower() != address.lower():
             return jsonify({"success": False, "message": "Invalid signature"}), 401
             
         linked_wallet = user.get("wallet_address")
@@ -1996,46 +2332,136 @@ def cast_blockchain_vote():
             return jsonify({"success": False, "message": "Please use your linked wallet to vote"}), 401
             
         # Security: Verify message contains the candidate_ids to prevent tampering
-        # Standardized Format: "Ballot: [1,2,3]" (no spaces, sorted)
-        sorted_ids = sorted([int(cid) for cid in candidate_ids])
+        # Standardized Format: "Ballot: [1,2,3]" (no spaces, sorted); typed ballots carry the ids themselves
         ballot_str = f"Ballot: [{','.join(map(str, sorted_ids))}]"
         
         # Security: Verify message text contains our formatted ballot string
-        if ballot_str not in message_text:
+        if not relayed and ballot_str not in message_text:
             return jsonify({
                 "success": False, 
                 "message": f"Signature message mismatch. Backend expected '{ballot_str}' inside your message, but got something else. Please restart your backend!"
             }), 400
 
-        res = blockchain.cast_vote(config["address"], candidate_ids, linked_wallet)
-        
-        # Record in MongoDB
+        ticket = uuid.uuid4().hex
+
+        # Ledger mode: append to the off-chain ledger; only batch Merkle roots go on-chain
+        if VOTE_SUBMISSION_MODE == "ledger":
+            status = blockchain.get_status(config["address"])
+            if not status["voting_open"]:
+                return jsonify({"success": False, "message": "Voting is not open"}), 400
+            if any(cid < 1 or cid > status["candidate_count"] for cid in sorted_ids) or len(set(sorted_ids)) != len(sorted_ids):
+                return jsonify({"success": False, "message": "Invalid candidate ID"}), 400
+            votes.delete_many({"voter_id": voter_id, "status": vote_pipeline.VOTE_FAILED, **_election_votes(election_id)})
+            entry = ledger.record_ballot(
+                votes, config["address"], voter_id, address, sorted_ids, ticket, signature,
+                election_id=election_id
+            )
+            voted_voters.add(election_id, voter_id)
+            return jsonify({
+                "success": True,
+                "message": "Ballot recorded in the ledger, awaiting anchoring",
+                "ticket": ticket,
+                "leaf": entry["leaf"],
+                "tx_hash": None,
+                "vote_status": vote_pipeline.VOTE_RECORDED
+            }), 202
+
+        # Relayed ballots carry a typed signature the contract verifies against its own domain
+        if relayed:
+            votes.delete_many({"voter_id": voter_id, "status": vote_pipeline.VOTE_FAILED, **_election_votes(election_id)})
+            votes.insert_one({
+                "election_id": election_id,
+                "voter_id": voter_id,
+                "candidate_ids": sorted_ids,
+                "ticket": ticket,
+                "tx_hash": None,
+                "voter_address": Web3.to_checksum_address(address),
+                "signature": signature,
+                "contract_address": config["address"],
+                "status": vote_pipeline.VOTE_QUEUED,
+                "timestamp": datetime.datetime.utcnow()
+            })
+            voted_voters.add(election_id, voter_id)
+            return jsonify({
+                "success": True,
+                "message": "Ballot queued for relayed submission",
+                "ticket": ticket,
+                "tx_hash": None,
+                "vote_status": vote_pipeline.VOTE_QUEUED
+            }), 202
+
+        # Custodial mode: the voter's own HD-derived account sends (and locally signs) the ballot
+        sender = linked_wallet
+        if wallets.enabled():
+            sender = wallets.voter_account(voter_id)
+            if user.get("custodial_address") != sender.address.lower():
+                users.update_one({"_id": user["_id"]}, {"$set": {"custodial_address": sender.address.lower()}})
+                principal_cache.invalidate(user_id=user["_id"])
+            if blockchain.fund_accounts([sender.address])["failed"]:
+                return jsonify({"success": False, "message": "Could not fund your voting account, please retry"}), 503
+
+        if VOTE_SUBMISSION_MODE in ["async", "relayed"]:
+            res = blockchain.submit_vote(config["address"], candidate_ids, sender)
+            vote_status = vote_pipeline.VOTE_PENDING
+        else:
+            res = blockchain.cast_vote(config["address"], candidate_ids, sender)
+            vote_status = vote_pipeline.VOTE_CONFIRMED
+
+        # Record in MongoDB, replacing any earlier failed attempt
+        votes.delete_many({"voter_id": voter_id, "status": vote_pipeline.VOTE_FAILED, **_election_votes(election_id)})
         votes.insert_one({
+            "election_id": election_id,
             "voter_id": voter_id,
             "candidate_ids": candidate_ids, # Store the list
+            "contract_address": config["address"],
+            "ticket": ticket,
             "tx_hash": res["tx_hash"],
             "voter_address": res["voter_address"],
+            "status": vote_status,
+            "block_number": res.get("block_number"),
             "timestamp": datetime.datetime.utcnow()
         })
+        voted_voters.add(election_id, voter_id)
+
+        if vote_status == vote_pipeline.VOTE_PENDING:
+            return jsonify({
+                "success": True,
+                "message": "Ballot submitted, awaiting confirmation",
+                "ticket": ticket,
+                "tx_hash": res["tx_hash"],
+                "vote_status": vote_status
+            }), 202
 
         return jsonify({
             "success": True, 
             "message": "Ballot cast successfully", 
+            "ticket": ticket,
             "tx_hash": res["tx_hash"],
-            "block_number": res["block_number"]
+            "block_number": res["block_number"],
+            "vote_status": vote_status
         }), 201
+    except DuplicateKeyError:
+        # Another request (or worker) recorded this voter's ballot first
+        voted_voters.add(election_id, voter_id)
+        return jsonify({"success": False, "message": "You have already cast your vote"}), 400
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
 
 @app.route("/api/blockchain/results", methods=["GET"])
-def get_blockchain_results():
-    config = blockchain_config.find_one({"key": "active_contract"})
+@app.route("/api/blockchain/<election_id>/results", methods=["GET"])
+def get_blockchain_results(election_id=DEFAULT_ELECTION_ID):
+    config = _get_election(election_id)
     if not config:
         return jsonify({"success": False, "message": "No results yet"}), 404
         
     try:
-        results = blockchain.get_results(config["address"])
+        if VOTE_SUBMISSION_MODE == "ledger":
+            results = ledger.get_ledger_results(votes, config["address"])
+        else:
+            results = indexer.get_indexed_results(db, config["address"]) if RESULTS_SOURCE == "index" else None
+        if results is None:
+            results = blockchain.get_results(config["address"])
         
         # Redact live results if voting is still open
         if results.get("voting_open"):
@@ -2053,18 +2479,48 @@ def get_blockchain_results():
                         c["percentage"] = 0
 
         # Augment with photos (even if redacted, we want full names and metadata)
-        for pos_res in results["results_by_position"]:
-            for c in pos_res["candidates"]:
-                app = candidate_applications.find_one({"full_name": c["name"], "status": "Approved"})
-                if app:
-                    c["candidate_photo_url"] = app.get("candidate_photo_url")
-                    c["branch_name"] = app.get("branch_name")
+        candidate_details.decorate(
+            config["address"],
+            [c for pos_res in results["results_by_position"] for c in pos_res["candidates"]],
+            fields=("candidate_photo_url", "branch_name"),
+        )
 
         return jsonify({"success": True, **results}), 200
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
 
+@app.route("/api/blockchain/results/breakdown", methods=["GET"])
+@app.route("/api/blockchain/<election_id>/results/breakdown", methods=["GET"])
+def get_results_breakdown(election_id=DEFAULT_ELECTION_ID):
+    """Recount from ballot logs with ties, per-position and per-voter-group tallies (?by=branch_name&hourly=1). Admin only."""
+    user, error_response, status_code = verify_token_and_get_user(claims_ok=True)
+    if error_response:
+        return error_response, status_code
+    if not user:
+        return jsonify({"success": False, "message": "User not found"}), 404
+    if user.get("user_type") != "admin":
+        return jsonify({"success": False, "message": "Only admins can view result breakdowns"}), 403
+
+    config = _get_election(election_id)
+    if not config:
+        return jsonify({"success": False, "message": "No results yet"}), 404
+    if VOTE_SUBMISSION_MODE == "ledger":
+        return jsonify({"success": False, "message": "Ledger ballots are not individually on-chain"}), 400
+
+    by = request.args.get("by")
+    if by and by not in tally.CROSSTAB_FIELDS:
+        return jsonify({"success": False, "message": f"by must be one of {tally.CROSSTAB_FIELDS}"}), 400
+
+    try:
+        if blockchain.get_status(config["address"])["voting_open"]:
+            return jsonify({"success": False, "message": "Breakdowns are available once voting has ended"}), 403
+        report = tally.recount(db, config["address"], by=by, hourly=request.args.get("hourly") == "1")
+        return jsonify({"success": True, **report}), 200
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
 # Run App
 if __name__ == "__main__":
     PORT = int(os.getenv("PORT", 5000))
@@ -0,0 +1,87 @@
+"""
+Benchmark: per-id getCandidate(i) loop vs. paged getCandidates() snapshot.
+
+Deploys a fresh Election contract per slate size, loads N candidates and
+reports the eth_call count and latency of reading the full results.
+
+Usage:
+    python bench_candidate_snapshot.py [10 100 1000]
+"""
+
+import sys
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import blockchain
+
+ROUNDS = 5
+
+
+class RpcCounter:
+    """Wrap the provider so every JSON-RPC request is counted by method."""
+
+    def __init__(self, w3):
+        self.provider = w3.provider
+        self.inner = self.provider.make_request
+        self.calls = 0
+        self.provider.make_request = self._make_request
+
+    def _make_request(self, method, params):
+        self.calls += 1
+        return self.inner(method, params)
+
+    def reset(self):
+        self.calls = 0
+
+
+def _time_reads(counter, read):
+    counter.reset()
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        read()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / ROUNDS
+    return counter.calls // ROUNDS, elapsed_ms
+
+
+def run(sizes):
+    # Measure raw RPC cost, not the block-keyed read cache
+    blockchain._view_cache.enabled = False
+
+    w3 = blockchain.get_web3()
+    if not w3.is_connected():
+        print(f"❌ Cannot connect to Ganache at {w3.provider.endpoint_uri}")
+        return
+
+    print(f"{'candidates':>10} | {'per-id RPCs':>11} | {'per-id ms':>9} | {'paged RPCs':>10} | {'paged ms':>8}")
+    print("-" * 62)
+
+    for n in sizes:
+        address = blockchain.deploy_contract()["contract_address"]
+        for i in range(n):
+            blockchain.add_candidate(address, f"Candidate {i + 1}", f"Position {i % 5}", f"S{i}")
+
+        contract = blockchain._get_contract(address)
+        counter = RpcCounter(w3)
+
+        def legacy():
+            _, count, _ = contract.functions.getStatus().call()
+            return blockchain._fetch_candidates_per_id(contract, count)
+
+        def paged():
+            _, count, _ = contract.functions.getStatus().call()
+            return blockchain._fetch_candidates(contract, count)
+
+        assert legacy() == paged(), "snapshot mismatch between read paths"
+
+        old_rpcs, old_ms = _time_reads(counter, legacy)
+        new_rpcs, new_ms = _time_reads(counter, paged)
+        counter.provider.make_request = counter.inner
+
+        print(f"{n:>10} | {old_rpcs:>11} | {old_ms:>9.1f} | {new_rpcs:>10} | {new_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10, 100, 1000]
+    run(sizes)
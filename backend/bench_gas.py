@@ -0,0 +1,79 @@
+"""
+Benchmark: gas per ballot for Election.sol vs. ElectionOptimized.sol.
+
+Deploys both variants on the local chain at GANACHE_URL, loads the same
+20-candidate slate, then casts one ballot of every size 1..20 from a fresh
+locally-signed account and reports gasUsed per ballot.
+
+Usage:
+    python bench_gas.py [max_ballot_size]
+"""
+
+import sys
+from dotenv import load_dotenv
+from eth_account import Account
+
+load_dotenv()
+
+import blockchain
+
+POSITIONS = ["Chairman", "Vice Chairman", "Secretary", "Treasurer"]
+
+
+def _raw(signed):
+    # eth-account renamed rawTransaction -> raw_transaction
+    return getattr(signed, "raw_transaction", None) or signed.rawTransaction
+
+
+def _fund(w3, address):
+    # Same admin send path as the app: node account or locally signed (ADMIN_PRIVATE_KEY / WALLET_MNEMONIC)
+    if blockchain.fund_accounts([address], w3.to_wei(0.1, "ether"))["funded"] != 1:
+        raise RuntimeError(f"Funding {address} failed")
+
+
+def _ballot_gas(w3, contract, candidate_ids) -> int:
+    voter = Account.create()
+    _fund(w3, voter.address)
+    tx = contract.functions.castBallot(candidate_ids).build_transaction({
+        "from": voter.address,
+        "nonce": 0,
+        "gas": 1_000_000,
+        "gasPrice": w3.eth.gas_price,
+        "chainId": w3.eth.chain_id,
+    })
+    tx_hash = w3.eth.send_raw_transaction(_raw(voter.sign_transaction(tx)))
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    if receipt.status != 1:
+        raise RuntimeError(f"Ballot of size {len(candidate_ids)} reverted")
+    return receipt.gasUsed
+
+
+def _prepare(variant, slate_size):
+    address = blockchain.deploy_contract(variant)["contract_address"]
+    blockchain.add_candidates_batch(address, [
+        {"name": f"Candidate {i + 1}", "position": POSITIONS[i % len(POSITIONS)], "symbol": f"S{i + 1}"}
+        for i in range(slate_size)
+    ])
+    blockchain.start_voting(address)
+    return blockchain._get_contract(address)
+
+
+def run(max_size):
+    w3 = blockchain.get_web3()
+    if not blockchain.is_connected():
+        print(f"❌ Cannot connect to Ganache at {w3.provider.endpoint_uri}")
+        return
+
+    contracts = {variant: _prepare(variant, max_size) for variant in blockchain.CONTRACT_SOURCES}
+
+    print(f"{'ballot size':>11} | {'Election gas':>12} | {'Optimized gas':>13} | {'saving':>6}")
+    print("-" * 52)
+    for size in range(1, max_size + 1):
+        ids = list(range(1, size + 1))
+        base = _ballot_gas(w3, contracts["Election"], ids)
+        opt = _ballot_gas(w3, contracts["ElectionOptimized"], ids)
+        print(f"{size:>11} | {base:>12,} | {opt:>13,} | {(1 - opt / base) * 100:>5.1f}%")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
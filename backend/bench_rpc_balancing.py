@@ -0,0 +1,102 @@
+"""
+Benchmark: read throughput through the multi-endpoint RPC balancer.
+
+Stands up N stand-in nodes over one in-process eth-tester chain. Each node
+serves one request at a time with a fixed simulated latency, like a
+single-threaded Ganache; one node can be made an outlier. Concurrent
+get_results() calls then run through blockchain._BalancedProvider with 1..N
+nodes, reporting reads/s and the balancer's per-endpoint view.
+
+Usage:
+    python bench_rpc_balancing.py [nodes] [--latency-ms 5] [--slow-node]
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["GANACHE_URL"] = "tester://"
+
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+import blockchain
+
+READS = 400
+CLIENTS = 16
+
+
+def _arg(name, default):
+    return float(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+class StandInNode(BaseProvider):
+    """One "node": the shared chain behind a per-node lock and a fixed latency."""
+
+    def __init__(self, chain, latency: float):
+        super().__init__()
+        self.chain = chain
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    def make_request(self, method, params):
+        with self._lock:
+            time.sleep(self.latency)
+            return self.chain.make_request(method, params)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+def _setup():
+    address = blockchain.deploy_contract()["contract_address"]
+    blockchain.add_candidates_batch(address, [
+        {"name": f"Candidate {i + 1}", "position": "Chairman", "symbol": f"S{i + 1}"} for i in range(8)
+    ])
+    blockchain.start_voting(address)
+    return address
+
+
+def _run(address, chain, nodes, latency, slow_node):
+    urls = tuple(f"standin://node-{i}" for i in range(nodes))
+
+    def build(url):
+        slow = slow_node and nodes > 1 and url == urls[-1]
+        return StandInNode(chain, latency * 20 if slow else latency)
+
+    provider = blockchain._BalancedProvider(urls, urls, build=build)
+    contract = Web3(provider).eth.contract(address=address, abi=blockchain._get_contract(address).abi)
+
+    def read(_):
+        return contract.functions.getStatus().call()
+
+    with ThreadPoolExecutor(max_workers=CLIENTS) as pool:
+        start = time.perf_counter()
+        list(pool.map(read, range(READS)))
+        elapsed = time.perf_counter() - start
+    return READS / elapsed, provider.stats()
+
+
+def run(max_nodes, latency, slow_node):
+    address = _setup()
+    chain = blockchain.get_web3().provider
+
+    print(f"{READS} reads, {CLIENTS} clients, {latency * 1000:.0f} ms per request per node"
+          + (", last node 20x slower" if slow_node else ""))
+    print(f"{'nodes':>5} | {'reads/s':>8} | speed-up")
+    print("-" * 28)
+    baseline = None
+    for nodes in range(1, max_nodes + 1):
+        rate, stats = _run(address, chain, nodes, latency, slow_node)
+        baseline = baseline or rate
+        print(f"{nodes:>5} | {rate:>8,.0f} | {rate / baseline:.2f}x")
+    print("\nEndpoints after the last run:")
+    for s in stats:
+        print(f"  {s['url']:<20} latency {s['latency_ms']} ms, ejected for {s['ejected_for_s']}s")
+
+
+if __name__ == "__main__":
+    count = next((int(a) for a in sys.argv[1:] if a.isdigit()), 4)
+    run(count, _arg("--latency-ms", 5) / 1000, "--slow-node" in sys.argv)
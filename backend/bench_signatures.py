@@ -0,0 +1,63 @@
+"""
+Benchmark: personal_sign recoveries per second, inline vs. the worker pool.
+
+Signs N ballot messages with fresh local accounts, then recovers them all
+inline in one thread and through signatures.recover_signers() with 1..cores
+worker processes, reporting verifications/s and verifications/s per core.
+
+Usage:
+    python bench_signatures.py [signatures]
+"""
+
+import os
+import sys
+import time
+
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+import signatures
+
+
+def _signed_ballots(n):
+    pairs, signers = [], []
+    for i in range(n):
+        account = Account.create()
+        message = f"Casting my vote for Ballot: [{i % 7 + 1},{i % 5 + 8}]"
+        signed = account.sign_message(encode_defunct(text=message))
+        pairs.append((message, "0x" + signed.signature.hex().replace("0x", "")))
+        signers.append(account.address)
+    return pairs, signers
+
+
+def _rate(recover, pairs, signers):
+    start = time.perf_counter()
+    recovered = recover(pairs)
+    elapsed = time.perf_counter() - start
+    assert recovered == signers, "recovered signer mismatch"
+    return len(pairs) / elapsed
+
+
+def run(n):
+    cores = os.cpu_count() or 1
+    print(f"Signing {n} ballots...")
+    pairs, signers = _signed_ballots(n)
+
+    inline = _rate(signatures._recover_chunk, pairs, signers)
+    print(f"{'workers':>7} | {'verifications/s':>15} | {'per core':>8}")
+    print("-" * 37)
+    print(f"{'inline':>7} | {inline:>15,.0f} | {inline:>8,.0f}")
+
+    counts = sorted({1, 2, cores // 2, cores} - {0})
+    for workers in counts:
+        signatures.shutdown()
+        signatures.SIGNATURE_WORKERS = workers
+        # Warm the pool so process start-up is not measured
+        signatures.recover_signers(pairs[:workers * signatures.SIGNATURE_CHUNK_SIZE])
+        rate = _rate(signatures.recover_signers, pairs, signers)
+        print(f"{workers:>7} | {rate:>15,.0f} | {rate / workers:>8,.0f}")
+    signatures.shutdown()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
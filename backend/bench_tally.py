@@ -0,0 +1,122 @@
+"""
+Benchmark: tally decode and recount time on synthetic ballots (no chain needed).
+
+Generates a slate across four positions and N ballots choosing one candidate
+per position (N x 4 selections, one branch per voter) and encodes them as the
+raw logs get_logs returns: one BallotCast per ballot, and a sample of
+single-selection VoteCast logs. Times decode_selections() on both, then the
+recount, tie detection and the by-branch cross-tab, and checks the decoded
+arrays against the generated ones and the cross-tab sums back to the
+per-candidate tallies.
+
+Usage:
+    python bench_tally.py [selections]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from tally import TallyEngine, decode_selections
+
+POSITIONS = ["Chairman", "Vice Chairman", "Secretary", "Treasurer"]
+PER_POSITION = 5
+BRANCHES = 40
+VOTECAST_SAMPLE = 200_000
+
+# Stand-in topic0 values; decode_selections only compares them
+VOTE_TOPIC = bytes([0x11]) * 32
+BALLOT_TOPIC = bytes([0x22]) * 32
+TOPICS = {"0x" + VOTE_TOPIC.hex(): "VoteCast", "0x" + BALLOT_TOPIC.hex(): "BallotCast"}
+
+
+def _timed(label, fn):
+    start = time.perf_counter()
+    out = fn()
+    print(f"{label:<22} {(time.perf_counter() - start) * 1000:>8.1f} ms")
+    return out
+
+
+def _words(values) -> np.ndarray:
+    """uint256 ABI words (n, 32) for non-negative int64 values."""
+    out = np.zeros((len(values), 32), dtype=np.uint8)
+    out[:, 24:] = np.asarray(values, dtype=">u8").view(np.uint8).reshape(-1, 8)
+    return out
+
+
+def _voter_topics(voters) -> np.ndarray:
+    """Indexed address topics (n, 32) for integer voter numbers."""
+    return _words(np.asarray(voters) + 0x1000)
+
+
+def ballot_logs(voters, candidate_ids, per_ballot) -> list:
+    """BallotCast(voter, uint[] candidateIds, timestamp) logs, ABI-encoded as on chain."""
+    n = len(voters)
+    head = np.concatenate([_words(np.full(n, 64)), _words(np.full(n, 1_700_000_000)), _words(np.full(n, per_ballot))], axis=1)
+    data = np.concatenate([head.reshape(n, 3, 32), _words(candidate_ids).reshape(n, per_ballot, 32)], axis=1)
+    topics = _voter_topics(voters)
+    return [
+        {"topics": [BALLOT_TOPIC, topics[i].tobytes()], "data": data[i].tobytes(), "blockNumber": 1 + i // 100}
+        for i in range(n)
+    ]
+
+
+def vote_logs(voters, candidate_ids) -> list:
+    """VoteCast(voter, candidateId, timestamp) logs, ABI-encoded as on chain."""
+    topics = _voter_topics(voters)
+    ids = _words(candidate_ids)
+    stamp = _words([1_700_000_000])[0].tobytes()
+    return [
+        {"topics": [VOTE_TOPIC, topics[i].tobytes(), ids[i].tobytes()], "data": stamp, "blockNumber": 1 + i // 100}
+        for i in range(len(voters))
+    ]
+
+
+def _check_decoded(decoded, voters, candidate_ids):
+    addresses = np.array([int(v, 16) - 0x1000 for v in decoded["voters"]])
+    assert (addresses[decoded["voter"]] == voters).all(), "decoded voters differ"
+    assert (decoded["candidate_id"] == candidate_ids).all(), "decoded candidate ids differ"
+
+
+def run(selections):
+    rng = np.random.default_rng(7)
+    candidates = [
+        {"id": i + 1, "name": f"Candidate {i + 1}", "position": POSITIONS[i % len(POSITIONS)], "vote_count": 0}
+        for i in range(len(POSITIONS) * PER_POSITION)
+    ]
+    ballots = selections // len(POSITIONS)
+    # Candidate ids are position + k * len(POSITIONS)
+    picks = rng.integers(0, PER_POSITION, size=(ballots, len(POSITIONS)))
+    candidate_ids = (np.arange(len(POSITIONS)) + 1 + picks * len(POSITIONS)).ravel()
+    voters = np.repeat(np.arange(ballots, dtype=np.int32), len(POSITIONS))
+    branches = [f"Branch {b + 1}" for b in range(BRANCHES)]
+    voter_branch = rng.integers(0, BRANCHES, size=ballots).astype(np.int32)
+
+    print(f"{len(candidate_ids):,} selections, {ballots:,} ballots, {len(candidates)} candidates")
+    logs = ballot_logs(np.arange(ballots), candidate_ids, len(POSITIONS))
+    decoded = _timed("decode BallotCast", lambda: decode_selections(logs, TOPICS))
+    _check_decoded(decoded, voters, candidate_ids)
+    del logs
+    sample = min(len(candidate_ids), VOTECAST_SAMPLE)
+    logs = vote_logs(voters[:sample], candidate_ids[:sample])
+    decoded = _timed(f"decode VoteCast ({sample:,})", lambda: decode_selections(logs, TOPICS))
+    _check_decoded(decoded, voters[:sample], candidate_ids[:sample])
+    del logs
+
+    engine = _timed("build", lambda: TallyEngine(candidates, voters, candidate_ids))
+    tallies = _timed("candidate tallies", engine.candidate_tallies)
+    _timed("position tallies", engine.position_tallies)
+    _timed("ties", lambda: engine.ties(tallies))
+    groups, counts = _timed("cross-tab by branch", lambda: engine.crosstab(branches, voter_branch))
+
+    for j, c in enumerate(candidates):
+        c["vote_count"] = int(tallies[j])
+    check = engine.verify(ballots)
+    assert check["matches"], check
+    assert (counts.sum(axis=0) == tallies).all(), "cross-tab does not sum to the tallies"
+    print(f"verified: {len(groups)} branches, tallies consistent")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,110 @@
+"""
+Benchmark: per-request user lookup latency with inline blobs vs. blob refs.
+
+Fills two scratch collections with N synthetic voters: one in the old shape
+(base64 photo_data + fingerprint_template inside the users document) and one
+in the blob-store shape (photo_ref / fingerprint_ref only). It then times the
+find_one by _id that verify_token_and_get_user() runs on every request, plus
+the same lookup with the USER_LEAN projection against the old shape
+(records not migrated yet). Scratch collections are dropped afterwards.
+
+Usage:
+    python bench_user_lookup.py [voters] [--photo-kb 150]
+"""
+
+import base64
+import hashlib
+import os
+import random
+import statistics
+import sys
+import time
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+LOOKUPS = 2000
+USER_LEAN = {"photo_data": 0, "fingerprint_template": 0}
+
+
+def _voter(i):
+    return {
+        "_id": ObjectId(),
+        "full_name": f"Voter {i}",
+        "voter_id": f"{i:04d}",
+        "email": f"voter{i}@gmail.com",
+        "phone_no": "9876543210",
+        "branch_name": f"Branch {i % 20}",
+        "photo_url": f"uploads/photos/{i:04d}_photo.jpg",
+        "user_type": "voter",
+        "has_account": True,
+        "password": "pbkdf2:sha256:" + "x" * 80,
+    }
+
+
+def _fill(coll, n, photo_kb, inline):
+    docs = []
+    for i in range(n):
+        doc = _voter(i)
+        photo = os.urandom(photo_kb * 1024)
+        template = {"format": "ISO", "quality": 80, "data": base64.b64encode(os.urandom(1024)).decode()}
+        if inline:
+            doc["photo_data"] = base64.b64encode(photo).decode()
+            doc["fingerprint_template"] = template
+        else:
+            doc["photo_ref"] = hashlib.sha256(photo).hexdigest()
+            doc["fingerprint_ref"] = hashlib.sha256(template["data"].encode()).hexdigest()
+        docs.append(doc)
+        if len(docs) == 100:
+            coll.insert_many(docs)
+            docs = []
+    if docs:
+        coll.insert_many(docs)
+    return [d["_id"] for d in coll.find({}, {"_id": 1})]
+
+
+def _time(coll, ids, projection=None):
+    samples = []
+    for _id in random.choices(ids, k=LOOKUPS):
+        start = time.perf_counter()
+        coll.find_one({"_id": _id}, projection)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95)]
+
+
+def run(n, photo_kb):
+    db = MongoClient(os.getenv("MONGO_URI"))[os.getenv("DB_NAME")]
+    inline, lean = db["bench_users_inline"], db["bench_users_refs"]
+    try:
+        print(f"Filling {n} voters ({photo_kb} KB photos)...")
+        inline_ids = _fill(inline, n, photo_kb, inline=True)
+        ref_ids = _fill(lean, n, photo_kb, inline=False)
+        inline_size = db.command("collstats", inline.name)["avgObjSize"]
+        ref_size = db.command("collstats", lean.name)["avgObjSize"]
+
+        print(f"{'shape':<28} | {'avg doc':>9} | {'p50 ms':>7} | {'p95 ms':>7}")
+        print("-" * 62)
+        for label, coll, ids, projection, size in [
+            ("inline blobs (before)", inline, inline_ids, None, inline_size),
+            ("inline blobs + USER_LEAN", inline, inline_ids, USER_LEAN, inline_size),
+            ("blob refs (after)", lean, ref_ids, USER_LEAN, ref_size),
+        ]:
+            p50, p95 = _time(coll, ids, projection)
+            print(f"{label:<28} | {size / 1024:>7.1f}KB | {p50:>7.3f} | {p95:>7.3f}")
+    finally:
+        inline.drop()
+        lean.drop()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    kb = 150
+    if "--photo-kb" in args:
+        i = args.index("--photo-kb")
+        kb = int(args[i + 1])
+        del args[i:i + 2]
+    run(int(args[0]) if args else 2000, kb)
@@ -0,0 +1,79 @@
+"""
+Load test: ballot throughput of blockchain.py on the in-process EVM.
+
+Runs against GANACHE_URL=tester:// (eth-tester, no Ganache needed) unless
+--ganache is given. Deploys a fresh contract, loads a slate, casts one ballot
+from each of N pre-funded accounts with submit_vote(), waits for all receipts
+together, then reads get_results() and checks the tally.
+
+Usage:
+    python bench_vote_throughput.py [ballots] [--ganache]
+"""
+
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BALLOTS = int(next((a for a in sys.argv[1:] if a.isdigit()), 1000))
+if "--ganache" not in sys.argv[1:]:
+    os.environ["GANACHE_URL"] = "tester://"
+    # accounts[0] is the admin
+    os.environ["TESTER_ACCOUNTS"] = str(BALLOTS + 1)
+
+import blockchain
+
+POSITIONS = ["Chairman", "Vice Chairman", "Secretary", "Treasurer"]
+SLATE_SIZE = 12
+
+
+def run(n):
+    if not blockchain.is_connected():
+        print(f"❌ Cannot connect to {os.getenv('GANACHE_URL')}")
+        return
+
+    voters = blockchain._manager.accounts()[1:n + 1]
+    if len(voters) < n:
+        print(f"⚠️  Only {len(voters)} voter accounts available; casting {len(voters)} ballots")
+
+    address = blockchain.deploy_contract()["contract_address"]
+    blockchain.add_candidates_batch(address, [
+        {"name": f"Candidate {i + 1}", "position": POSITIONS[i % len(POSITIONS)], "symbol": f"S{i + 1}"}
+        for i in range(SLATE_SIZE)
+    ])
+    blockchain.start_voting(address)
+
+    # One candidate per position, rotating so every candidate receives votes
+    per_position = SLATE_SIZE // len(POSITIONS)
+    ballots = [
+        [p + 1 + (i % per_position) * len(POSITIONS) for p in range(len(POSITIONS))]
+        for i in range(len(voters))
+    ]
+
+    start = time.perf_counter()
+    tx_hashes = [
+        blockchain.submit_vote(address, ids, voter)["tx_hash"]
+        for voter, ids in zip(voters, ballots)
+    ]
+    receipts = blockchain.wait_for_receipts(tx_hashes)
+    cast_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = blockchain.get_results(address)
+    results_ms = (time.perf_counter() - start) * 1000
+
+    mined = sum(1 for r in receipts.values() if r["status"] == 1)
+    counted = sum(c["vote_count"] for c in results["all_candidates"])
+    assert results["total_votes"] == mined, "totalVotes does not match mined ballots"
+    assert counted == mined * len(POSITIONS), "candidate tallies do not match mined ballots"
+
+    print(f"endpoint      : {os.getenv('GANACHE_URL')}")
+    print(f"ballots       : {mined}/{len(voters)} mined")
+    print(f"cast + confirm: {cast_s:.2f}s ({mined / cast_s:,.0f} ballots/s)")
+    print(f"get_results   : {results_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    run(BALLOTS)
@@ -0,0 +1,87 @@
+"""
+blobstore.py – Content-addressed binary store for voter photos and fingerprints.
+
+Blobs live in the GridFS bucket `voter_blobs`, stored as raw bytes (not
+base64) under their SHA-256 hex digest, so identical uploads are stored
+once. A users document keeps only the 64-character reference:
+
+    photo_ref        voter photo (content type kept in the file metadata)
+    fingerprint_ref  fingerprint template (JSON-encoded when not a string)
+
+That keeps users records small and fixed-size, so the per-request user
+lookups no longer carry the blobs. Existing records are moved over with
+`python migrate_voter_blobs.py`. Deleting a voter releases its blobs: a blob
+is removed once no users document references it.
+"""
+
+import hashlib
+import json
+
+import gridfs
+from gridfs.errors import NoFile
+
+BUCKET = "voter_blobs"
+# users fields holding blob references
+REF_FIELDS = ("photo_ref", "fingerprint_ref")
+
+
+class BlobStore:
+    """GridFS bucket addressed by SHA-256 of the content."""
+
+    def __init__(self, db, bucket: str = BUCKET):
+        self.fs = gridfs.GridFSBucket(db, bucket_name=bucket)
+        self.files = db[f"{bucket}.files"]
+        try:
+            self.files.create_index([("filename", 1)], unique=True)
+        except Exception:
+            pass
+
+    def put(self, data: bytes, content_type: str = "application/octet-stream") -> str:
+        """Store data (once per distinct content) and return its reference."""
+        ref = hashlib.sha256(data).hexdigest()
+        if self.files.find_one({"filename": ref}, {"_id": 1}) is None:
+            try:
+                self.fs.upload_from_stream(ref, data, metadata={"content_type": content_type, "size": len(data)})
+            except Exception:
+                # Lost a race with an identical upload
+                if self.files.find_one({"filename": ref}, {"_id": 1}) is None:
+                    raise
+        return ref
+
+    def get(self, ref: str):
+        """(bytes, content_type) for a reference, or None if it is unknown."""
+        try:
+            stream = self.fs.open_download_stream_by_name(ref)
+        except NoFile:
+            return None
+        metadata = stream.metadata or {}
+        return stream.read(), metadata.get("content_type", "application/octet-stream")
+
+    def release(self, refs, users) -> int:
+        """Delete the blobs of refs that no users document references any more. Returns how many were deleted."""
+        deleted = 0
+        for ref in {r for r in refs if r}:
+            # Content-addressed: another voter may have uploaded the same bytes
+            if users.find_one({"$or": [{field: ref} for field in REF_FIELDS]}, {"_id": 1}):
+                continue
+            for f in self.files.find({"filename": ref}, {"_id": 1}):
+                try:
+                    self.fs.delete(f["_id"])
+                    deleted += 1
+                except NoFile:
+                    pass
+        return deleted
+
+    # ─── Fingerprint templates ────────────────────────────────────────────────
+    def put_fingerprint(self, template) -> str:
+        if isinstance(template, str):
+            return self.put(template.encode(), "text/plain")
+        return self.put(json.dumps(template, sort_keys=True).encode(), "application/json")
+
+    def get_fingerprint(self, ref: str):
+        """The template as it was given to put_fingerprint(), or None."""
+        blob = self.get(ref)
+        if blob is None:
+            return None
+        data, content_type = blob
+        return json.loads(data) if content_type == "application/json" else data.decode()
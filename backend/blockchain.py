@@ -4,9 +4,26 @@ Handles contract compilation, deployment, and all chain interactions.
 """
 
 import os
+import asyncio
+import random
+import itertools
 import json
+import hashlib
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from hexbytes import HexBytes
 from web3 import Web3
+from web3.providers.base import BaseProvider
+from web3.logs import DISCARD
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError, TransactionNotFound
+import wallets
 try:
     # web3 v6+ 
     from web3.middleware import ExtraDataToPOAMiddleware as geth_poa_middleware
@@ -21,72 +38,843 @@ except ImportError:
 # ─── Configuration ───────────────────────────────────────────────────────────
 # GANACHE_URL is read dynamically in get_web3()
 CONTRACT_SOL = Path(__file__).parent / "Election.sol"
+# Contract variants that can be deployed; all expose the same Python API
+CONTRACT_SOURCES = {
+    "Election": CONTRACT_SOL,
+    "ElectionOptimized": Path(__file__).parent / "ElectionOptimized.sol",
+}
+# Variant used by deploy_contract()
+ELECTION_CONTRACT = os.getenv("ELECTION_CONTRACT", "Election")
+SOLC_VERSION = "0.8.0"
+# Compiled ABI + bytecode, shared by every worker process; rebuilt when the source hash changes.
+# Other variants are written next to it as build/<Variant>.json
+CONTRACT_ARTIFACT = Path(os.getenv(
+    "CONTRACT_ARTIFACT", Path(__file__).parent / "build" / "Election.json"
+))
+ARTIFACT_VERSION = 1
+# Candidates returned per getCandidates(offset, limit) eth_call
+CANDIDATE_PAGE_SIZE = int(os.getenv("CANDIDATE_PAGE_SIZE", 100))
+
+# GANACHE_URL may be http(s)://, ws(s):// or an IPC socket path (ipc:///path or /path/geth.ipc).
+# ws and IPC endpoints also get an eth_subscribe stream for new heads and contract logs.
+SUBSCRIPTION_RECONNECT_DELAY = float(os.getenv("SUBSCRIPTION_RECONNECT_DELAY", 2.0))
+# GANACHE_URL=tester:// runs the contracts on an in-process py-evm chain (eth-tester)
+# with TESTER_ACCOUNTS pre-funded, unlocked accounts and automining; no node is needed.
+TESTER_ACCOUNTS = int(os.getenv("TESTER_ACCOUNTS", 100))
+
+# Several nodes of the same chain: GANACHE_URL may list comma-separated endpoints
+# that serve both roles, or RPC_WRITE_URLS / RPC_READ_URLS split them. Transactions,
+# nonces and node accounts go to the first healthy writer; reads are spread over
+# readers by observed latency. Endpoints that fail RPC_EJECT_FAILURES times in a
+# row, or whose latency exceeds RPC_OUTLIER_FACTOR x the median, are ejected for
+# RPC_EJECT_SECONDS.
+RPC_WRITE_URLS = os.getenv("RPC_WRITE_URLS", "")
+RPC_READ_URLS = os.getenv("RPC_READ_URLS", "")
+RPC_EJECT_FAILURES = int(os.getenv("RPC_EJECT_FAILURES", 3))
+RPC_EJECT_SECONDS = float(os.getenv("RPC_EJECT_SECONDS", 30))
+RPC_OUTLIER_FACTOR = float(os.getenv("RPC_OUTLIER_FACTOR", 5))
+RPC_LATENCY_ALPHA = float(os.getenv("RPC_LATENCY_ALPHA", 0.3))
+
+# Connection pool / health settings for _Web3Manager. Without RPC_POOL_SIZE the
+# pool holds one connection per SERVER_THREADS request thread plus the
+# background loops (receipt poller, relayer, indexer, anchorer, subscriptions).
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", 16))
+RPC_POOL_SIZE = os.getenv("RPC_POOL_SIZE", "")
+BACKGROUND_RPC_THREADS = 5
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", 30))
+RPC_RETRIES = int(os.getenv("RPC_RETRIES", 3))
+RPC_RETRY_BACKOFF = float(os.getenv("RPC_RETRY_BACKOFF", 0.2))
+HEALTH_CHECK_TTL = float(os.getenv("HEALTH_CHECK_TTL", 5))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 3))
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN", 15))
+# View-call cache: results are keyed by block number, which is itself re-read at most every TTL seconds
+VIEW_CACHE_BLOCK_TTL = float(os.getenv("VIEW_CACHE_BLOCK_TTL", 1.0))
+VIEW_CACHE_SIZE = int(os.getenv("VIEW_CACHE_SIZE", 1024))
+# Seconds to wait for a batch of admin transaction receipts
+RECEIPT_TIMEOUT = float(os.getenv("RECEIPT_TIMEOUT", 120))
+# Local admin / voter nonce counters are checked against the node at least this often
+NONCE_RESYNC_INTERVAL = float(os.getenv("NONCE_RESYNC_INTERVAL", 30))
+# Share of the block gas limit one addCandidates batch transaction may use
+CANDIDATE_BATCH_GAS_FRACTION = float(os.getenv("CANDIDATE_BATCH_GAS_FRACTION", 0.8))
+# Constructed contract objects kept by _get_contract(), least recently used evicted first
+CONTRACT_CACHE_SIZE = int(os.getenv("CONTRACT_CACHE_SIZE", 64))
+# Gas limit of one castBallot transaction
+BALLOT_GAS = 500_000
+# Ether topped up into a custodial voter account; 0 = enough for two ballots at the current gas price
+VOTER_FUNDING_WEI = int(os.getenv("VOTER_FUNDING_WEI", 0))
 
 # ─── Singleton web3 connection ────────────────────────────────────────────────
-_w3 = None
-_compiled_abi = None
-_compiled_bytecode = None
+# Variant name -> (abi, bytecode)
+_compiled = {}
+# Contract address -> variant name
+_contract_variants = {}
+# Contract address -> {"next_block", "candidates"} metadata read from CandidateAdded logs
+_candidate_meta = {}
+_candidate_meta_lock = threading.Lock()
+# Contract address -> whether castBallots (relayed batches) is available
+_relay_support = {}
+# Contract addresses deployed before getCandidates() existed
+_legacy_contracts = set()
 
 
-def get_web3() -> Web3:
-    """Return a cached Web3 instance connected to Ganache, re-initializing if URL changes."""
-    global _w3
-    # Refresh GANACHE_URL from env in case it changed
-    url = os.getenv("GANACHE_URL", "http://localhost:7545")
-    
-    if _w3 is None or not _w3.is_connected() or _w3.provider.endpoint_uri != url:
-        print(f"[blockchain] Initializing Web3 with URL: {url}")
-        _w3 = Web3(Web3.HTTPProvider(url))
+def _endpoint_kind(url: str) -> str:
+    """"http", "ws", "ipc" or "tester" for a GANACHE_URL value."""
+    if url.startswith("tester://"):
+        return "tester"
+    if url.startswith(("ws://", "wss://")):
+        return "ws"
+    if url.startswith("ipc://") or url.endswith(".ipc") or url.startswith("/"):
+        return "ipc"
+    return "http"
+
+
+def _ipc_path(url: str) -> str:
+    return url[len("ipc://"):] if url.startswith("ipc://") else url
+
+
+def _serialize_requests(provider):
+    """
+    Send requests one at a time for providers that are not thread-safe: the
+    synchronous websocket provider multiplexes every thread over one socket
+    without matching response ids, and eth-tester mutates one in-process chain.
+    """
+    lock = threading.Lock()
+    make_request = provider.make_request
+
+    def locked(method, params):
+        with lock:
+            return make_request(method, params)
+
+    provider.make_request = locked
+
+
+def _tester_provider():
+    """In-process EVM with TESTER_ACCOUNTS funded accounts; every transaction is mined on arrival."""
+    try:
+        from eth_tester import EthereumTester, PyEVMBackend
+    except ImportError as e:
+        raise RuntimeError("GANACHE_URL=tester:// needs eth-tester: pip install 'eth-tester[py-evm]'") from e
+    backend = PyEVMBackend(genesis_state=PyEVMBackend.generate_genesis_state(num_accounts=TESTER_ACCOUNTS))
+    return Web3.EthereumTesterProvider(EthereumTester(backend=backend, auto_mine_transactions=True))
+
+
+def rpc_pool_size() -> int:
+    """Connections per HTTP endpoint: RPC_POOL_SIZE, or SERVER_THREADS plus the background loops."""
+    size = os.getenv("RPC_POOL_SIZE", RPC_POOL_SIZE)
+    if size:
+        return int(size)
+    return int(os.getenv("SERVER_THREADS", SERVER_THREADS)) + BACKGROUND_RPC_THREADS
+
+
+def _http_provider(url: str):
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=rpc_pool_size(),
+        # Only connection failures are retried: the request never reached
+        # the node, so resending a transaction cannot duplicate it.
+        max_retries=Retry(
+            total=RPC_RETRIES, connect=RPC_RETRIES, read=0, status=0,
+            backoff_factor=RPC_RETRY_BACKOFF,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return Web3.HTTPProvider(url, session=session, request_kwargs={"timeout": RPC_TIMEOUT})
+
+
+def _build_provider(url: str):
+    """Provider for one endpoint of any supported kind."""
+    kind = _endpoint_kind(url)
+    if kind == "ws":
+        # web3 v7 renamed the synchronous provider to LegacyWebSocketProvider
+        provider_cls = getattr(Web3, "LegacyWebSocketProvider", None) or Web3.WebsocketProvider
+        provider = provider_cls(url, websocket_timeout=RPC_TIMEOUT, websocket_kwargs={"max_size": None})
+        _serialize_requests(provider)
+    elif kind == "ipc":
+        provider = Web3.IPCProvider(_ipc_path(url), timeout=RPC_TIMEOUT)
+    elif kind == "tester":
+        provider = _tester_provider()
+        _serialize_requests(provider)
+    else:
+        provider = _http_provider(url)
+    return provider
+
+
+def _split_urls(value: str) -> tuple:
+    return tuple(u.strip() for u in value.split(",") if u.strip())
+
+
+def _configured_endpoints() -> tuple:
+    """(writer urls, reader urls) from GANACHE_URL / RPC_WRITE_URLS / RPC_READ_URLS."""
+    default = _split_urls(os.getenv("GANACHE_URL", "http://localhost:7545")) or ("http://localhost:7545",)
+    writers = _split_urls(os.getenv("RPC_WRITE_URLS", RPC_WRITE_URLS)) or default
+    readers = _split_urls(os.getenv("RPC_READ_URLS", RPC_READ_URLS)) or writers
+    return writers, readers
+
+
+# ─── Multi-endpoint balancing ─────────────────────────────────────────────────
+# Methods that change or depend on one node's local state (unlocked accounts,
+# pending nonces, filters, dev-chain controls) always go to the writer.
+_WRITE_METHODS = {
+    "eth_sendTransaction", "eth_sendRawTransaction", "eth_sign", "eth_signTransaction",
+    "eth_signTypedData", "eth_signTypedData_v4", "eth_accounts", "eth_getTransactionCount",
+    "eth_estimateGas", "eth_newFilter", "eth_newBlockFilter", "eth_getFilterChanges",
+    "eth_getFilterLogs", "eth_uninstallFilter",
+}
+_WRITE_PREFIXES = ("personal_", "evm_", "miner_")
+# Sends are only failed over when the request cannot have reached the node
+_UNSENT_ERRORS = (requests.exceptions.ConnectionError, ConnectionRefusedError, FileNotFoundError)
+
+
+class _Endpoint:
+    """One node behind the balancer, with its latency average and ejection state."""
+
+    def __init__(self, url: str, provider):
+        self.url = url
+        self.provider = provider
+        self.latency = None  # EWMA of successful request latency, seconds
+        self.inflight = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def load(self) -> float:
+        # Unmeasured endpoints look fastest so every node gets sampled
+        return (self.latency or 0.0) * (self.inflight + 1)
+
+
+class _BalancedProvider(BaseProvider):
+    """
+    web3 provider over several nodes of one chain. Writes go to the first
+    available writer and fail over only when the request never left; reads
+    pick the less loaded of two random readers (latency EWMA x in-flight
+    requests) and retry on another reader if a node errors.
+    """
+
+    def __init__(self, writer_urls: tuple, reader_urls: tuple, build=_build_provider):
+        super().__init__()
+        providers = {}
+        for url in writer_urls + reader_urls:
+            if url not in providers:
+                providers[url] = _Endpoint(url, build(url))
+        self.writers = [providers[u] for u in writer_urls]
+        self.readers = [providers[u] for u in reader_urls]
+        self.endpoints = list(providers.values())
+        self._lock = threading.Lock()
+
+    # ─── selection ────────────────────────────────────────────────────────────
+    def _candidates(self, pool: list) -> list:
+        now = time.monotonic()
+        live = [e for e in pool if e.available(now)]
+        # With everything ejected, fail open to the endpoint due back soonest
+        return live or sorted(pool, key=lambda e: e.ejected_until)[:1]
+
+    def _pick_reader(self, exclude) -> "_Endpoint":
+        live = [e for e in self._candidates(self.readers) if e not in exclude]
+        if not live:
+            return None
+        if len(live) == 1:
+            return live[0]
+        a, b = random.sample(live, 2)
+        return a if a.load() <= b.load() else b
+
+    # ─── bookkeeping ──────────────────────────────────────────────────────────
+    def _record(self, endpoint: "_Endpoint", elapsed: float, ok: bool):
+        with self._lock:
+            endpoint.inflight -= 1
+            now = time.monotonic()
+            if not ok:
+                endpoint.failures += 1
+                if endpoint.failures >= RPC_EJECT_FAILURES:
+                    self._eject(endpoint, now, f"{endpoint.failures} consecutive failures")
+                return
+            endpoint.failures = 0
+            endpoint.latency = elapsed if endpoint.latency is None else (
+                RPC_LATENCY_ALPHA * elapsed + (1 - RPC_LATENCY_ALPHA) * endpoint.latency
+            )
+            others = sorted(e.latency for e in self.readers if e is not endpoint and e.latency is not None)
+            if endpoint in self.readers and others:
+                median = others[len(others) // 2]
+                if median > 0 and endpoint.latency > RPC_OUTLIER_FACTOR * median:
+                    self._eject(endpoint, now, f"latency {endpoint.latency * 1000:.0f}ms vs median {median * 1000:.0f}ms")
+
+    def _eject(self, endpoint: "_Endpoint", now: float, reason: str):
+        # Never eject the last available endpoint of a role
+        for pool in (self.writers, self.readers):
+            if endpoint in pool and not any(e is not endpoint and e.available(now) for e in pool):
+                return
+        endpoint.ejected_until = now + RPC_EJECT_SECONDS
+        # Re-measure from scratch when it comes back
+        endpoint.latency = None
+        endpoint.failures = 0
+        print(f"[blockchain] Ejecting RPC endpoint {endpoint.url} for {RPC_EJECT_SECONDS}s: {reason}")
+
+    def _call(self, endpoint: "_Endpoint", method, params):
+        with self._lock:
+            endpoint.inflight += 1
+        start = time.monotonic()
+        try:
+            response = endpoint.provider.make_request(method, params)
+        except Exception:
+            self._record(endpoint, time.monotonic() - start, ok=False)
+            raise
+        self._record(endpoint, time.monotonic() - start, ok=True)
+        return response
+
+    # ─── BaseProvider ─────────────────────────────────────────────────────────
+    def make_request(self, method, params):
+        if method in _WRITE_METHODS or method.startswith(_WRITE_PREFIXES):
+            last_error = None
+            for endpoint in self._candidates(self.writers) + [e for e in self.writers if not e.available(time.monotonic())]:
+                try:
+                    return self._call(endpoint, method, params)
+                except _UNSENT_ERRORS as e:
+                    last_error = e
+            raise last_error
+
+        tried = []
+        last_error = None
+        while True:
+            endpoint = self._pick_reader(tried)
+            if endpoint is None:
+                raise last_error
+            tried.append(endpoint)
+            try:
+                return self._call(endpoint, method, params)
+            except Exception as e:
+                last_error = e
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return any(e.provider.is_connected() for e in self._candidates(self.writers))
+
+    def stats(self) -> list:
+        now = time.monotonic()
+        return [
+            {
+                "url": e.url,
+                "roles": [r for r, pool in (("write", self.writers), ("read", self.readers)) if e in pool],
+                "latency_ms": round(e.latency * 1000, 2) if e.latency is not None else None,
+                "inflight": e.inflight,
+                "ejected_for_s": round(max(0.0, e.ejected_until - now), 1),
+            }
+            for e in self.endpoints
+        ]
+
+
+# ─── Subscriptions (ws / IPC) ─────────────────────────────────────────────────
+class _WsTransport:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @classmethod
+    async def open(cls, url: str):
+        import websockets  # installed with web3
+        return cls(await websockets.connect(url, max_size=None))
+
+    async def send(self, payload: dict):
+        await self.conn.send(json.dumps(payload))
+
+    async def recv(self) -> dict:
+        return json.loads(await self.conn.recv())
+
+    async def close(self):
+        await self.conn.close()
+
+
+class _IpcTransport:
+    """IPC sockets carry a bare stream of JSON documents with no framing."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.buffer = ""
+        self.decoder = json.JSONDecoder()
+
+    @classmethod
+    async def open(cls, url: str):
+        reader, writer = await asyncio.open_unix_connection(_ipc_path(url), limit=2 ** 24)
+        return cls(reader, writer)
+
+    async def send(self, payload: dict):
+        self.writer.write(json.dumps(payload).encode())
+        await self.writer.drain()
+
+    async def recv(self) -> dict:
+        while True:
+            self.buffer = self.buffer.lstrip()
+            if self.buffer:
+                try:
+                    message, end = self.decoder.raw_decode(self.buffer)
+                    self.buffer = self.buffer[end:]
+                    return message
+                except ValueError:
+                    pass
+            chunk = await self.reader.read(65536)
+            if not chunk:
+                raise ConnectionError("IPC socket closed")
+            self.buffer += chunk.decode()
+
+    async def close(self):
+        self.writer.close()
+
+
+class _Subscriptions:
+    """
+    eth_subscribe client for ws:// and IPC endpoints, run on its own thread.
+
+    Tracks the chain head from newHeads so receipt waits, the view cache and
+    background pollers react to new blocks instead of polling, and pushes
+    contract logs to registered callbacks. Over HTTP it stays inactive and
+    callers fall back to polling.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._url = None
+        self._live = False
+        self._head = None
+        self._thread = None
+        # Checksum address -> [callback(raw_log)]
+        self._log_callbacks = {}
+
+    def connect(self, url):
+        """Follow url (None to stop). The worker thread starts on first use."""
+        with self._cond:
+            if url == self._url:
+                return
+            self._url = url
+            self._set_live(False)
+            if url and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="chain-subscriptions", daemon=True)
+                self._thread.start()
+
+    def _set_live(self, live: bool, head=None):
+        with self._cond:
+            self._live = live
+            self._head = head
+            self._cond.notify_all()
+
+    @property
+    def live(self) -> bool:
+        return self._live
+
+    def head(self):
+        """Latest block number seen on the stream, or None when not subscribed."""
+        return self._head if self._live else None
+
+    def wait_for_head(self, after: int, timeout: float):
+        """Wait until a block newer than after arrives. Returns the head, or None when not subscribed."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: not self._live or (self._head is not None and self._head > after), timeout
+            )
+            return self._head if self._live else None
+
+    def subscribe_logs(self, address: str, callback) -> bool:
+        """Register callback(raw_log) for logs of address. False when the endpoint cannot push."""
+        with self._cond:
+            self._log_callbacks.setdefault(Web3.to_checksum_address(address), []).append(callback)
+            return self._url is not None
+
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        while True:
+            url = self._url
+            if not url:
+                await asyncio.sleep(1.0)
+                continue
+            try:
+                await self._session(url)
+            except Exception as e:
+                print(f"[blockchain] subscription stream to {url} dropped: {e}")
+            self._set_live(False)
+            if self._url == url:
+                await asyncio.sleep(SUBSCRIPTION_RECONNECT_DELAY)
+
+    async def _session(self, url: str):
+        opener = _WsTransport if _endpoint_kind(url) == "ws" else _IpcTransport
+        transport = await opener.open(url)
+        ids = itertools.count(1)
+        requests_in_flight = {}  # request id -> ("head" | "newHeads" | address)
+        subscriptions = {}  # subscription id -> "newHeads" | address
+        subscribed_addresses = set()
+
+        async def request(method, params, tag):
+            request_id = next(ids)
+            requests_in_flight[request_id] = tag
+            await transport.send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+
+        try:
+            await request("eth_subscribe", ["newHeads"], "newHeads")
+            await request("eth_blockNumber", [], "head")
+            while self._url == url:
+                # Pick up addresses registered since the last pass
+                for address in list(self._log_callbacks):
+                    if address not in subscribed_addresses:
+                        subscribed_addresses.add(address)
+                        await request("eth_subscribe", ["logs", {"address": address}], address)
+                try:
+                    message = await asyncio.wait_for(transport.recv(), 1.0)
+                except asyncio.TimeoutError:
+                    continue
+
+                if "id" in message and message["id"] in requests_in_flight:
+                    tag = requests_in_flight.pop(message["id"])
+                    if "error" in message:
+                        raise RuntimeError(f"{tag} request failed: {message['error']}")
+                    if tag == "head":
+                        self._set_live(True, int(message["result"], 16))
+                    else:
+                        subscriptions[message["result"]] = tag
+                    continue
+
+                if message.get("method") != "eth_subscription":
+                    continue
+                params = message["params"]
+                tag = subscriptions.get(params["subscription"])
+                if tag == "newHeads":
+                    number = int(params["result"]["number"], 16)
+                    with self._cond:
+                        if self._head is None or number > self._head:
+                            self._set_live(True, number)
+                elif tag is not None:
+                    self._dispatch_log(tag, params["result"])
+        finally:
+            await transport.close()
+
+    def _dispatch_log(self, address: str, raw_log: dict):
+        # Logs removed by a reorg are left to the indexer's reorg window
+        if raw_log.get("removed"):
+            return
+        for callback in list(self._log_callbacks.get(address, [])):
+            try:
+                callback(raw_log)
+            except Exception as e:
+                print(f"[blockchain] log subscriber failed: {e}")
+
+
+_subscriptions = _Subscriptions()
+
+
+class _Web3Manager:
+    """
+    Process-wide Web3 handle shared by all request threads.
+
+    HTTP providers keep a pooled keep-alive session, so helpers no longer
+    pay a TCP handshake per call; ws and IPC providers hold one persistent
+    connection. Connection health is cached for
+    HEALTH_CHECK_TTL seconds, and after CIRCUIT_FAILURE_THRESHOLD failed checks
+    the circuit opens for CIRCUIT_COOLDOWN seconds, during which is_connected()
+    answers False without touching the node.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._health_lock = threading.Lock()
+        self._conn = None  # ((writer urls, reader urls), Web3)
+        self._accounts = None
+        self._healthy = False
+        self._checked_at = 0.0
+        self._failures = 0
+        self._open_until = 0.0
+
+    def _build(self, endpoints: tuple) -> Web3:
+        writers, readers = endpoints
+        print(f"[blockchain] Initializing Web3 with URL: {', '.join(writers)}"
+              + (f" (reads: {', '.join(readers)})" if readers != writers else ""))
+        if len(writers) == 1 and readers == writers:
+            provider = _build_provider(writers[0])
+        else:
+            provider = _BalancedProvider(writers, readers)
+
+        w3 = Web3(provider)
         try:
-            _w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+            w3.middleware_onion.inject(geth_poa_middleware, layer=0)
         except Exception as e:
             print(f"[blockchain] POA middleware inject skipped: {e}")
-    return _w3
+        return w3
+
+    def get(self) -> Web3:
+        # Refresh the endpoint settings from env in case they changed
+        endpoints = _configured_endpoints()
+        conn = self._conn
+        if conn is not None and conn[0] == endpoints:
+            return conn[1]
+
+        with self._lock:
+            if self._conn is None or self._conn[0] != endpoints:
+                self._conn = (endpoints, self._build(endpoints))
+                _nonces.resync()
+                streamable = [u for u in endpoints[0] + endpoints[1] if _endpoint_kind(u) in ["ws", "ipc"]]
+                _subscriptions.connect(streamable[0] if streamable else None)
+                self._accounts = None
+                self._checked_at = 0.0
+                self._failures = 0
+                self._open_until = 0.0
+            return self._conn[1]
+
+    def accounts(self) -> list:
+        """Node accounts, fetched once per connection."""
+        w3 = self.get()
+        accounts = self._accounts
+        if accounts is None:
+            accounts = list(w3.eth.accounts)
+            self._accounts = accounts
+        return accounts
+
+    def is_healthy(self) -> bool:
+        now = time.monotonic()
+        if now < self._open_until:
+            return False
+        if now - self._checked_at < HEALTH_CHECK_TTL:
+            return self._healthy
+
+        with self._health_lock:
+            # Another thread may have refreshed the state while we waited
+            now = time.monotonic()
+            if now - self._checked_at < HEALTH_CHECK_TTL:
+                return self._healthy
+
+            w3 = self.get()
+            try:
+                healthy = w3.is_connected()
+            except Exception as e:
+                print(f"[blockchain] health check exception: {e}")
+                healthy = False
+
+            if healthy:
+                self._failures = 0
+            else:
+                self._failures += 1
+                # A restarted node may come back with different accounts and nonces
+                self._accounts = None
+                _nonces.resync()
+                url = w3.provider.endpoint_uri if hasattr(w3.provider, 'endpoint_uri') else "Unknown"
+                print(f"[blockchain] Web3.is_connected() returned False. URL={url}")
+                if self._failures >= CIRCUIT_FAILURE_THRESHOLD:
+                    self._open_until = now + CIRCUIT_COOLDOWN
+                    print(f"[blockchain] Circuit open for {CIRCUIT_COOLDOWN}s after {self._failures} failed checks")
+            self._healthy = healthy
+            self._checked_at = time.monotonic()
+            return healthy
+
+
+_manager = _Web3Manager()
+
+
+def get_web3() -> Web3:
+    """Return the shared Web3 instance, re-initializing if GANACHE_URL changes. Makes no RPC."""
+    return _manager.get()
+
+
+def rpc_endpoint_stats() -> list:
+    """Per-endpoint roles, latency and ejection state when several RPC endpoints are configured."""
+    provider = get_web3().provider
+    return provider.stats() if isinstance(provider, _BalancedProvider) else []
 
 
 def is_connected() -> bool:
-    """Check if Ganache is reachable."""
+    """Check if Ganache is reachable (cached for HEALTH_CHECK_TTL seconds)."""
     try:
-        w3 = get_web3()
-        connected = w3.is_connected()
-        if not connected:
-            url = w3.provider.endpoint_uri if hasattr(w3.provider, 'endpoint_uri') else "Unknown"
-            print(f"[blockchain] Web3.is_connected() returned False. URL={url}")
-        return connected
+        return _manager.is_healthy()
     except Exception as e:
         print(f"[blockchain] is_connected() exception: {e}")
         return False
 
 
+def wait_for_new_block(timeout: float) -> bool:
+    """
+    Block until the next block arrives on the newHeads subscription, or for
+    timeout seconds. Without a subscription (HTTP endpoints) this just sleeps.
+    Returns True if a new block arrived.
+    """
+    get_web3()
+    head = _subscriptions.head()
+    if head is None:
+        time.sleep(timeout)
+        return False
+    new_head = _subscriptions.wait_for_head(head, timeout)
+    return new_head is not None and new_head > head
+
+
+class _Flight:
+    """One in-progress computation that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _ViewCache:
+    """
+    Cache of contract view-call results keyed by
+    (contract address, function, args, block number).
+
+    Identical concurrent misses are collapsed into one in-flight RPC
+    (single-flight), so N pollers cost one eth_call per new block instead of N.
+    The latest block number is shared the same way and refreshed at most
+    every VIEW_CACHE_BLOCK_TTL seconds.
+    """
+
+    def __init__(self, max_entries: int = VIEW_CACHE_SIZE, block_ttl: float = VIEW_CACHE_BLOCK_TTL):
+        self.max_entries = max_entries
+        self.block_ttl = block_ttl
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._block = None
+        self._block_at = 0.0
+
+    def _single_flight(self, key, compute):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def block_number(self) -> int:
+        # A newHeads subscription keeps the head current without any RPC
+        head = _subscriptions.head()
+        if head is not None:
+            return head
+        now = time.monotonic()
+        if self._block is not None and now - self._block_at < self.block_ttl:
+            return self._block
+
+        def fetch():
+            block = get_web3().eth.block_number
+            self._block = block
+            self._block_at = time.monotonic()
+            return block
+
+        return self._single_flight(("__block_number__",), fetch)
+
+    def invalidate_block(self):
+        """Force the next lookup to re-read the head, e.g. after our own transaction."""
+        self._block_at = 0.0
+
+    def get(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        def fill():
+            value = compute()
+            with self._lock:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+
+        return self._single_flight(key, fill)
+
+
+_view_cache = _ViewCache()
+
+
 # ─── Contract compilation ─────────────────────────────────────────────────────
-def _compile_contract():
-    """Compile Election.sol and cache ABI + bytecode."""
-    global _compiled_abi, _compiled_bytecode
-    if _compiled_abi and _compiled_bytecode:
-        return _compiled_abi, _compiled_bytecode
+def _artifact_path(name: str) -> Path:
+    if name == "Election":
+        return CONTRACT_ARTIFACT
+    return CONTRACT_ARTIFACT.parent / f"{name}.json"
 
+
+def _source_hash(name: str = "Election") -> str:
+    """sha256 of the contract source plus the compiler version it is built with."""
+    digest = hashlib.sha256()
+    digest.update(SOLC_VERSION.encode())
+    digest.update(CONTRACT_SOURCES[name].read_bytes())
+    return digest.hexdigest()
+
+
+def _load_artifact(name: str, source_hash: str):
+    """Return the cached artifact dict if it matches this source, else None."""
+    try:
+        artifact = json.loads(_artifact_path(name).read_text())
+    except (OSError, ValueError):
+        return None
+    if artifact.get("artifact_version") != ARTIFACT_VERSION:
+        return None
+    if artifact.get("source_hash") != source_hash:
+        return None
+    if not artifact.get("abi") or not artifact.get("bytecode"):
+        return None
+    return artifact
+
+
+def _write_artifact(name: str, abi, bytecode, source_hash: str) -> dict:
+    """Write the artifact atomically so concurrent workers never read a partial file."""
+    path = _artifact_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    artifact = {
+        "artifact_version": ARTIFACT_VERSION,
+        "contract": name,
+        "source_hash": source_hash,
+        "solc_version": SOLC_VERSION,
+        "abi": abi,
+        "bytecode": bytecode,
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(artifact, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return artifact
+
+
+def _solc_compile(name: str = "Election"):
+    """Compile one contract variant with solc. Returns (abi, bytecode)."""
     try:
         from solcx import compile_source, install_solc, get_installed_solc_versions
 
         # Install solc 0.8.0 if not already present
         installed = get_installed_solc_versions()
-        target = "0.8.0"
-        if not any(str(v) == target for v in installed):
-            install_solc(target)
+        if not any(str(v) == SOLC_VERSION for v in installed):
+            install_solc(SOLC_VERSION)
 
-        source = CONTRACT_SOL.read_text()
+        source = CONTRACT_SOURCES[name].read_text()
         compiled = compile_source(
             source,
             output_values=["abi", "bin"],
-            solc_version=target
+            solc_version=SOLC_VERSION
         )
 
         # compiled keys look like <stdin>:Election
-        contract_id = next(k for k in compiled if "Election" in k)
+        contract_id = next(k for k in compiled if k.split(":")[-1] == name)
         iface = compiled[contract_id]
-        _compiled_abi = iface["abi"]
-        _compiled_bytecode = iface["bin"]
-        return _compiled_abi, _compiled_bytecode
+        return iface["abi"], iface["bin"]
 
     except ImportError:
         raise RuntimeError(
@@ -94,141 +882,796 @@ def _compile_contract():
         )
 
 
+def build_artifact(name: str = "Election", force: bool = False) -> dict:
+    """
+    Ensure the artifact for contract variant `name` holds the ABI + bytecode
+    of its current source, recompiling only when the source hash changed.
+    Returns the artifact dict.
+    """
+    source_hash = _source_hash(name)
+    artifact = None if force else _load_artifact(name, source_hash)
+    if artifact is None:
+        print(f"[blockchain] Compiling {CONTRACT_SOURCES[name].name} (source hash {source_hash[:12]})")
+        abi, bytecode = _solc_compile(name)
+        artifact = _write_artifact(name, abi, bytecode, source_hash)
+    return artifact
+
+
+def _compile_contract(name: str = "Election"):
+    """Return (abi, bytecode) for a variant, loaded from its build artifact and cached in-process."""
+    if name not in _compiled:
+        artifact = build_artifact(name)
+        _compiled[name] = (artifact["abi"], artifact["bytecode"])
+    return _compiled[name]
+
+
 # ─── Deployment ───────────────────────────────────────────────────────────────
-def deploy_contract() -> dict:
+def deploy_contract(variant: str = None) -> dict:
     """
-    Deploy the Election contract to Ganache.
-    Returns {"contract_address": str, "admin_address": str, "tx_hash": str}
+    Deploy the Election contract (or the ELECTION_CONTRACT variant) to Ganache.
+    Returns {"contract_address": str, "admin_address": str, "tx_hash": str, "contract_variant": str}
     """
+    variant = variant or ELECTION_CONTRACT
+    if variant not in CONTRACT_SOURCES:
+        raise ValueError(f"Unknown contract variant: {variant}")
     w3 = get_web3()
-    if not w3.is_connected():
+    if not is_connected():
         url = w3.provider.endpoint_uri if hasattr(w3.provider, 'endpoint_uri') else "Unknown"
         raise ConnectionError(f"Cannot connect to Ganache at {url}")
 
-    abi, bytecode = _compile_contract()
-    admin = w3.eth.accounts[0]
+    abi, bytecode = _compile_contract(variant)
+    admin = _admin_address()
     w3.eth.default_account = admin
 
     Contract = w3.eth.contract(abi=abi, bytecode=bytecode)
-    tx_hash = Contract.constructor().transact({"from": admin, "gas": 3_000_000})
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    tx_hash = _send_admin_tx(Contract.constructor(), 3_000_000)
+    if tx_hash not in wait_for_receipts([tx_hash]):
+        raise TimeoutError(f"Deployment {tx_hash} was not mined within {RECEIPT_TIMEOUT}s")
+    receipt = w3.eth.get_transaction_receipt(tx_hash)
+    _contract_variants[receipt.contractAddress] = variant
 
     return {
         "contract_address": receipt.contractAddress,
         "admin_address": admin,
-        "tx_hash": tx_hash.hex(),
+        "tx_hash": tx_hash,
         "block_number": receipt.blockNumber,
+        "contract_variant": variant,
     }
 
 
 # ─── Contract Helper ─────────────────────────────────────────────────────────
+_VARIANT_PROBE_ABI = [{
+    "name": "electionVariant", "type": "function", "stateMutability": "pure",
+    "inputs": [], "outputs": [{"name": "", "type": "string"}],
+}]
+
+
+def contract_variant(contract_address: str) -> str:
+    """
+    Which contract variant is deployed at this address. Variants other than
+    the original Election answer electionVariant(); the result is cached.
+    """
+    address = Web3.to_checksum_address(contract_address)
+    variant = _contract_variants.get(address)
+    if variant is None:
+        probe = get_web3().eth.contract(address=address, abi=_VARIANT_PROBE_ABI)
+        try:
+            variant = probe.functions.electionVariant().call()
+        except (ContractLogicError, BadFunctionCallOutput, ValueError):
+            variant = "Election"
+        if variant not in CONTRACT_SOURCES:
+            variant = "Election"
+        _contract_variants[address] = variant
+    return variant
+
+
+# (Web3 instance, address) -> contract object; one election contract per registry entry
+_contract_handles = OrderedDict()
+_contract_handles_lock = threading.Lock()
+
+
 def _get_contract(contract_address: str):
-    """Return a contract instance for the given deployed address."""
+    """
+    Return a contract instance for the given deployed address. Instances are
+    kept in an LRU per connection so the ABI is processed once per contract.
+    """
     w3 = get_web3()
-    abi, _ = _compile_contract()
-    return w3.eth.contract(
-        address=Web3.to_checksum_address(contract_address),
-        abi=abi
-    )
+    address = Web3.to_checksum_address(contract_address)
+    key = (w3, address)
+    with _contract_handles_lock:
+        contract = _contract_handles.get(key)
+        if contract is not None:
+            _contract_handles.move_to_end(key)
+            return contract
+
+    abi, _ = _compile_contract(contract_variant(address))
+    contract = w3.eth.contract(address=address, abi=abi)
+    with _contract_handles_lock:
+        _contract_handles[key] = contract
+        while len(_contract_handles) > CONTRACT_CACHE_SIZE:
+            _contract_handles.popitem(last=False)
+    return contract
 
 
 def _admin_address() -> str:
+    admin = wallets.admin_account()
+    return admin.address if admin is not None else _manager.accounts()[0]
+
+
+# ─── Admin transaction sender ────────────────────────────────────────────────
+class _NonceManager:
+    """
+    Hands out nonces locally per sender so several transactions can be in
+    flight at once. The counter is (re)read from the node's pending
+    transaction count on first use, after resync() (a failed send, a receipt
+    timeout, a rebuilt connection or a failed health check) and every
+    NONCE_RESYNC_INTERVAL seconds, but only while none of the sender's
+    reserved nonces is still being sent, so a re-read never hands one out twice.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = {}
+        self._synced_at = {}
+        self._sending = {}
+        self._stale = set()
+
+    def reserve(self, address: str) -> int:
+        """Next nonce for address; pair every reservation with release()."""
+        with self._lock:
+            now = time.monotonic()
+            due = address in self._stale or now - self._synced_at.get(address, 0.0) > NONCE_RESYNC_INTERVAL
+            if address not in self._next or (due and not self._sending.get(address)):
+                chain = get_web3().eth.get_transaction_count(address, "pending")
+                local = self._next.get(address)
+                if local is not None and local != chain:
+                    print(f"[blockchain] Nonce of {address} resynced from {local} to {chain}")
+                self._next[address] = chain
+                self._synced_at[address] = now
+                self._stale.discard(address)
+            nonce = self._next[address]
+            self._next[address] = nonce + 1
+            self._sending[address] = self._sending.get(address, 0) + 1
+            return nonce
+
+    def release(self, address: str):
+        """The transaction of a reserved nonce was handed to the node (or failed to be)."""
+        with self._lock:
+            self._sending[address] = max(0, self._sending.get(address, 0) - 1)
+
+    def resync(self, address: str = None):
+        """Re-read the counter of one sender (or of all) before its next reservation."""
+        with self._lock:
+            self._stale.update([address] if address is not None else self._next)
+
+
+_nonces = _NonceManager()
+
+
+# Web3 instance -> chain id; gas price is re-read at most once per VIEW_CACHE_BLOCK_TTL
+_chain_ids = {}
+_gas_price_cache = {"at": 0.0, "value": None}
+
+
+def _tx_fees() -> dict:
+    """chainId and gasPrice for a locally signed transaction, so signing needs no extra RPCs."""
     w3 = get_web3()
-    return w3.eth.accounts[0]
+    chain_id = _chain_ids.get(w3)
+    if chain_id is None:
+        chain_id = _chain_ids[w3] = w3.eth.chain_id
+    now = time.monotonic()
+    if _gas_price_cache["value"] is None or now - _gas_price_cache["at"] > VIEW_CACHE_BLOCK_TTL:
+        _gas_price_cache.update(value=w3.eth.gas_price, at=now)
+    return {"chainId": chain_id, "gasPrice": _gas_price_cache["value"]}
+
+
+def _send_with_nonce(address: str, send) -> str:
+    """Call send(nonce) with a reserved nonce of address; a failed send resyncs the counter."""
+    nonce = _nonces.reserve(address)
+    try:
+        return send(nonce).hex()
+    except Exception:
+        _nonces.resync(address)
+        raise
+    finally:
+        _nonces.release(address)
+
+
+def _send_signed(account, fn, gas: int, to: str = None, value: int = 0) -> str:
+    """
+    Sign a contract call / constructor (fn) or a plain transfer (fn=None) with a
+    local account and submit it with eth_sendRawTransaction.
+    """
+    def send(nonce):
+        tx = {"from": account.address, "gas": gas, "nonce": nonce, "value": value, **_tx_fees()}
+        if fn is not None:
+            tx = fn.build_transaction(tx)
+        else:
+            tx["to"] = Web3.to_checksum_address(to)
+        tx.pop("from", None)
+        signed = account.sign_transaction(tx)
+        # eth-account >= 0.13 renamed rawTransaction
+        raw = getattr(signed, "raw_transaction", None) or signed.rawTransaction
+        return get_web3().eth.send_raw_transaction(raw)
+
+    return _send_with_nonce(account.address, send)
+
+
+def _send_admin_tx(fn, gas: int) -> str:
+    """Send a contract call (or constructor) from the admin account with a reserved nonce."""
+    local = wallets.admin_account()
+    if local is not None:
+        return _send_signed(local, fn, gas)
+    admin = _admin_address()
+    return _send_with_nonce(admin, lambda nonce: fn.transact({"from": admin, "gas": gas, "nonce": nonce}))
+
+
+def _send_admin_transfer(to: str, value: int) -> str:
+    local = wallets.admin_account()
+    if local is not None:
+        return _send_signed(local, None, 21_000, to=to, value=value)
+    admin = _admin_address()
+    return _send_with_nonce(admin, lambda nonce: get_web3().eth.send_transaction({
+        "from": admin, "to": Web3.to_checksum_address(to), "value": value, "gas": 21_000, "nonce": nonce,
+    }))
+
+
+def wait_for_receipts(tx_hashes: list, timeout: float = RECEIPT_TIMEOUT, poll_interval: float = 0.2) -> dict:
+    """
+    Wait for a set of transactions together.
+    Returns {tx_hash: {"status", "block_number"}}; hashes still pending at
+    the timeout are missing from the result.
+    """
+    get_web3()
+    pending = list(tx_hashes)
+    resolved = {}
+    deadline = time.monotonic() + timeout
+    while pending:
+        head = _subscriptions.head()
+        resolved.update(get_receipt_statuses(pending))
+        pending = [h for h in pending if h not in resolved]
+        if not pending or time.monotonic() >= deadline:
+            break
+        if head is None:
+            time.sleep(poll_interval)
+        else:
+            # Receipts can only change with a new block
+            _subscriptions.wait_for_head(head, deadline - time.monotonic())
+    if resolved:
+        _view_cache.invalidate_block()
+    if pending:
+        # A dropped transaction leaves a gap that every later nonce would queue behind
+        _nonces.resync()
+    return resolved
 
 
-def _voter_address(voter_index: int) -> str:
+def send_admin_batch(calls: list, timeout: float = RECEIPT_TIMEOUT) -> list:
     """
-    Get a deterministic Ganache account for a voter.
-    Accounts[0] = admin, Accounts[1..N] = voters.
-    Ganache typically provides 10 accounts by default.
-    We use voter_index mod available_accounts to assign an eth address.
-    NOTE: For a real deployment each voter would have a MetaMask wallet;
-    in Ganache simulated mode we cycle through test accounts (accounts[1..9]).
+    Send admin transactions back-to-back with locally reserved nonces, then
+    wait for all receipts at once, so N transactions cost about one
+    confirmation window instead of N.
+
+    calls: list of (contract_function, gas)
+    Returns one {"tx_hash", "status", "block_number", "error"} per call, in order.
+    """
+    results = []
+    for fn, gas in calls:
+        try:
+            results.append({"tx_hash": _send_admin_tx(fn, gas), "error": None})
+        except Exception as e:
+            results.append({"tx_hash": None, "error": str(e)})
+
+    receipts = wait_for_receipts([r["tx_hash"] for r in results if r["tx_hash"]], timeout=timeout)
+    for r in results:
+        if not r["tx_hash"]:
+            r.update({"status": 0, "block_number": None})
+            continue
+        receipt = receipts.get(r["tx_hash"])
+        if receipt is None:
+            r.update({"status": None, "block_number": None, "error": "Timed out waiting for receipt"})
+        else:
+            r.update(receipt)
+            if receipt["status"] != 1:
+                r["error"] = "Transaction reverted"
+    return results
+
+
+def fund_accounts(addresses: list, amount_wei: int = None, timeout: float = RECEIPT_TIMEOUT) -> dict:
+    """
+    Top up accounts below amount_wei (default VOTER_FUNDING_WEI) from the admin:
+    balances are read in parallel, transfers are sent back-to-back with reserved
+    nonces and confirmed together.
+    Returns {"funded", "already_funded", "failed"} counts.
     """
     w3 = get_web3()
-    accounts = w3.eth.accounts
-    # accounts[0] is admin, reserve [1..] for voters
-    max_idx = max(len(accounts) - 1, 1)
-    eth_idx = (voter_index % max_idx) + 1
-    # Clamp to available range
-    eth_idx = min(eth_idx, len(accounts) - 1)
-    return accounts[eth_idx]
+    if amount_wei is None:
+        amount_wei = VOTER_FUNDING_WEI or 2 * BALLOT_GAS * _tx_fees()["gasPrice"]
+    with ThreadPoolExecutor(max_workers=max(1, min(rpc_pool_size(), len(addresses)))) as pool:
+        balances = list(pool.map(w3.eth.get_balance, [Web3.to_checksum_address(a) for a in addresses]))
+
+    needy = [(a, amount_wei - b) for a, b in zip(addresses, balances) if b < amount_wei]
+    hashes, failed = [], 0
+    for address, top_up in needy:
+        try:
+            hashes.append(_send_admin_transfer(address, top_up))
+        except Exception as e:
+            print(f"[blockchain] funding {address} failed: {e}")
+            failed += 1
+    receipts = wait_for_receipts(hashes, timeout=timeout)
+    funded = sum(1 for h in hashes if receipts.get(h, {}).get("status") == 1)
+    return {"funded": funded, "already_funded": len(addresses) - len(needy), "failed": failed + len(hashes) - funded}
+
+
+def _transact_admin(fn, gas: int) -> dict:
+    """Send one admin transaction and wait for its receipt."""
+    result = send_admin_batch([(fn, gas)])[0]
+    if result["tx_hash"] is None:
+        raise RuntimeError(result["error"])
+    return {"tx_hash": result["tx_hash"], "status": result["status"]}
 
 
 # ─── Admin Operations ─────────────────────────────────────────────────────────
 def add_candidate(contract_address: str, name: str, position: str, symbol: str) -> dict:
     """Add a candidate to the deployed contract (admin only). Returns tx_hash."""
+    contract = _get_contract(contract_address)
+    return _transact_admin(contract.functions.addCandidate(name, position, symbol), 200_000)
+
+
+def _added_candidate_ids(contract, tx_hash: str) -> list:
+    """candidateIds assigned by a mined addCandidate(s) transaction, in call order."""
+    receipt = get_web3().eth.get_transaction_receipt(tx_hash)
+    events = contract.events.CandidateAdded().process_receipt(receipt, errors=DISCARD)
+    return [e["args"]["candidateId"] for e in sorted(events, key=lambda e: e["logIndex"])]
+
+
+def add_candidates(contract_address: str, candidates: list) -> list:
+    """
+    Add many candidates in one pipelined round (admin only).
+    candidates: list of {"name", "position", "symbol"} dicts.
+    Returns per-candidate {"name", "candidate_id", "tx_hash", "status", "block_number", "error"},
+    in input order.
+    """
+    contract = _get_contract(contract_address)
+    calls = [
+        (contract.functions.addCandidate(c["name"], c["position"], c["symbol"]), 200_000)
+        for c in candidates
+    ]
+    results = send_admin_batch(calls)
+    for c, r in zip(candidates, results):
+        r["name"] = c["name"]
+        ids = _added_candidate_ids(contract, r["tx_hash"]) if r["status"] == 1 else []
+        r["candidate_id"] = ids[0] if ids else None
+    return results
+
+
+def _estimate_candidate_gas(candidate: dict) -> int:
+    """
+    Rough upper bound of the gas one candidate adds to an addCandidates batch:
+    fixed struct slots and event, one storage slot per 32 bytes of each string
+    (plus its length slot when longer than 31 bytes) and calldata bytes.
+    """
+    gas = 90_000
+    for field in ("name", "position", "symbol"):
+        size = len((candidate.get(field) or "").encode())
+        words = 1 if size <= 31 else 1 + (size + 31) // 32
+        gas += 22_100 * words + 16 * (size + 64)
+    return gas
+
+
+def _chunk_candidates(candidates: list, gas_budget: int) -> list:
+    """Greedily split candidates into chunks whose estimated gas fits gas_budget."""
+    chunks, current, current_gas = [], [], 30_000
+    for c in candidates:
+        gas = _estimate_candidate_gas(c)
+        if current and current_gas + gas > gas_budget:
+            chunks.append(current)
+            current, current_gas = [], 30_000
+        current.append(c)
+        current_gas += gas
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def submit_candidates(contract_address: str, candidates: list) -> list:
+    """
+    Send a slate of candidates through the addCandidates batch entry point
+    without waiting for receipts, chunked so each transaction stays under
+    CANDIDATE_BATCH_GAS_FRACTION of the block gas limit. Contracts deployed
+    before addCandidates existed get one addCandidate transaction per candidate.
+    Returns per-candidate {"name", "tx_hash", "tx_index", "error"} in input
+    order; tx_index is the candidate's place among its transaction's
+    CandidateAdded events. Confirm with confirm_candidates().
+    """
+    if not candidates:
+        return []
     w3 = get_web3()
     contract = _get_contract(contract_address)
     admin = _admin_address()
-    tx_hash = contract.functions.addCandidate(name, position, symbol).transact(
-        {"from": admin, "gas": 200_000}
-    )
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-    return {"tx_hash": tx_hash.hex(), "status": receipt.status}
+    gas_budget = int(w3.eth.get_block("latest").gasLimit * CANDIDATE_BATCH_GAS_FRACTION)
+
+    calls, chunks = [], []
+    pending = _chunk_candidates(candidates, gas_budget)
+    while pending:
+        chunk = pending.pop(0)
+        fn = contract.functions.addCandidates(
+            [c["name"] for c in chunk],
+            [c["position"] for c in chunk],
+            [c["symbol"] for c in chunk],
+        )
+        try:
+            gas = int(fn.estimate_gas({"from": admin}) * 1.2)
+        except (ContractLogicError, BadFunctionCallOutput, ValueError) as e:
+            if chunks:
+                raise
+            print(f"[blockchain] addCandidates unavailable on {contract.address}, adding one by one: {e}")
+            calls = [
+                (contract.functions.addCandidate(c["name"], c["position"], c["symbol"]), 200_000)
+                for c in candidates
+            ]
+            chunks = [[c] for c in candidates]
+            break
+        if gas > gas_budget and len(chunk) > 1:
+            # The heuristic underestimated (e.g. long multibyte names); split and retry
+            half = len(chunk) // 2
+            pending[:0] = [chunk[:half], chunk[half:]]
+            continue
+        calls.append((fn, gas))
+        chunks.append(chunk)
+
+    submitted = []
+    for chunk, (fn, gas) in zip(chunks, calls):
+        try:
+            tx_hash, error = _send_admin_tx(fn, gas), None
+        except Exception as e:
+            tx_hash, error = None, str(e)
+        for i, c in enumerate(chunk):
+            submitted.append({"name": c["name"], "tx_hash": tx_hash, "tx_index": i, "error": error})
+    return submitted
 
 
-def start_voting(contract_address: str) -> dict:
-    """Start voting (admin only)."""
+def confirm_candidates(contract_address: str, submitted: list, timeout: float = RECEIPT_TIMEOUT) -> list:
+    """
+    Wait for the transactions of submit_candidates() entries together.
+    Returns the entries with "status" (1 mined, 0 reverted or never sent, None
+    still pending at the timeout), "block_number" and the on-chain "candidate_id".
+    """
+    contract = _get_contract(contract_address)
+    receipts = wait_for_receipts(list({s["tx_hash"] for s in submitted if s["tx_hash"]}), timeout=timeout)
+    ids = {h: _added_candidate_ids(contract, h) for h, r in receipts.items() if r["status"] == 1}
+
+    results = []
+    for s in submitted:
+        r = {**s, "status": 0, "block_number": None, "candidate_id": None}
+        receipt = receipts.get(s["tx_hash"]) if s["tx_hash"] else None
+        if s["tx_hash"] and receipt is None:
+            r.update({"status": None, "error": "Timed out waiting for receipt"})
+        elif receipt is not None:
+            r.update(receipt)
+            if receipt["status"] != 1:
+                r["error"] = "Transaction reverted"
+            elif s["tx_index"] < len(ids[s["tx_hash"]]):
+                r["candidate_id"] = ids[s["tx_hash"]][s["tx_index"]]
+        results.append(r)
+    return results
+
+
+def add_candidates_batch(contract_address: str, candidates: list) -> list:
+    """
+    Add a slate of candidates (see submit_candidates) and wait for it to be mined.
+    Returns per-candidate {"name", "candidate_id", "tx_hash", "status", "block_number", "error"},
+    in input order; candidate_id is the on-chain id (None unless mined).
+    """
+    return confirm_candidates(contract_address, submit_candidates(contract_address, candidates))
+
+
+def find_added_candidates(contract_address: str, from_block: int) -> list:
+    """
+    CandidateAdded events from from_block to the head, in chain order:
+    [{"candidate_id", "name", "position", "tx_hash", "block_number"}].
+    """
     w3 = get_web3()
     contract = _get_contract(contract_address)
+    logs = w3.eth.get_logs({
+        "address": contract.address,
+        "fromBlock": from_block,
+        "toBlock": "latest",
+        "topics": [_event_topic(contract.abi, "CandidateAdded")],
+    })
+    added = []
+    for log in sorted(logs, key=lambda l: (l["blockNumber"], l["logIndex"])):
+        args = contract.events.CandidateAdded().process_log(log)["args"]
+        added.append({
+            "candidate_id": args["candidateId"],
+            "name": args["name"],
+            "position": args["position"],
+            "tx_hash": log["transactionHash"].hex(),
+            "block_number": log["blockNumber"],
+        })
+    return added
+
+
+def admin_has_pending_transactions() -> bool:
+    """True while transactions sent by the admin account are still waiting to be mined."""
+    w3 = get_web3()
     admin = _admin_address()
-    tx_hash = contract.functions.startVoting().transact({"from": admin, "gas": 100_000})
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-    return {"tx_hash": tx_hash.hex(), "status": receipt.status}
+    return w3.eth.get_transaction_count(admin, "pending") > w3.eth.get_transaction_count(admin, "latest")
+
+
+def start_voting(contract_address: str) -> dict:
+    """Start voting (admin only)."""
+    contract = _get_contract(contract_address)
+    return _transact_admin(contract.functions.startVoting(), 100_000)
 
 
 def end_voting(contract_address: str) -> dict:
     """End voting (admin only)."""
-    w3 = get_web3()
     contract = _get_contract(contract_address)
-    admin = _admin_address()
-    tx_hash = contract.functions.endVoting().transact({"from": admin, "gas": 100_000})
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-    return {"tx_hash": tx_hash.hex(), "status": receipt.status}
+    return _transact_admin(contract.functions.endVoting(), 100_000)
 
 
 # ─── Voter Operations ─────────────────────────────────────────────────────────
-def cast_vote(contract_address: str, candidate_ids: list, voter_eth_address: str) -> dict:
+def submit_vote(contract_address: str, candidate_ids: list, voter) -> dict:
     """
-    Cast a ballot containing multiple candidate IDs on the blockchain.
-    voter_eth_address: the Ganache account assigned to this voter.
-    Returns {"tx_hash": str, "block_number": int}
+    Send a castBallot transaction without waiting for it to be mined.
+    voter: an address unlocked on the node, or a local account (e.g.
+    wallets.voter_account()) whose transaction is signed here.
+    Returns {"tx_hash": str, "voter_address": str}; confirm later with
+    get_receipt_statuses().
     """
-    w3 = get_web3()
     contract = _get_contract(contract_address)
-    voter_addr = Web3.to_checksum_address(voter_eth_address)
 
     # Ensure all IDs are integers
     ids = [int(cid) for cid in candidate_ids]
 
+    if hasattr(voter, "sign_transaction"):
+        return {
+            "tx_hash": _send_signed(voter, contract.functions.castBallot(ids), BALLOT_GAS),
+            "voter_address": voter.address,
+        }
+
+    voter_addr = Web3.to_checksum_address(voter)
     tx_hash = contract.functions.castBallot(ids).transact(
-        {"from": voter_addr, "gas": 500_000} # Increased gas for loop
+        {"from": voter_addr, "gas": BALLOT_GAS}
     )
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-    if receipt.status != 1:
-        raise RuntimeError("Transaction reverted — ballot not counted")
     return {
         "tx_hash": tx_hash.hex(),
-        "block_number": receipt.blockNumber,
         "voter_address": voter_addr,
     }
 
 
+def cast_vote(contract_address: str, candidate_ids: list, voter) -> dict:
+    """
+    Cast a ballot containing multiple candidate IDs on the blockchain.
+    voter: as for submit_vote().
+    Returns {"tx_hash": str, "block_number": int}
+    """
+    sent = submit_vote(contract_address, candidate_ids, voter)
+    receipt = wait_for_receipts([sent["tx_hash"]]).get(sent["tx_hash"])
+    if receipt is None:
+        raise TimeoutError(f"Ballot {sent['tx_hash']} was not mined within {RECEIPT_TIMEOUT}s")
+    if receipt["status"] != 1:
+        raise RuntimeError("Transaction reverted — ballot not counted")
+    return {
+        "tx_hash": sent["tx_hash"],
+        "block_number": receipt["block_number"],
+        "voter_address": sent["voter_address"],
+    }
+
+
+def _lookup_all(fn, items: list) -> list:
+    """fn(item) for every item, spread over the RPC connection pool (one round trip of latency, not N)."""
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=max(1, min(rpc_pool_size(), len(items)))) as pool:
+        return list(pool.map(fn, items))
+
+
+def get_receipt_statuses(tx_hashes: list) -> dict:
+    """
+    Look up receipts for a batch of transaction hashes, concurrently.
+    Returns {tx_hash: {"status": int, "block_number": int}} for mined
+    transactions only; hashes that are still pending are omitted.
+    """
+    w3 = get_web3()
+
+    def receipt(tx_hash):
+        try:
+            return w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+
+    out = {}
+    for tx_hash, r in zip(tx_hashes, _lookup_all(receipt, list(tx_hashes))):
+        if r is not None:
+            out[tx_hash] = {"status": r.status, "block_number": r.blockNumber}
+    return out
+
+
+def get_known_transactions(tx_hashes: list) -> set:
+    """
+    The hashes the node still knows (mined or waiting in its pool). A sent
+    transaction missing here was dropped, or replaced by another with its nonce.
+    """
+    w3 = get_web3()
+
+    def known(tx_hash):
+        try:
+            return w3.eth.get_transaction(tx_hash) is not None
+        except TransactionNotFound:
+            return False
+
+    return {h for h, ok in zip(tx_hashes, _lookup_all(known, list(tx_hashes))) if ok}
+
+
+# ─── Relayed Ballots ──────────────────────────────────────────────────────────
+BALLOT_TYPES = {
+    "EIP712Domain": [
+        {"name": "name", "type": "string"},
+        {"name": "version", "type": "string"},
+        {"name": "chainId", "type": "uint256"},
+        {"name": "verifyingContract", "type": "address"},
+    ],
+    "Ballot": [{"name": "candidateIds", "type": "uint256[]"}],
+}
+
+
+def ballot_domain(contract_address: str) -> dict:
+    """EIP-712 domain of relayed ballots: Election.domainSeparator() of this contract on this chain."""
+    return {
+        "name": "Electra",
+        "version": "1",
+        "chainId": _tx_fees()["chainId"],
+        "verifyingContract": Web3.to_checksum_address(contract_address),
+    }
+
+
+def ballot_typed_data(contract_address: str, candidate_ids: list) -> dict:
+    """The eth_signTypedData_v4 payload a voter signs for relayed submission (ids ascending)."""
+    return {
+        "types": BALLOT_TYPES,
+        "primaryType": "Ballot",
+        "domain": ballot_domain(contract_address),
+        "message": {"candidateIds": sorted(int(cid) for cid in candidate_ids)},
+    }
+
+
+def supports_relay(contract_address: str) -> bool:
+    """True if the deployed contract has the castBallots batch entry point with EIP-712 ballots."""
+    address = Web3.to_checksum_address(contract_address)
+    supported = _relay_support.get(address)
+    if supported is None:
+        supported = False
+        if contract_variant(address) == "Election":
+            try:
+                # Contracts deployed before typed ballots have no domain separator
+                _get_contract(address).functions.domainSeparator().call()
+                supported = True
+            except (ContractLogicError, BadFunctionCallOutput, ValueError):
+                pass
+        _relay_support[address] = supported
+    return supported
+
+
+def submit_ballot_batch(contract_address: str, ballots: list) -> str:
+    """
+    Relay many voter-signed ballots in one castBallots transaction sent from
+    the admin account. ballots: list of {"voter", "candidate_ids", "signature"}
+    with ids ascending. Returns the tx hash without waiting for the receipt;
+    per-voter outcomes come from get_ballot_outcomes().
+    """
+    contract = _get_contract(contract_address)
+    fn = contract.functions.castBallots(
+        [Web3.to_checksum_address(b["voter"]) for b in ballots],
+        [[int(cid) for cid in b["candidate_ids"]] for b in ballots],
+        [Web3.to_bytes(hexstr=b["signature"]) for b in ballots],
+    )
+    gas = int(fn.estimate_gas({"from": _admin_address()}) * 1.2)
+    return _send_admin_tx(fn, gas)
+
+
+def get_ballot_outcomes(contract_address: str, tx_hash: str) -> dict:
+    """
+    Per-voter result of a mined castBallots transaction:
+    {voter_address_lower: {"accepted": bool, "reason": str | None}}
+    """
+    w3 = get_web3()
+    contract = _get_contract(contract_address)
+    receipt = w3.eth.get_transaction_receipt(tx_hash)
+    outcomes = {}
+    for event in contract.events.VoteCast().process_receipt(receipt, errors=DISCARD):
+        outcomes[event["args"]["voter"].lower()] = {"accepted": True, "reason": None}
+    for event in contract.events.BallotRejected().process_receipt(receipt, errors=DISCARD):
+        outcomes[event["args"]["voter"].lower()] = {"accepted": False, "reason": event["args"]["reason"]}
+    return outcomes
+
+
+# ─── Ledger Anchoring ─────────────────────────────────────────────────────────
+def send_ballot_root(contract_address: str, root: str, ballot_count: int) -> str:
+    """Send anchorBallotRoot for an off-chain ballot batch (admin only). Returns the tx hash without waiting."""
+    contract = _get_contract(contract_address)
+    return _send_admin_tx(
+        contract.functions.anchorBallotRoot(Web3.to_bytes(hexstr=root), int(ballot_count)), 150_000
+    )
+
+
+def get_anchored_root(contract_address: str, tx_hash: str):
+    """
+    Outcome of an anchorBallotRoot transaction: None while it is not mined,
+    else {"status", "tx_hash", "block_number", "batch_index"} (batch_index is
+    None if it reverted).
+    """
+    receipt = get_receipt_statuses([tx_hash]).get(tx_hash)
+    if receipt is None:
+        return None
+    out = {"status": receipt["status"], "tx_hash": tx_hash, "block_number": receipt["block_number"], "batch_index": None}
+    if receipt["status"] == 1:
+        contract = _get_contract(contract_address)
+        full = get_web3().eth.get_transaction_receipt(tx_hash)
+        events = contract.events.BallotRootAnchored().process_receipt(full, errors=DISCARD)
+        if not events:
+            raise RuntimeError("anchorBallotRoot emitted no BallotRootAnchored event")
+        out["batch_index"] = events[0]["args"]["batchIndex"]
+    return out
+
+
+def find_anchored_root(contract_address: str, root: str, from_block: int):
+    """
+    The first BallotRootAnchored event for root since from_block, as
+    {"status", "tx_hash", "block_number", "batch_index"}, or None.
+    """
+    w3 = get_web3()
+    contract = _get_contract(contract_address)
+    logs = w3.eth.get_logs({
+        "address": contract.address,
+        "fromBlock": from_block,
+        "toBlock": "latest",
+        "topics": [_event_topic(contract.abi, "BallotRootAnchored")],
+    })
+    wanted = Web3.to_bytes(hexstr=root)
+    for log in sorted(logs, key=lambda l: (l["blockNumber"], l["logIndex"])):
+        args = contract.events.BallotRootAnchored().process_log(log)["args"]
+        if bytes(args["root"]) == wanted:
+            return {
+                "status": 1,
+                "tx_hash": norm_hash(log["transactionHash"]),
+                "block_number": log["blockNumber"],
+                "batch_index": args["batchIndex"],
+            }
+    return None
+
+
+def verify_ballot_proof(contract_address: str, batch_index: int, leaf: str, proof: list) -> bool:
+    """Check an inclusion proof against the root anchored on-chain for batch_index."""
+    contract = _get_contract(contract_address)
+    return contract.functions.verifyBallotProof(
+        int(batch_index),
+        Web3.to_bytes(hexstr=leaf),
+        [Web3.to_bytes(hexstr=p) for p in proof],
+    ).call()
+
+
 def check_has_voted(contract_address: str, voter_eth_address: str) -> bool:
     """Check if an Ethereum address has already voted on the contract."""
     contract = _get_contract(contract_address)
-    return contract.functions.hasVoted(
-        Web3.to_checksum_address(voter_eth_address)
-    ).call()
+    return _view(contract, "hasVoted", Web3.to_checksum_address(voter_eth_address))
 
 
 # ─── Read-Only Queries ────────────────────────────────────────────────────────
+def _view(contract, fn_name: str, *args):
+    """Call a contract view function through the block-keyed read cache."""
+    fn = getattr(contract.functions, fn_name)
+    if not _view_cache.enabled:
+        return fn(*args).call()
+    block = _view_cache.block_number()
+    key = (contract.address, fn_name, args, block)
+    return _view_cache.get(key, lambda: fn(*args).call(block_identifier=block))
+
+
 def get_status(contract_address: str) -> dict:
     """Get voting status: open/closed, candidate count, total votes."""
     contract = _get_contract(contract_address)
-    voting_open, candidate_count, total_votes = contract.functions.getStatus().call()
+    voting_open, candidate_count, total_votes = _view(contract, "getStatus")
     return {
         "voting_open": voting_open,
         "candidate_count": candidate_count,
@@ -236,40 +1679,178 @@ def get_status(contract_address: str) -> dict:
     }
 
 
-def get_candidates(contract_address: str) -> list:
-    """Return list of all candidates with their vote counts."""
-    contract = _get_contract(contract_address)
-    _, candidate_count, _ = contract.functions.getStatus().call()
+def _candidate_dict(cid, name, position, symbol, vote_count) -> dict:
+    return {
+        "id": cid,
+        "name": name,
+        "position": position,
+        "symbol": symbol,
+        "vote_count": vote_count,
+    }
+
+
+def _fetch_candidates_per_id(contract, candidate_count: int) -> list:
+    """Legacy path: one getCandidate(i) eth_call per candidate."""
     result = []
     for i in range(1, candidate_count + 1):
-        cid, name, position, symbol, vote_count = contract.functions.getCandidate(i).call()
-        result.append({
-            "id": cid,
-            "name": name,
-            "position": position,
-            "symbol": symbol,
-            "vote_count": vote_count,
-        })
+        result.append(_candidate_dict(*_view(contract, "getCandidate", i)))
     return result
 
 
+def norm_hash(value) -> str:
+    """A tx hash / topic (HexBytes, bytes or str) as 0x-prefixed lower-case hex."""
+    h = value.hex() if hasattr(value, "hex") else str(value)
+    return "0x" + h.lower().replace("0x", "")
+
+
+def _event_topic(abi, event_name: str) -> str:
+    """topic0 (0x-prefixed hex) of an event in the given ABI."""
+    entry = next(e for e in abi if e.get("type") == "event" and e.get("name") == event_name)
+    signature = f"{event_name}({','.join(i['type'] for i in entry['inputs'])})"
+    return norm_hash(Web3.keccak(text=signature))
+
+
+def _format_pushed_log(raw: dict) -> dict:
+    """Shape a JSON-RPC log from eth_subscribe like the logs web3 returns from get_logs."""
+    return {
+        "address": Web3.to_checksum_address(raw["address"]),
+        "topics": [HexBytes(t) for t in raw["topics"]],
+        "data": HexBytes(raw["data"]),
+        "blockNumber": int(raw["blockNumber"], 16),
+        "blockHash": HexBytes(raw["blockHash"]),
+        "transactionHash": HexBytes(raw["transactionHash"]),
+        "transactionIndex": int(raw["transactionIndex"], 16),
+        "logIndex": int(raw["logIndex"], 16),
+    }
+
+
+def subscribe_events(contract_address: str, callback) -> bool:
+    """
+    Push the contract's decoded events to callback(event) as they are mined
+    (event["event"] is the event name). Only ws and IPC endpoints can push;
+    returns False over HTTP, where callers keep polling.
+    """
+    contract = _get_contract(contract_address)
+    names = {
+        _event_topic(contract.abi, e["name"]): e["name"]
+        for e in contract.abi if e.get("type") == "event"
+    }
+
+    def on_log(raw):
+        name = names.get(raw["topics"][0].lower()) if raw.get("topics") else None
+        if name:
+            callback(getattr(contract.events, name)().process_log(_format_pushed_log(raw)))
+
+    return _subscriptions.subscribe_logs(contract.address, on_log)
+
+
+def _candidate_metadata(contract, wanted_ids) -> dict:
+    """
+    Candidate id -> (name, position, symbol) for variants that keep only a
+    metadata hash on chain. The strings are read from CandidateAdded logs once
+    and cached; later calls only scan blocks added since the last scan.
+    Request threads and the indexer share the cache, so it is only touched
+    under _candidate_meta_lock; the scan itself runs outside it.
+    """
+    with _candidate_meta_lock:
+        cache = _candidate_meta.setdefault(contract.address, {"next_block": 0, "candidates": {}})
+        if all(cid in cache["candidates"] for cid in wanted_ids):
+            return dict(cache["candidates"])
+        from_block = cache["next_block"]
+
+    w3 = get_web3()
+    head = w3.eth.block_number
+    logs = w3.eth.get_logs({
+        "address": contract.address,
+        "fromBlock": from_block,
+        "toBlock": head,
+        "topics": [_event_topic(contract.abi, "CandidateAdded")],
+    })
+    found = {}
+    for log in logs:
+        args = contract.events.CandidateAdded().process_log(log)["args"]
+        found[args["candidateId"]] = (args["name"], args["position"], args["symbol"])
+
+    with _candidate_meta_lock:
+        cache["candidates"].update(found)
+        # A concurrent scan may have got further
+        cache["next_block"] = max(cache["next_block"], head + 1)
+        return dict(cache["candidates"])
+
+
+def _fetch_candidates_hashed(contract) -> list:
+    """Paged read for ElectionOptimized: vote counts from storage, metadata from events."""
+    rows = []
+    offset = 0
+    while True:
+        ids, _, counts = _view(contract, "getCandidates", offset, CANDIDATE_PAGE_SIZE)
+        rows.extend(zip(ids, counts))
+        if len(ids) < CANDIDATE_PAGE_SIZE:
+            break
+        offset += CANDIDATE_PAGE_SIZE
+
+    meta = _candidate_metadata(contract, [cid for cid, _ in rows])
+    return [
+        _candidate_dict(cid, *meta.get(cid, ("", "", "")), count)
+        for cid, count in rows
+    ]
+
+
+def _fetch_candidates(contract, candidate_count: int = None) -> list:
+    """
+    Read every candidate using the paged getCandidates(offset, limit) view,
+    so an election with up to CANDIDATE_PAGE_SIZE candidates costs a single
+    eth_call. Contracts deployed before the view existed revert on it; those
+    addresses are remembered and served by the per-id loop instead.
+    """
+    address = contract.address
+    if contract_variant(address) == "ElectionOptimized":
+        return _fetch_candidates_hashed(contract)
+    if address not in _legacy_contracts:
+        try:
+            result = []
+            offset = 0
+            while True:
+                ids, names, positions, symbols, counts = _view(
+                    contract, "getCandidates", offset, CANDIDATE_PAGE_SIZE
+                )
+                for row in zip(ids, names, positions, symbols, counts):
+                    result.append(_candidate_dict(*row))
+                if len(ids) < CANDIDATE_PAGE_SIZE:
+                    return result
+                offset += CANDIDATE_PAGE_SIZE
+        except (ContractLogicError, BadFunctionCallOutput, ValueError) as e:
+            print(f"[blockchain] getCandidates unavailable on {address}, using per-id reads: {e}")
+            _legacy_contracts.add(address)
+
+    if candidate_count is None:
+        _, candidate_count, _ = _view(contract, "getStatus")
+    return _fetch_candidates_per_id(contract, candidate_count)
+
+
+def get_candidates(contract_address: str) -> list:
+    """Return list of all candidates with their vote counts."""
+    contract = _get_contract(contract_address)
+    return _fetch_candidates(contract)
+
+
 def get_results(contract_address: str) -> dict:
     """Return full results: candidates with vote counts, winner, total votes."""
     contract = _get_contract(contract_address)
-    voting_open, candidate_count, total_votes = contract.functions.getStatus().call()
+    voting_open, candidate_count, total_votes = _view(contract, "getStatus")
 
-    candidates = []
-    for i in range(1, candidate_count + 1):
-        cid, name, position, symbol, vote_count = contract.functions.getCandidate(i).call()
-        pct = round((vote_count / total_votes * 100), 1) if total_votes else 0
-        candidates.append({
-            "id": cid,
-            "name": name,
-            "position": position,
-            "symbol": symbol,
-            "vote_count": vote_count,
-            "percentage": pct,
-        })
+    candidates = _fetch_candidates(contract, candidate_count)
+    return summarize_results(voting_open, total_votes, candidates)
+
+
+def summarize_results(voting_open: bool, total_votes: int, candidates: list) -> dict:
+    """
+    Build the results payload (percentages, per-position winners and ties)
+    from a list of candidate dicts. Shared by live and indexed results.
+    """
+    candidate_count = len(candidates)
+    for c in candidates:
+        c["percentage"] = round((c["vote_count"] / total_votes * 100), 1) if total_votes else 0
 
     # Group by position and find winner per position
     positions = {}
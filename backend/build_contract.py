@@ -0,0 +1,31 @@
+"""
+Build step: compile every contract variant (Election.sol, ElectionOptimized.sol)
+once and write the versioned ABI/bytecode artifacts that blockchain.py loads at
+runtime (see CONTRACT_ARTIFACT).
+
+Run this after changing a contract, or as part of deployment, so worker
+processes never need solc or network access on their first request.
+
+Usage:
+    python build_contract.py [--force]
+"""
+
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import blockchain
+
+if __name__ == "__main__":
+    force = "--force" in sys.argv[1:]
+    for name in blockchain.CONTRACT_SOURCES:
+        try:
+            artifact = blockchain.build_artifact(name, force=force)
+            print(f"✅ Wrote {blockchain._artifact_path(name)}")
+            print(f"   source hash : {artifact['source_hash']}")
+            print(f"   solc        : {artifact['solc_version']}")
+            print(f"   abi entries : {len(artifact['abi'])}")
+        except Exception as e:
+            print(f"❌ Build of {name} failed: {str(e)}")
+            sys.exit(1)
@@ -0,0 +1,89 @@
+"""
+candidate_meta.py – Off-chain details of on-chain candidates.
+
+The candidates and results routes decorate each on-chain candidate with its
+application's photo, branch and statement. Applications record the id each
+contract assigned them when they are synced:
+
+    onchain: [{"contract": <contract address>, "candidate_id": <int>}, ...]
+
+so a whole slate is joined with one $in query on the indexed
+(onchain.contract, onchain.candidate_id) key. Applications synced before
+that field existed are matched by full_name instead (also one $in query).
+
+Joined slates are kept per contract for CANDIDATE_META_TTL seconds and
+dropped by invalidate() when applications are reviewed or synced.
+"""
+
+import os
+import threading
+import time
+
+CANDIDATE_META_TTL = float(os.getenv("CANDIDATE_META_TTL", 60))
+
+META_FIELDS = {"full_name": 1, "candidate_photo_url": 1, "branch_name": 1, "statement": 1, "onchain": 1}
+
+
+def ensure_indexes(applications):
+    applications.create_index([("onchain.contract", 1), ("onchain.candidate_id", 1)])
+    applications.create_index([("status", 1), ("full_name", 1)])
+
+
+class CandidateMetadata:
+    """contract -> {candidate_id: application details}, refreshed on demand."""
+
+    def __init__(self, applications, ttl: float = CANDIDATE_META_TTL):
+        self.applications = applications
+        self.ttl = ttl
+        self._slates = {}   # contract -> (expires_at, {candidate_id: meta})
+        self._lock = threading.Lock()
+
+    def lookup(self, contract: str, candidates: list) -> dict:
+        """{candidate_id: meta} for on-chain candidate dicts ("id", "name")."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._slates.get(contract)
+            if entry is not None and entry[0] > now and all(c["id"] in entry[1] for c in candidates):
+                return entry[1]
+
+        ids = [c["id"] for c in candidates]
+        slate = {}
+        query = {"onchain": {"$elemMatch": {"contract": contract, "candidate_id": {"$in": ids}}}}
+        for app in self.applications.find(query, META_FIELDS):
+            for ref in app.get("onchain", []):
+                if ref.get("contract") == contract:
+                    slate[ref["candidate_id"]] = app
+
+        # Applications synced before on-chain ids were recorded
+        unmatched = {c["name"]: c["id"] for c in candidates if c["id"] not in slate and c.get("name")}
+        if unmatched:
+            query = {"status": "Approved", "full_name": {"$in": list(unmatched)}}
+            for app in self.applications.find(query, META_FIELDS):
+                slate.setdefault(unmatched[app["full_name"]], app)
+
+        # Candidates without an application are remembered as such
+        for cid in ids:
+            slate.setdefault(cid, None)
+        if self.ttl > 0:
+            with self._lock:
+                self._slates[contract] = (now + self.ttl, slate)
+        return slate
+
+    def decorate(self, contract: str, candidates: list, fields=("candidate_photo_url", "branch_name", "statement")):
+        """Copy the given application fields onto each candidate dict that has an application."""
+        if not candidates:
+            return
+        slate = self.lookup(contract, candidates)
+        for c in candidates:
+            app = slate.get(c["id"])
+            if app:
+                for field in fields:
+                    c[field] = app.get(field)
+
+    def invalidate(self, contract: str = None):
+        """Drop one contract's slate, or every slate."""
+        with self._lock:
+            if contract is None:
+                self._slates.clear()
+            else:
+                self._slates.pop(contract, None)
@@ -0,0 +1,347 @@
+"""
+candidate_sync.py – Journaled, incremental sync of approved applications to an election contract.
+
+The `candidate_sync` collection is the journal: one entry per (contract,
+deployment, application_id), so two applicants who share a name are two
+candidates. `deployment` is the deployment_id the deploy route stores with the
+contract: a redeploy to the same address (tester://, a reset Ganache) starts
+a new journal instead of finding the old contract's candidates synced.
+
+    pending    about to be sent; the candidate, if it was sent, appears in
+               CandidateAdded logs from from_block on
+    sent       in transaction tx_hash (tx_index-th CandidateAdded event),
+               not confirmed yet
+    confirmed  on chain as candidate_id
+    failed     never sent, reverted or dropped; sent again by the next run
+
+A run first resolves the entries a previous run left pending or sent: sent
+ones by their receipts, pending ones (a crash between sending and recording
+the tx hash) by matching CandidateAdded logs since their from_block on name
+and position. Entries that are neither on chain nor possibly still in the
+admin's mempool are sent again; while the admin has unmined transactions
+they are left for a later run, so a resumed sync never adds a candidate
+twice. Only then are applications without an entry sent. The chain is read
+once per contract, when a journal is started for a contract that already has
+candidates (synced before the journal existed), to adopt them by name and
+position.
+
+Runs on one contract are serialized by a lease on its blockchain_config entry.
+
+Usage:
+    python candidate_sync.py [election_id] [--status]
+"""
+
+import datetime
+import os
+import sys
+import uuid
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+# Before the settings below and those of the modules imported next are read
+load_dotenv()
+
+import blockchain
+
+CANDIDATE_SYNC_LEASE_SECONDS = int(os.getenv("CANDIDATE_SYNC_LEASE_SECONDS", 600))
+
+SYNC_PENDING = "pending"
+SYNC_SENT = "sent"
+SYNC_CONFIRMED = "confirmed"
+SYNC_FAILED = "failed"
+
+
+class SyncInProgress(RuntimeError):
+    """Another run holds the contract's sync lease."""
+
+
+def ensure_indexes(journal):
+    try:
+        # Superseded by the per-deployment key
+        journal.drop_index("contract_1_application_id_1")
+    except Exception:
+        pass
+    journal.create_index([("contract", 1), ("deployment", 1), ("application_id", 1)], unique=True)
+    journal.create_index([("contract", 1), ("deployment", 1), ("state", 1)])
+
+
+def deployment_of(config: dict) -> str:
+    """The deployment a registry entry points at; entries from before deployment_id use their deploy tx hash."""
+    return config.get("deployment_id") or config.get("tx_hash") or config["address"]
+
+
+def forget_contract(applications, contract_address: str):
+    """Drop the on-chain candidate ids applications hold for an earlier contract at this address."""
+    forms = list({contract_address, contract_address.lower()})
+    applications.update_many(
+        {"onchain.contract": {"$in": forms}},
+        {"$pull": {"onchain": {"contract": {"$in": forms}}}},
+    )
+
+
+def approved_applications(applications, config: dict) -> list:
+    """Approved applications in the election's branch / position group, if it has one."""
+    query = {"status": "Approved"}
+    if config.get("branch_name"):
+        query["branch_name"] = config["branch_name"]
+    if config.get("positions"):
+        query["position"] = {"$in": config["positions"]}
+    return list(applications.find(query).sort("applied_at", 1))
+
+
+def _candidate(app) -> dict:
+    return {
+        "name": app.get("full_name"),
+        "position": app.get("position", "Standard"),
+        "symbol": app.get("symbol", "None"),
+    }
+
+
+class CandidateSync:
+    """Sync one election's approved applications to its contract through the journal."""
+
+    def __init__(self, db, config: dict):
+        self.db = db
+        self.config = config
+        self.contract = config["address"]
+        self.deployment = deployment_of(config)
+        # Every journal query and upsert is scoped to this deployment
+        self.scope = {"contract": self.contract, "deployment": self.deployment}
+        self.journal = db["candidate_sync"]
+        self.applications = db["candidate_applications"]
+        self.blockchain_config = db["blockchain_config"]
+
+    # ─── Lease ────────────────────────────────────────────────────────────────
+    def _acquire(self) -> str:
+        now = datetime.datetime.utcnow()
+        owner = uuid.uuid4().hex
+        held = self.blockchain_config.find_one_and_update(
+            {"_id": self.config["_id"], "$or": [
+                {"candidate_sync_lease": None},
+                {"candidate_sync_lease.expires_at": {"$lt": now}},
+            ]},
+            {"$set": {"candidate_sync_lease": {
+                "owner": owner,
+                "expires_at": now + datetime.timedelta(seconds=CANDIDATE_SYNC_LEASE_SECONDS),
+            }}},
+        )
+        if held is None:
+            raise SyncInProgress("A candidate sync is already running for this election")
+        return owner
+
+    def _release(self, owner: str):
+        self.blockchain_config.update_one(
+            {"_id": self.config["_id"], "candidate_sync_lease.owner": owner},
+            {"$unset": {"candidate_sync_lease": ""}},
+        )
+
+    # ─── Journal ──────────────────────────────────────────────────────────────
+    def _set(self, entry_ids: list, fields: dict):
+        if entry_ids:
+            fields = {**fields, "updated_at": datetime.datetime.utcnow()}
+            self.journal.update_many({"_id": {"$in": entry_ids}}, {"$set": fields})
+
+    def _confirm(self, entries: list):
+        """Mark (entry, candidate_id, tx_hash) triples confirmed and record the id on each application."""
+        if not entries:
+            return
+        now = datetime.datetime.utcnow()
+        self.journal.bulk_write([
+            UpdateOne({"_id": e["_id"]}, {"$set": {
+                "state": SYNC_CONFIRMED, "candidate_id": cid, "tx_hash": tx_hash, "error": None, "updated_at": now,
+            }})
+            for e, cid, tx_hash in entries
+        ], ordered=False)
+        self.applications.bulk_write([
+            UpdateOne({"_id": e["application_id"]},
+                      {"$addToSet": {"onchain": {"contract": self.contract, "candidate_id": cid}}})
+            for e, cid, _ in entries
+        ], ordered=False)
+
+    def _bootstrap(self, apps: list):
+        """Adopt candidates added before this contract had a journal (one chain read, once)."""
+        if self.journal.find_one(self.scope, {"_id": 1}):
+            return
+        if not blockchain.get_status(self.contract)["candidate_count"]:
+            return
+        unclaimed = {}
+        for c in blockchain.get_candidates(self.contract):
+            unclaimed.setdefault((c["name"], c["position"]), []).append(c["id"])
+        adopted = []
+        for app in apps:
+            ids = unclaimed.get((app.get("full_name"), app.get("position", "Standard")))
+            if ids:
+                adopted.append((app, ids.pop(0)))
+        if adopted:
+            now = datetime.datetime.utcnow()
+            self.journal.bulk_write([
+                UpdateOne(
+                    {**self.scope, "application_id": app["_id"]},
+                    {"$setOnInsert": {**_candidate(app), "election_id": self.config.get("election_id"),
+                                      "state": SYNC_CONFIRMED, "candidate_id": cid, "tx_hash": None,
+                                      "created_at": now, "updated_at": now}},
+                    upsert=True,
+                )
+                for app, cid in adopted
+            ], ordered=False)
+            self.applications.bulk_write([
+                UpdateOne({"_id": app["_id"]},
+                          {"$addToSet": {"onchain": {"contract": self.contract, "candidate_id": cid}}})
+                for app, cid in adopted
+            ], ordered=False)
+        print(f"[candidate_sync] {self.contract}: adopted {len(adopted)} candidates already on chain")
+
+    def _resume(self) -> int:
+        """
+        Resolve entries left pending / sent by an earlier run. Entries that did
+        not reach the chain become failed (and are resent); returns how many
+        may still be in the admin's mempool and were left alone.
+        """
+        open_entries = list(self.journal.find(
+            {**self.scope, "state": {"$in": [SYNC_PENDING, SYNC_SENT]}}
+        ).sort([("from_block", 1), ("seq", 1)]))
+        if not open_entries:
+            return 0
+
+        confirmed, unresolved = [], []
+        sent = [e for e in open_entries if e["state"] == SYNC_SENT]
+        results = blockchain.confirm_candidates(self.contract, [
+            {"name": e["name"], "tx_hash": e["tx_hash"], "tx_index": e["tx_index"], "error": None} for e in sent
+        ], timeout=0) if sent else []
+        for e, r in zip(sent, results):
+            if r["candidate_id"] is not None:
+                confirmed.append((e, r["candidate_id"], r["tx_hash"]))
+            elif r["status"] is None:
+                unresolved.append(e)
+            else:
+                self._set([e["_id"]], {"state": SYNC_FAILED, "error": r["error"]})
+
+        pending = [e for e in open_entries if e["state"] == SYNC_PENDING]
+        if pending:
+            known = set(self.journal.distinct("candidate_id", {**self.scope, "state": SYNC_CONFIRMED}))
+            known.update(cid for _, cid, _ in confirmed)
+            added = {}
+            for c in blockchain.find_added_candidates(self.contract, min(e["from_block"] for e in pending)):
+                if c["candidate_id"] not in known:
+                    added.setdefault((c["name"], c["position"]), []).append(c)
+            for e in pending:
+                matches = added.get((e["name"], e["position"]))
+                if matches:
+                    c = matches.pop(0)
+                    confirmed.append((e, c["candidate_id"], c["tx_hash"]))
+                else:
+                    unresolved.append(e)
+
+        self._confirm(confirmed)
+        if unresolved and blockchain.admin_has_pending_transactions():
+            print(f"[candidate_sync] {self.contract}: {len(unresolved)} candidates may still be in flight")
+            return len(unresolved)
+        self._set([e["_id"] for e in unresolved], {"state": SYNC_FAILED, "error": "Not found on chain"})
+        return 0
+
+    # ─── Sync ─────────────────────────────────────────────────────────────────
+    def run(self, apps: list = None) -> dict:
+        """
+        Sync the election's approved applications (or the given ones).
+        Returns {"confirmed", "already_synced", "in_flight", "results"}, where
+        results has one submit/confirm entry (see blockchain.confirm_candidates)
+        per candidate sent by this run.
+        """
+        if apps is None:
+            apps = approved_applications(self.applications, self.config)
+        owner = self._acquire()
+        try:
+            self._bootstrap(apps)
+            in_flight = self._resume()
+            if in_flight:
+                return {"confirmed": 0, "already_synced": self._count(SYNC_CONFIRMED),
+                        "in_flight": in_flight, "results": []}
+
+            # Journal the intent before sending: a crash from here on is resolved from the logs
+            now = datetime.datetime.utcnow()
+            from_block = blockchain.get_web3().eth.block_number
+            ops = [
+                UpdateOne(
+                    {**self.scope, "application_id": app["_id"]},
+                    {"$setOnInsert": {**_candidate(app), "election_id": self.config.get("election_id"),
+                                      "state": SYNC_PENDING, "from_block": from_block, "created_at": now}},
+                    upsert=True,
+                )
+                for app in apps
+            ]
+            if ops:
+                self.journal.bulk_write(ops, ordered=False)
+
+            app_ids = [app["_id"] for app in apps]
+            to_send = list(self.journal.find({
+                **self.scope, "application_id": {"$in": app_ids},
+                "state": {"$in": [SYNC_PENDING, SYNC_FAILED]},
+            }).sort("created_at", 1))
+            if not to_send:
+                return {"confirmed": 0, "already_synced": self._count(SYNC_CONFIRMED), "in_flight": 0, "results": []}
+
+            self.journal.bulk_write([
+                UpdateOne({"_id": e["_id"]}, {"$set": {
+                    "state": SYNC_PENDING, "from_block": from_block, "seq": i, "tx_hash": None, "updated_at": now,
+                }})
+                for i, e in enumerate(to_send)
+            ], ordered=False)
+
+            submitted = blockchain.submit_candidates(
+                self.contract, [{"name": e["name"], "position": e["position"], "symbol": e["symbol"]} for e in to_send]
+            )
+            self.journal.bulk_write([
+                UpdateOne({"_id": e["_id"]}, {"$set": (
+                    {"state": SYNC_SENT, "tx_hash": s["tx_hash"], "tx_index": s["tx_index"]} if s["tx_hash"]
+                    else {"state": SYNC_FAILED, "error": s["error"]}
+                )})
+                for e, s in zip(to_send, submitted)
+            ], ordered=False)
+
+            results = blockchain.confirm_candidates(self.contract, submitted)
+            confirmed = [(e, r["candidate_id"], r["tx_hash"]) for e, r in zip(to_send, results) if r["candidate_id"] is not None]
+            self._confirm(confirmed)
+            self._set([e["_id"] for e, r in zip(to_send, results) if r["status"] == 0 and r["tx_hash"]],
+                      {"state": SYNC_FAILED, "error": "Transaction reverted"})
+            return {
+                "confirmed": len(confirmed),
+                "already_synced": self._count(SYNC_CONFIRMED) - len(confirmed),
+                "in_flight": sum(1 for r in results if r["status"] is None),
+                "results": results,
+            }
+        finally:
+            self._release(owner)
+
+    def _count(self, state: str) -> int:
+        return self.journal.count_documents({**self.scope, "state": state})
+
+    def status(self) -> dict:
+        """Journal entries per state."""
+        counts = {s: 0 for s in (SYNC_PENDING, SYNC_SENT, SYNC_CONFIRMED, SYNC_FAILED)}
+        for row in self.journal.aggregate([
+            {"$match": self.scope},
+            {"$group": {"_id": "$state", "count": {"$sum": 1}}},
+        ]):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+
+if __name__ == "__main__":
+    from pymongo import MongoClient
+
+    database = MongoClient(os.getenv("MONGO_URI"))[os.getenv("DB_NAME")]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    election_id = args[0] if args else "default"
+    key = "active_contract" if election_id == "default" else f"election:{election_id}"
+    cfg = database["blockchain_config"].find_one({"key": key})
+    if not cfg or not cfg.get("address"):
+        print(f"❌ No contract deployed for election '{election_id}'")
+        sys.exit(1)
+
+    sync = CandidateSync(database, cfg)
+    if "--status" not in sys.argv:
+        summary = sync.run()
+        print(f"confirmed {summary['confirmed']}, already synced {summary['already_synced']}, "
+              f"in flight {summary['in_flight']}")
+    print(sync.status())
@@ -0,0 +1,462 @@
+"""
+indexer.py – Incremental Election event indexer.
+
+Pulls Election logs in block-range chunks starting from a stored checkpoint
+and materializes them into MongoDB so results, turnout and status can be
+served without reading contract storage on every request:
+
+    indexed_ballots     one document per ballot (tx hash + voter; a relayed
+                        castBallots transaction carries many ballots)
+    candidate_tallies   per-candidate vote counts with name/position/symbol
+    position_tallies    per-position vote counts
+    chain_checkpoints   last indexed block, voting status and ballot total
+
+Every pass re-scans the last REORG_DEPTH blocks. Ballots that vanished from
+that window were reorged out and are deleted. Tallies are never incremented:
+after the ballots of a pass are written, the counts of every candidate they
+touch are recomputed from indexed_ballots and set, so a pass interrupted
+anywhere before its checkpoint is simply redone.
+
+IndexerThread runs in every app worker, but only the holder of the
+"indexer_lease" document in blockchain_config indexes; the others take over
+when it stops renewing for INDEXER_LEASE_SECONDS.
+
+Usage:
+    python indexer.py                          # follow every registered election
+    python indexer.py --catch-up [election_id] # rebuild one election's projection from block 0
+"""
+
+import datetime
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from web3 import Web3
+
+# Before the settings below and those of the modules imported next are read
+load_dotenv()
+
+import blockchain
+
+LOG_CHUNK_SIZE = int(os.getenv("INDEXER_CHUNK_SIZE", 2000))
+CATCH_UP_CHUNK_SIZE = int(os.getenv("INDEXER_CATCH_UP_CHUNK_SIZE", 10000))
+CATCH_UP_WORKERS = int(os.getenv("INDEXER_CATCH_UP_WORKERS", 4))
+REORG_DEPTH = int(os.getenv("INDEXER_REORG_DEPTH", 6))
+INDEXER_INTERVAL = float(os.getenv("INDEXER_INTERVAL", 2.0))
+INDEXER_LEASE_SECONDS = float(os.getenv("INDEXER_LEASE_SECONDS", 30))
+INDEXER_LEASE_ID = "indexer_lease"
+
+# BallotCast replaces per-candidate VoteCast events in ElectionOptimized
+INDEXED_EVENTS = ["VoteCast", "BallotCast", "CandidateAdded", "VotingStarted", "VotingEnded"]
+
+
+class ChainIndexer:
+    """Index one Election contract's events into the tally projection."""
+
+    def __init__(self, db, contract_address: str, chunk_size: int = LOG_CHUNK_SIZE,
+                 reorg_depth: int = REORG_DEPTH):
+        self.db = db
+        self.address = Web3.to_checksum_address(contract_address)
+        self.chunk_size = chunk_size
+        self.reorg_depth = reorg_depth
+
+        self.checkpoints = db["chain_checkpoints"]
+        self.ballots = db["indexed_ballots"]
+        self.candidate_tallies = db["candidate_tallies"]
+        self.position_tallies = db["position_tallies"]
+
+        self.contract = blockchain._get_contract(self.address)
+        events = {e["name"] for e in self.contract.abi if e.get("type") == "event"}
+        # topic0 -> name of the events we index
+        self.topics = {
+            blockchain._event_topic(self.contract.abi, name): name
+            for name in INDEXED_EVENTS if name in events
+        }
+
+    def ensure_indexes(self):
+        self.checkpoints.create_index([("contract", 1)], unique=True)
+        try:
+            # Superseded by the (contract, tx_hash, voter_address) key once relayed batches existed
+            self.ballots.drop_index("contract_1_tx_hash_1")
+        except Exception:
+            pass
+        self.ballots.create_index([("contract", 1), ("tx_hash", 1), ("voter_address", 1)], unique=True)
+        self.ballots.create_index([("contract", 1), ("block_number", 1)])
+        self.ballots.create_index([("contract", 1), ("candidate_ids", 1)])
+        self.candidate_tallies.create_index([("contract", 1), ("candidate_id", 1)], unique=True)
+        self.position_tallies.create_index([("contract", 1), ("position", 1)], unique=True)
+
+    # ─── Log fetching ─────────────────────────────────────────────────────────
+    def _get_logs(self, block_range) -> list:
+        from_block, to_block = block_range
+        w3 = blockchain.get_web3()
+        return w3.eth.get_logs({
+            "address": self.address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+        })
+
+    def _fetch_logs(self, from_block: int, to_block: int, chunk_size: int, workers: int = 1) -> list:
+        ranges = [
+            (start, min(start + chunk_size - 1, to_block))
+            for start in range(from_block, to_block + 1, chunk_size)
+        ]
+        if workers > 1 and len(ranges) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                chunks = list(pool.map(self._get_logs, ranges))
+        else:
+            chunks = [self._get_logs(r) for r in ranges]
+        return [log for chunk in chunks for log in chunk]
+
+    def _decode(self, logs) -> dict:
+        """Split raw logs into candidates, ballots (grouped by tx) and status changes."""
+        candidates = {}
+        ballots = {}
+        status_events = []
+
+        for log in sorted(logs, key=lambda l: (l["blockNumber"], l["logIndex"])):
+            name = self.topics.get(blockchain.norm_hash(log["topics"][0]))
+            if not name:
+                continue
+            event = getattr(self.contract.events, name)().process_log(log)
+            args = event["args"]
+
+            if name == "CandidateAdded":
+                candidates[args["candidateId"]] = {
+                    "name": args["name"],
+                    "position": args["position"],
+                    "symbol": args.get("symbol"),
+                }
+            elif name == "VoteCast":
+                tx_hash = blockchain.norm_hash(log["transactionHash"])
+                ballot = ballots.setdefault((tx_hash, args["voter"]), {
+                    "contract": self.address,
+                    "tx_hash": tx_hash,
+                    "voter_address": args["voter"],
+                    "candidate_ids": [],
+                    "block_number": log["blockNumber"],
+                    "block_hash": blockchain.norm_hash(log["blockHash"]),
+                    "timestamp": args["timestamp"],
+                })
+                ballot["candidate_ids"].append(args["candidateId"])
+            elif name == "BallotCast":
+                tx_hash = blockchain.norm_hash(log["transactionHash"])
+                ballots[(tx_hash, args["voter"])] = {
+                    "contract": self.address,
+                    "tx_hash": tx_hash,
+                    "voter_address": args["voter"],
+                    "candidate_ids": list(args["candidateIds"]),
+                    "block_number": log["blockNumber"],
+                    "block_hash": blockchain.norm_hash(log["blockHash"]),
+                    "timestamp": args["timestamp"],
+                }
+            else:
+                status_events.append((log["blockNumber"], name == "VotingStarted"))
+
+        return {"candidates": candidates, "ballots": ballots, "status_events": status_events}
+
+    # ─── Projection updates ───────────────────────────────────────────────────
+    def _apply_candidates(self, candidates: dict) -> int:
+        if not candidates:
+            return 0
+        symbols = {cid: c["symbol"] for cid, c in candidates.items()}
+        if any(sym is None for sym in symbols.values()):
+            # Election's CandidateAdded carries no symbol; read it once from the paged snapshot view
+            symbols = {c["id"]: c["symbol"] for c in blockchain.get_candidates(self.address)}
+        ops = [
+            UpdateOne(
+                {"contract": self.address, "candidate_id": cid},
+                {"$setOnInsert": {"vote_count": 0},
+                 "$set": {"name": c["name"], "position": c["position"], "symbol": symbols.get(cid)}},
+                upsert=True,
+            )
+            for cid, c in candidates.items()
+        ]
+        result = self.candidate_tallies.bulk_write(ops, ordered=False)
+        for c in candidates.values():
+            self.position_tallies.update_one(
+                {"contract": self.address, "position": c["position"]},
+                {"$setOnInsert": {"vote_count": 0}},
+                upsert=True,
+            )
+        return result.upserted_count
+
+    def _apply_ballots(self, ballots: dict, window_start: int, check_orphans: bool = True,
+                       recount_all: bool = False):
+        """
+        Upsert the window's ballots, delete orphaned ones and, if anything
+        changed, recount the tallies they touch (every tally with recount_all,
+        after a pass that died mid-way). Returns (added, reverted).
+        """
+        if recount_all:
+            self._recount({c["candidate_id"] for c in self.candidate_tallies.find({"contract": self.address}, {"candidate_id": 1})})
+
+        orphans = []
+        if check_orphans:
+            orphans = [
+                b for b in self.ballots.find({"contract": self.address, "block_number": {"$gte": window_start}})
+                if (b["tx_hash"], b["voter_address"]) not in ballots
+            ]
+        if not ballots and not orphans:
+            return 0, 0
+        # Cleared with the checkpoint; still set on the next pass if this one dies before recounting
+        self.checkpoints.update_one({"contract": self.address}, {"$set": {"recount_pending": True}}, upsert=True)
+
+        added, recount = 0, False
+        if ballots:
+            result = self.ballots.bulk_write([
+                UpdateOne(
+                    {"contract": self.address, "tx_hash": b["tx_hash"], "voter_address": b["voter_address"]},
+                    # A re-mined transaction keeps its hash but may land in another block
+                    {"$setOnInsert": {k: v for k, v in b.items() if k not in ("block_number", "block_hash")},
+                     "$set": {"block_number": b["block_number"], "block_hash": b["block_hash"]}},
+                    upsert=True,
+                )
+                for b in ballots.values()
+            ], ordered=False)
+            added = result.upserted_count
+            recount = bool(added or result.modified_count)
+
+        reverted = 0
+        if orphans:
+            reverted = self.ballots.delete_many({"_id": {"$in": [b["_id"] for b in orphans]}}).deleted_count
+            recount = True
+
+        if recount:
+            self._recount({cid for b in list(ballots.values()) + orphans for cid in b["candidate_ids"]})
+        return added, reverted
+
+    def _recount(self, candidate_ids: set):
+        """Set the vote counts of these candidates, and of their positions, from indexed_ballots."""
+        if not candidate_ids:
+            return
+        counts = {
+            row["_id"]: row["count"]
+            for row in self.ballots.aggregate([
+                {"$match": {"contract": self.address, "candidate_ids": {"$in": list(candidate_ids)}}},
+                {"$unwind": "$candidate_ids"},
+                {"$match": {"candidate_ids": {"$in": list(candidate_ids)}}},
+                {"$group": {"_id": "$candidate_ids", "count": {"$sum": 1}}},
+            ])
+        }
+        self.candidate_tallies.bulk_write([
+            UpdateOne({"contract": self.address, "candidate_id": cid}, {"$set": {"vote_count": counts.get(cid, 0)}})
+            for cid in candidate_ids
+        ], ordered=False)
+
+        positions = self.candidate_tallies.distinct(
+            "position", {"contract": self.address, "candidate_id": {"$in": list(candidate_ids)}}
+        )
+        if not positions:
+            return
+        position_counts = {
+            row["_id"]: row["count"]
+            for row in self.candidate_tallies.aggregate([
+                {"$match": {"contract": self.address, "position": {"$in": positions}}},
+                {"$group": {"_id": "$position", "count": {"$sum": "$vote_count"}}},
+            ])
+        }
+        self.position_tallies.bulk_write([
+            UpdateOne({"contract": self.address, "position": pos},
+                      {"$set": {"vote_count": position_counts.get(pos, 0)}}, upsert=True)
+            for pos in positions
+        ], ordered=False)
+
+    # ─── Passes ───────────────────────────────────────────────────────────────
+    def sync_once(self, chunk_size: int = None, workers: int = 1) -> dict:
+        """Index everything from the checkpoint (minus the reorg window) up to head."""
+        w3 = blockchain.get_web3()
+        head = w3.eth.block_number
+
+        cp = self.checkpoints.find_one({"contract": self.address}) or {}
+        last_block = cp.get("last_block", -1)
+        window_start = max(0, last_block + 1 - self.reorg_depth)
+        if last_block >= head:
+            return {"from_block": head, "to_block": head, "ballots": 0, "reverted": 0}
+
+        logs = self._fetch_logs(window_start, head, chunk_size or self.chunk_size, workers)
+        decoded = self._decode(logs)
+
+        self._apply_candidates(decoded["candidates"])
+        # With no checkpoint there is nothing indexed yet that could be orphaned
+        added, reverted = self._apply_ballots(
+            decoded["ballots"], window_start, check_orphans=last_block >= 0, recount_all=cp.get("recount_pending", False)
+        )
+
+        update = {
+            "contract": self.address,
+            "last_block": head,
+            "updated_at": datetime.datetime.utcnow(),
+        }
+        if decoded["status_events"]:
+            status_block, voting_open = decoded["status_events"][-1]
+            update["voting_open"] = voting_open
+            update["status_block"] = status_block
+        elif cp.get("status_block", -1) >= window_start:
+            # The last status change was reorged out; re-read it from storage
+            update["voting_open"] = self.contract.functions.votingOpen().call()
+
+        # Counted rather than incremented, like the tallies
+        update["total_votes"] = self.ballots.count_documents({"contract": self.address})
+        update["candidate_count"] = self.candidate_tallies.count_documents({"contract": self.address})
+        self.checkpoints.update_one(
+            {"contract": self.address},
+            {"$set": update, "$unset": {"recount_pending": ""},
+             "$setOnInsert": {"created_at": datetime.datetime.utcnow()}},
+            upsert=True,
+        )
+        return {"from_block": window_start, "to_block": head, "ballots": added, "reverted": reverted}
+
+    def catch_up(self, workers: int = CATCH_UP_WORKERS) -> dict:
+        """Drop this contract's projection and replay the election from block 0."""
+        self.ensure_indexes()
+        drop_projection(self.db, self.address)
+        return self.sync_once(chunk_size=CATCH_UP_CHUNK_SIZE, workers=workers)
+
+
+PROJECTION_COLLECTIONS = ["chain_checkpoints", "indexed_ballots", "candidate_tallies", "position_tallies"]
+
+
+def drop_projection(db, contract_address: str):
+    """Delete everything indexed for a contract address (before a replay, or when a new contract takes it)."""
+    query = {"contract": Web3.to_checksum_address(contract_address)}
+    for name in PROJECTION_COLLECTIONS:
+        db[name].delete_many(query)
+
+
+class IndexerThread:
+    """Daemon thread that keeps the projection of every registered election contract current."""
+
+    def __init__(self, db, interval: float = INDEXER_INTERVAL, lease_seconds: float = INDEXER_LEASE_SECONDS):
+        self.db = db
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        # Contract address -> ChainIndexer
+        self._indexers = {}
+        self._thread = None
+        self._lock = threading.Lock()
+        # Set by pushed contract events (ws/IPC endpoints) to index them without waiting out the interval
+        self._wake = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="chain-indexer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[indexer] pass failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _hold_lease(self) -> bool:
+        """Take or renew the indexer lease; False while another process holds it."""
+        now = datetime.datetime.utcnow()
+        try:
+            self.db["blockchain_config"].update_one(
+                {"_id": INDEXER_LEASE_ID, "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + datetime.timedelta(seconds=self.lease_seconds)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # The lease exists and belongs to a live indexer elsewhere
+            return False
+        return True
+
+    def run_once(self) -> dict:
+        """
+        One pass over every election in the registry, if this process holds the
+        indexer lease. Returns {contract address: pass summary}.
+        """
+        summaries = {}
+        if not self._hold_lease():
+            return summaries
+        for config in self.db["blockchain_config"].find({"address": {"$exists": True}}, {"address": 1}):
+            address = Web3.to_checksum_address(config["address"])
+            chain_indexer = self._indexers.get(address)
+            if chain_indexer is None:
+                chain_indexer = ChainIndexer(self.db, address)
+                chain_indexer.ensure_indexes()
+                blockchain.subscribe_events(address, lambda event: self._wake.set())
+                self._indexers[address] = chain_indexer
+            summaries[address] = chain_indexer.sync_once()
+        return summaries
+
+
+# ─── Indexed reads ────────────────────────────────────────────────────────────
+def get_indexed_status(db, contract_address: str):
+    """Status from the projection, or None if the contract has not been indexed yet."""
+    cp = db["chain_checkpoints"].find_one({"contract": Web3.to_checksum_address(contract_address)})
+    if not cp or "last_block" not in cp:
+        return None
+    return {
+        "voting_open": bool(cp.get("voting_open", False)),
+        "candidate_count": cp.get("candidate_count", 0),
+        "total_votes": cp.get("total_votes", 0),
+        "indexed_block": cp.get("last_block"),
+    }
+
+
+def get_indexed_candidates(db, contract_address: str) -> list:
+    address = Web3.to_checksum_address(contract_address)
+    return [
+        {
+            "id": c["candidate_id"],
+            "name": c.get("name"),
+            "position": c.get("position"),
+            "symbol": c.get("symbol"),
+            "vote_count": c.get("vote_count", 0),
+        }
+        for c in db["candidate_tallies"].find({"contract": address}).sort("candidate_id", 1)
+    ]
+
+
+def get_indexed_results(db, contract_address: str):
+    """Results payload in the same shape as blockchain.get_results(), or None if not indexed."""
+    status = get_indexed_status(db, contract_address)
+    if status is None:
+        return None
+    candidates = get_indexed_candidates(db, contract_address)
+    results = blockchain.summarize_results(status["voting_open"], status["total_votes"], candidates)
+    results["indexed_block"] = status["indexed_block"]
+    return results
+
+
+if __name__ == "__main__":
+    from pymongo import MongoClient
+
+    mongo = MongoClient(os.getenv("MONGO_URI"))
+    database = mongo[os.getenv("DB_NAME")]
+
+    if "--catch-up" in sys.argv[1:]:
+        args = [a for a in sys.argv[1:] if a != "--catch-up"]
+        key = f"election:{args[0]}" if args and args[0] != "default" else "active_contract"
+        config = database["blockchain_config"].find_one({"key": key})
+        if not config:
+            print(f"❌ No contract registered under {key} in blockchain_config")
+            sys.exit(1)
+        start = time.perf_counter()
+        summary = ChainIndexer(database, config["address"]).catch_up()
+        print(f"✅ Replayed blocks {summary['from_block']}..{summary['to_block']}: "
+              f"{summary['ballots']} ballots in {time.perf_counter() - start:.2f}s")
+    else:
+        print(f"Following every registered election every {INDEXER_INTERVAL}s (Ctrl+C to stop)")
+        runner = IndexerThread(database)
+        while True:
+            for address, summary in runner.run_once().items():
+                if summary and (summary["ballots"] or summary["reverted"]):
+                    print(f"[indexer] {address} blocks {summary['from_block']}..{summary['to_block']}: "
+                          f"+{summary['ballots']} ballots, -{summary['reverted']} reverted")
+            time.sleep(INDEXER_INTERVAL)
@@ -0,0 +1,347 @@
+"""
+ledger.py – Off-chain ballot ledger anchored on-chain by Merkle root.
+
+In ledger submission mode /api/blockchain/cast-vote appends each ballot to
+the `votes` collection as "recorded" instead of sending a transaction, so
+ballot intake is bounded by MongoDB writes. LedgerAnchorer seals recorded
+ballots into batches every LEDGER_ANCHOR_INTERVAL seconds (or as soon as
+LEDGER_BATCH_SIZE are waiting), computes the Merkle root over their leaves
+and anchors only that root through anchorBallotRoot(). Each ballot then
+carries an inclusion proof that can be checked against the anchored root,
+locally with verify_proof() or on-chain with verifyBallotProof().
+
+    votes           ledger entries: leaf, batch_id, leaf_index, proof
+    ledger_batches  one document per sealed batch: root, size, tx hash, on-chain batch index
+
+A batch is "anchoring" from sealing until its root is mined, under a
+lease_until of LEDGER_ANCHOR_LEASE seconds; the anchor tx hash is saved as
+soon as it is sent. Ballots are only released for resealing once the chain
+shows the root was not anchored: a batch whose anchorer died or timed out is
+taken over when its lease expires and settled from its tx receipt, or, if it
+never saved a hash, from the BallotRootAnchored logs since its from_block.
+
+Leaves are keccak256(abi.encode(address voter, uint[] candidateIds, bytes16 ticket)),
+so the random ticket keeps a ballot's leaf unguessable. Inner nodes hash the
+sorted pair of children; an odd node at the end of a level is carried up.
+"""
+
+import datetime
+import os
+import threading
+import time
+import uuid
+
+from eth_abi import encode as abi_encode
+from pymongo import ReturnDocument, UpdateOne
+from web3 import Web3
+
+import blockchain
+from vote_pipeline import VOTE_CONFIRMED, VOTE_RECORDED
+
+LEDGER_BATCH_SIZE = int(os.getenv("LEDGER_BATCH_SIZE", 1000))
+LEDGER_ANCHOR_INTERVAL = float(os.getenv("LEDGER_ANCHOR_INTERVAL", 10.0))
+# Longer than RECEIPT_TIMEOUT: an anchoring batch is only taken over after its anchor could have been mined
+LEDGER_ANCHOR_LEASE = float(os.getenv("LEDGER_ANCHOR_LEASE", 300.0))
+
+
+# ─── Merkle tree ──────────────────────────────────────────────────────────────
+def leaf_hash(voter_address: str, candidate_ids: list, ticket: str) -> bytes:
+    """Leaf for one ballot; candidate ids are sorted so the leaf is canonical."""
+    return bytes(Web3.keccak(abi_encode(
+        ["address", "uint256[]", "bytes16"],
+        [Web3.to_checksum_address(voter_address), sorted(int(c) for c in candidate_ids), bytes.fromhex(ticket)],
+    )))
+
+
+def _hash_pair(a: bytes, b: bytes) -> bytes:
+    return bytes(Web3.keccak(a + b if a < b else b + a))
+
+
+def build_tree(leaves: list) -> tuple:
+    """
+    Merkle root and per-leaf inclusion proofs for a list of leaf hashes.
+    Returns (root, proofs) where proofs[i] lists leaf i's siblings bottom-up.
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    proofs = [[] for _ in leaves]
+    # Position of each leaf's ancestor on the current level
+    positions = list(range(len(leaves)))
+    level = list(leaves)
+    while len(level) > 1:
+        for i, pos in enumerate(positions):
+            sibling = pos ^ 1
+            if sibling < len(level):
+                proofs[i].append(level[sibling])
+            positions[i] = pos // 2
+        level = [
+            _hash_pair(level[j], level[j + 1]) if j + 1 < len(level) else level[j]
+            for j in range(0, len(level), 2)
+        ]
+    return level[0], proofs
+
+
+def verify_proof(leaf: bytes, proof: list, root: bytes) -> bool:
+    node = leaf
+    for sibling in proof:
+        node = _hash_pair(node, sibling)
+    return node == root
+
+
+def _hex(value: bytes) -> str:
+    return "0x" + value.hex()
+
+
+# ─── Intake ───────────────────────────────────────────────────────────────────
+def record_ballot(votes, contract_address: str, voter_id: str, voter_address: str,
+                  candidate_ids: list, ticket: str, signature: str, election_id: str = None) -> dict:
+    """Append one ballot to the ledger. The returned leaf is final; the proof follows on anchoring."""
+    ids = sorted(int(c) for c in candidate_ids)
+    doc = {
+        "election_id": election_id,
+        "voter_id": voter_id,
+        "candidate_ids": ids,
+        "ticket": ticket,
+        "tx_hash": None,
+        "voter_address": Web3.to_checksum_address(voter_address),
+        "signature": signature,
+        "contract_address": contract_address,
+        "leaf": _hex(leaf_hash(voter_address, ids, ticket)),
+        "batch_id": None,
+        "status": VOTE_RECORDED,
+        "timestamp": datetime.datetime.utcnow(),
+    }
+    votes.insert_one(doc)
+    return doc
+
+
+# ─── Anchoring ────────────────────────────────────────────────────────────────
+class LedgerAnchorer:
+    """Daemon thread that seals recorded ballots into batches and anchors their Merkle roots."""
+
+    def __init__(self, votes, batches, interval: float = LEDGER_ANCHOR_INTERVAL,
+                 batch_size: int = LEDGER_BATCH_SIZE, lease: float = LEDGER_ANCHOR_LEASE):
+        self.votes = votes
+        self.batches = batches
+        self.interval = interval
+        self.batch_size = batch_size
+        self.lease = lease
+        self._last_anchor = time.monotonic()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the anchoring thread once per process."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="ledger-anchorer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        tick = min(self.interval, 1.0)
+        while True:
+            due = time.monotonic() - self._last_anchor >= self.interval
+            try:
+                anchored = self.anchor_once(force=due)
+            except Exception as e:
+                print(f"[ledger] anchoring failed: {e}")
+                anchored = 0
+            if anchored:
+                self._last_anchor = time.monotonic()
+            elif due:
+                # Nothing waiting; start the next interval from now
+                self._last_anchor = time.monotonic()
+            if anchored < self.batch_size:
+                time.sleep(tick)
+
+    def _claim(self, force: bool) -> tuple:
+        """Take up to batch_size unsealed ballots of one contract, oldest first."""
+        waiting = list(
+            self.votes.find({"status": VOTE_RECORDED, "batch_id": None}, {"contract_address": 1})
+            .sort("_id", 1).limit(self.batch_size)
+        )
+        if not waiting or (len(waiting) < self.batch_size and not force):
+            return None, []
+        contract_address = waiting[0]["contract_address"]
+        ids = [v["_id"] for v in waiting if v["contract_address"] == contract_address]
+        batch_id = uuid.uuid4().hex
+        self.votes.update_many(
+            {"_id": {"$in": ids}, "status": VOTE_RECORDED, "batch_id": None},
+            {"$set": {"batch_id": batch_id}},
+        )
+        return batch_id, list(self.votes.find({"batch_id": batch_id}, {"leaf": 1, "contract_address": 1}).sort("_id", 1))
+
+    def _lease_until(self):
+        return datetime.datetime.utcnow() + datetime.timedelta(seconds=self.lease)
+
+    def anchor_once(self, force: bool = False) -> int:
+        """
+        Settle one stale batch, then seal and anchor one new batch. Without
+        force, only a full batch is sealed. Returns how many ballots were anchored.
+        """
+        anchored = self.recover_once()
+        batch_id, entries = self._claim(force)
+        if not entries:
+            return anchored
+
+        contract_address = entries[0]["contract_address"]
+        root, proofs = build_tree([Web3.to_bytes(hexstr=e["leaf"]) for e in entries])
+        batch = {
+            "batch_id": batch_id,
+            "contract": contract_address,
+            "root": _hex(root),
+            "size": len(entries),
+            "status": "anchoring",
+            "tx_hash": None,
+            "from_block": blockchain.get_web3().eth.block_number,
+            "lease_until": self._lease_until(),
+            "created_at": datetime.datetime.utcnow(),
+        }
+        self.batches.insert_one(batch)
+
+        try:
+            tx_hash = blockchain.send_ballot_root(contract_address, batch["root"], len(entries))
+        except Exception as e:
+            # The node may have taken the transaction before failing; the chain decides once the lease expires
+            print(f"[ledger] sending the anchor of {len(entries)} ballots failed: {e}")
+            return anchored
+        batch["tx_hash"] = tx_hash
+        self.batches.update_one({"batch_id": batch_id}, {"$set": {"tx_hash": tx_hash}})
+
+        blockchain.wait_for_receipts([tx_hash])
+        result = blockchain.get_anchored_root(contract_address, tx_hash)
+        if result is None:
+            print(f"[ledger] anchor {tx_hash} not mined yet; settled after the lease")
+            return anchored
+        return anchored + self._settle(batch, result, entries, proofs)
+
+    def recover_once(self) -> int:
+        """
+        Take over one "anchoring" batch whose lease expired and settle it from
+        the chain. Returns how many ballots it anchored.
+        """
+        now = datetime.datetime.utcnow()
+        batch = self.batches.find_one_and_update(
+            {"status": "anchoring", "$or": [{"lease_until": None}, {"lease_until": {"$lte": now}}]},
+            {"$set": {"lease_until": self._lease_until()}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if batch is None:
+            return 0
+
+        if batch.get("tx_hash"):
+            result = blockchain.get_anchored_root(batch["contract"], batch["tx_hash"])
+            if result is None and blockchain.get_known_transactions([batch["tx_hash"]]):
+                # Still in the node's pool; look again when the renewed lease expires
+                return 0
+        else:
+            # Died between sealing and saving the hash: the root's event shows whether it was sent
+            result = blockchain.find_anchored_root(batch["contract"], batch["root"], batch.get("from_block", 0))
+        print(f"[ledger] recovering batch {batch['batch_id']}: {'anchored' if result else 'not anchored'}")
+        return self._settle(batch, result)
+
+    def _settle(self, batch: dict, result, entries: list = None, proofs: list = None) -> int:
+        """
+        Record a batch's on-chain outcome. result None or reverted: the root is
+        not anchored, so its ballots are released to be sealed again.
+        """
+        batch_id = batch["batch_id"]
+        if result is None or result["status"] != 1:
+            error = "anchorBallotRoot reverted" if result else "Anchor transaction was not mined"
+            self.votes.update_many({"batch_id": batch_id, "status": VOTE_RECORDED}, {"$set": {"batch_id": None}})
+            self.batches.update_one({"batch_id": batch_id}, {"$set": {"status": "failed", "error": error}})
+            return 0
+
+        if entries is None:
+            entries = list(self.votes.find({"batch_id": batch_id}, {"leaf": 1}).sort("_id", 1))
+            root, proofs = build_tree([Web3.to_bytes(hexstr=e["leaf"]) for e in entries])
+            if _hex(root) != batch["root"]:
+                raise RuntimeError(f"Batch {batch_id} entries no longer match its anchored root")
+
+        now = datetime.datetime.utcnow()
+        self.votes.bulk_write([
+            UpdateOne({"_id": e["_id"]}, {"$set": {
+                "status": VOTE_CONFIRMED,
+                "leaf_index": i,
+                "proof": [_hex(p) for p in proofs[i]],
+                "batch_index": result["batch_index"],
+                "tx_hash": result["tx_hash"],
+                "block_number": result["block_number"],
+                "confirmed_at": now,
+            }})
+            for i, e in enumerate(entries)
+        ], ordered=False)
+        # Marked anchored last, so a crash above leaves the batch to be settled again
+        self.batches.update_one({"batch_id": batch_id}, {"$set": {
+            "status": "anchored",
+            "tx_hash": result["tx_hash"],
+            "block_number": result["block_number"],
+            "batch_index": result["batch_index"],
+            "anchored_at": now,
+        }, "$unset": {"lease_until": ""}})
+        return len(entries)
+
+
+# ─── Queries ──────────────────────────────────────────────────────────────────
+def get_inclusion_proof(votes, batches, voter_id: str, contract_address: str):
+    """
+    The voter's ledger entry with its inclusion proof and anchored root, or
+    None if the voter has no ledger ballot. "anchored" is False until the
+    batch root has been mined.
+    """
+    entry = votes.find_one(
+        {"voter_id": voter_id, "contract_address": contract_address, "leaf": {"$exists": True}},
+        sort=[("timestamp", -1)],
+    )
+    if not entry:
+        return None
+    out = {
+        "ticket": entry["ticket"],
+        "voter_address": entry["voter_address"],
+        "candidate_ids": entry["candidate_ids"],
+        "leaf": entry["leaf"],
+        "anchored": entry["status"] == VOTE_CONFIRMED,
+        "contract_address": entry["contract_address"],
+    }
+    if not out["anchored"]:
+        return out
+    batch = batches.find_one({"batch_id": entry["batch_id"]}, {"root": 1})
+    out.update({
+        "proof": entry["proof"],
+        "leaf_index": entry["leaf_index"],
+        "batch_index": entry["batch_index"],
+        "root": batch["root"] if batch else None,
+        "tx_hash": entry["tx_hash"],
+        "block_number": entry["block_number"],
+    })
+    return out
+
+
+def get_ledger_results(votes, contract_address: str) -> dict:
+    """
+    Results payload in the same shape as blockchain.get_results(), with vote
+    counts tallied from the ledger (recorded and anchored ballots) instead of
+    contract storage.
+    """
+    status = blockchain.get_status(contract_address)
+    candidates = blockchain.get_candidates(contract_address)
+
+    match = {"contract_address": contract_address, "leaf": {"$exists": True},
+             "status": {"$in": [VOTE_RECORDED, VOTE_CONFIRMED]}}
+    tallies = {
+        row["_id"]: row["count"]
+        for row in votes.aggregate([
+            {"$match": match},
+            {"$unwind": "$candidate_ids"},
+            {"$group": {"_id": "$candidate_ids", "count": {"$sum": 1}}},
+        ])
+    }
+    for c in candidates:
+        c["vote_count"] = tallies.get(c["id"], 0)
+
+    total_votes = votes.count_documents(match)
+    results = blockchain.summarize_results(status["voting_open"], total_votes, candidates)
+    results["anchored_votes"] = votes.count_documents({**match, "status": VOTE_CONFIRMED})
+    return results
@@ -0,0 +1,89 @@
+"""
+Migration Script: Move voter photos and fingerprints into the blob store
+
+Voters added before the blob store keep `photo_data` (base64) and
+`fingerprint_template` inline in their users document. This script decodes
+each blob, stores the raw bytes in the `voter_blobs` GridFS bucket, sets
+`photo_ref` / `fingerprint_ref` and unsets the inline fields. Records are
+processed in batches and the script can be re-run safely.
+
+Usage:
+    python migrate_voter_blobs.py [--dry-run]
+"""
+
+import base64
+import mimetypes
+import os
+import sys
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+import blobstore
+
+# Load environment variables
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = os.getenv("DB_NAME")
+BATCH_SIZE = 200
+
+
+def _photo_content_type(doc):
+    guessed, _ = mimetypes.guess_type(doc.get("photo_url") or "")
+    return guessed or "application/octet-stream"
+
+
+def migrate_voter_blobs(dry_run=False):
+    """Move inline photo_data / fingerprint_template into GridFS."""
+    try:
+        client = MongoClient(MONGO_URI)
+        db = client[DB_NAME]
+        users = db["users"]
+        store = blobstore.BlobStore(db)
+
+        print(f"📦 Connecting to database: {DB_NAME}")
+        query = {"$or": [{"photo_data": {"$exists": True}}, {"fingerprint_template": {"$exists": True}}]}
+        pending = users.count_documents(query)
+        print(f"\n🔍 {pending} users with inline blobs")
+        if dry_run or not pending:
+            client.close()
+            return
+
+        moved, failed = 0, []
+        while True:
+            # Migrated records drop out of the query, so always read from the start
+            batch = list(users.find({**query, "_id": {"$nin": failed}}, {"photo_data": 1, "fingerprint_template": 1, "photo_url": 1}).limit(BATCH_SIZE))
+            if not batch:
+                break
+            ops = []
+            for doc in batch:
+                update = {"$unset": {"photo_data": "", "fingerprint_template": ""}, "$set": {}}
+                try:
+                    if doc.get("photo_data"):
+                        photo = base64.b64decode(doc["photo_data"])
+                        update["$set"]["photo_ref"] = store.put(photo, _photo_content_type(doc))
+                    if doc.get("fingerprint_template") is not None:
+                        update["$set"]["fingerprint_ref"] = store.put_fingerprint(doc["fingerprint_template"])
+                except Exception as e:
+                    print(f"  ⚠️  {doc['_id']}: {e}; left inline")
+                    failed.append(doc["_id"])
+                    continue
+                if not update["$set"]:
+                    del update["$set"]
+                ops.append(UpdateOne({"_id": doc["_id"]}, update))
+            if ops:
+                users.bulk_write(ops, ordered=False)
+                moved += len(ops)
+                print(f"  ✓ {moved}/{pending} users migrated")
+
+        print(f"\n✅ Migration completed: {moved} migrated, {len(failed)} failed")
+        client.close()
+
+    except Exception as e:
+        print(f"❌ Error during migration: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate_voter_blobs(dry_run="--dry-run" in sys.argv)
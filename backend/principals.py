@@ -0,0 +1,110 @@
+"""
+principals.py – Per-process cache of authenticated users.
+
+verify_token_and_get_user() resolves the JWT's user_id to a principal: the
+slim users projection in PRINCIPAL_FIELDS (no password hash, OTP state or
+blob references). Principals are kept in an LRU of USER_CACHE_SIZE entries
+for USER_CACHE_TTL seconds, so a client polling with the same token costs one
+users lookup per TTL instead of one per request.
+
+Routes that modify a user (signup, link_wallet, update_voter, delete_voter,
+cast-vote's custodial_address) call invalidate() in this worker; other
+workers pick the change up when their entry expires, so USER_CACHE_TTL bounds
+how stale a principal can be. USER_CACHE_TTL=0 disables the cache.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 30))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+
+# Everything routes read from the authenticated user
+PRINCIPAL_FIELDS = {
+    "user_type": 1, "voter_id": 1, "email": 1, "name": 1, "full_name": 1,
+    "phone_no": 1, "address": 1, "date_of_birth": 1, "branch_name": 1,
+    "photo_url": 1, "wallet_address": 1, "custodial_address": 1, "has_account": 1,
+}
+
+
+class PrincipalCache:
+    """TTL + LRU map of user id -> principal, invalidated by user id or voter_id."""
+
+    def __init__(self, users, ttl: float = USER_CACHE_TTL, size: int = USER_CACHE_SIZE):
+        self.users = users
+        self.ttl = ttl
+        self.size = size
+        self._entries = OrderedDict()   # user id -> (expires_at, principal)
+        self._by_voter = {}             # voter_id -> user id
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """The principal for a user id, or None if there is no such user."""
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            self.misses += 1
+
+        try:
+            principal = self.users.find_one({"_id": ObjectId(key)}, PRINCIPAL_FIELDS)
+        except (InvalidId, TypeError):
+            return None
+        if principal is None or self.ttl <= 0:
+            return principal
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, principal)
+            self._entries.move_to_end(key)
+            if principal.get("voter_id"):
+                self._by_voter[principal["voter_id"]] = key
+            while len(self._entries) > self.size:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._by_voter.pop(evicted.get("voter_id"), None)
+        return dict(principal)
+
+    def invalidate(self, user_id=None, voter_id=None):
+        """Drop the cached principal of a user, named by id and/or voter_id."""
+        with self._lock:
+            if voter_id is not None:
+                key = self._by_voter.pop(voter_id, None)
+                if key is not None:
+                    self._entries.pop(key, None)
+            if user_id is not None:
+                entry = self._entries.pop(str(user_id), None)
+                if entry is not None:
+                    self._by_voter.pop(entry[1].get("voter_id"), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_voter.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def from_claims(payload: dict):
+    """
+    Principal carried in a token issued with JWT_ROLE_CLAIMS: _id, user_type
+    and voter_id only. None for tokens without the claims.
+    """
+    if "role" not in payload:
+        return None
+    try:
+        user_id = ObjectId(payload.get("user_id"))
+    except (InvalidId, TypeError):
+        return None
+    return {"_id": user_id, "user_type": payload["role"], "voter_id": payload.get("voter_id")}
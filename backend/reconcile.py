@@ -0,0 +1,312 @@
+"""
+reconcile.py – Bulk MongoDB-vs-chain vote reconciliation.
+
+Reads every ballot event of an election contract in parallel block-range
+chunks, groups VoteCast logs by (transaction hash, voter) – a relayed
+castBallots transaction carries several voters – and diffs the on-chain
+ballots against the `votes` collection with set operations on
+(tx_hash, voter_address) keys instead of per-record queries:
+
+    missing_in_db       ballot on chain with no votes record (e.g. a crash
+                        between the transaction and votes.insert_one)
+    missing_on_chain    "confirmed" record whose ballot is not on chain
+    status_mismatch     ballot on chain but the record is pending/queued/failed
+    candidate_mismatch  record and chain disagree on the candidate ids
+    duplicate_voters    voter_ids holding more than one non-failed record
+
+With --repair the chain is treated as the source of truth: missing records
+are upserted over the voter's unconfirmed record, if any (voter resolved by
+linked wallet or custodial account),
+statuses and candidate ids are corrected, and confirmed records missing from
+a block older than the reorg window are marked failed.
+
+Only records sent to this contract are compared; records from before votes
+carried contract_address count only if their ballot is on this contract.
+Ledger-mode ballots are never sent to the chain individually and are skipped.
+
+Usage:
+    python reconcile.py [election_id] [--repair] [--report report.json]
+"""
+
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from eth_abi import decode as abi_decode
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from web3 import Web3
+
+# Before the settings below and those of the modules imported next are read
+load_dotenv()
+
+import blockchain
+from vote_pipeline import VOTE_CONFIRMED, VOTE_FAILED
+
+RECONCILE_CHUNK_SIZE = int(os.getenv("RECONCILE_CHUNK_SIZE", 10000))
+RECONCILE_WORKERS = int(os.getenv("RECONCILE_WORKERS", 8))
+REORG_DEPTH = int(os.getenv("INDEXER_REORG_DEPTH", 6))
+# Entries per category kept in the printed summary
+SAMPLE_SIZE = 20
+
+
+class Reconciler:
+    """Diff one election contract's on-chain ballots against its votes records."""
+
+    def __init__(self, db, contract_address: str, election_id: str = "default",
+                 chunk_size: int = RECONCILE_CHUNK_SIZE, workers: int = RECONCILE_WORKERS):
+        self.votes = db["votes"]
+        self.users = db["users"]
+        self.address = Web3.to_checksum_address(contract_address)
+        self.election_id = election_id
+        # Records from before the election registry belong to the default election
+        self.votes_filter = (
+            {"election_id": {"$in": ["default", None]}} if election_id == "default" else {"election_id": election_id}
+        )
+        self.chunk_size = chunk_size
+        self.workers = workers
+
+        self.contract = blockchain._get_contract(self.address)
+        events = {e["name"] for e in self.contract.abi if e.get("type") == "event"}
+        self.topics = {
+            blockchain._event_topic(self.contract.abi, name): name
+            for name in ("VoteCast", "BallotCast") if name in events
+        }
+
+    # ─── Chain side ───────────────────────────────────────────────────────────
+    def _get_logs(self, block_range) -> list:
+        from_block, to_block = block_range
+        return blockchain.get_web3().eth.get_logs({
+            "address": self.address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [list(self.topics)],
+        })
+
+    def chain_ballots(self, to_block: int) -> dict:
+        """{(tx_hash, voter_lower): {"candidate_ids", "block_number"}} for every ballot up to to_block."""
+        ranges = [
+            (start, min(start + self.chunk_size - 1, to_block))
+            for start in range(0, to_block + 1, self.chunk_size)
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            chunks = list(pool.map(self._get_logs, ranges))
+
+        ballots = {}
+        for chunk in chunks:
+            for log in chunk:
+                name = self.topics.get(blockchain.norm_hash(log["topics"][0]))
+                # Indexed args are read straight from the topics; only BallotCast needs ABI decoding
+                voter = "0x" + bytes(log["topics"][1])[-20:].hex()
+                key = (blockchain.norm_hash(log["transactionHash"]), voter)
+                if name == "VoteCast":
+                    ballot = ballots.setdefault(key, {"candidate_ids": [], "block_number": log["blockNumber"]})
+                    ballot["candidate_ids"].append(int.from_bytes(bytes(log["topics"][2]), "big"))
+                else:
+                    candidate_ids, _ = abi_decode(["uint256[]", "uint256"], bytes(log["data"]))
+                    ballots[key] = {"candidate_ids": list(candidate_ids), "block_number": log["blockNumber"]}
+        return ballots
+
+    # ─── Database side ────────────────────────────────────────────────────────
+    def db_records(self) -> list:
+        """
+        The election's records sent to this contract, plus records from before
+        votes carried contract_address (attributed in reconcile() by their
+        ballot being on this contract).
+        """
+        query = {
+            **self.votes_filter,
+            "leaf": {"$exists": False},
+            "contract_address": {"$in": [self.address, self.address.lower(), None]},
+        }
+        return list(self.votes.find(query, {
+            "voter_id": 1, "voter_address": 1, "tx_hash": 1, "candidate_ids": 1, "status": 1, "block_number": 1,
+            "contract_address": 1,
+        }))
+
+    # ─── Diff ─────────────────────────────────────────────────────────────────
+    def reconcile(self, repair: bool = False) -> dict:
+        started = time.perf_counter()
+        head = blockchain.get_web3().eth.block_number
+        chain = self.chain_ballots(head)
+
+        records = []
+        by_key = {}
+        unsent = []
+        unattributed = 0
+        for r in self.db_records():
+            key = None
+            if r.get("tx_hash") and r.get("voter_address"):
+                key = (blockchain.norm_hash(r["tx_hash"]), r["voter_address"].lower())
+            # Without contract_address a record may belong to an earlier deployment
+            if not r.get("contract_address") and key not in chain:
+                unattributed += 1
+                continue
+            records.append(r)
+            if key:
+                by_key[key] = r
+            else:
+                unsent.append(r)
+
+        chain_keys = set(chain)
+        db_keys = set(by_key)
+        missing_in_db = chain_keys - db_keys
+        absent = db_keys - chain_keys
+        both = chain_keys & db_keys
+
+        missing_on_chain = {k for k in absent if (by_key[k].get("status") or VOTE_CONFIRMED) == VOTE_CONFIRMED}
+        status_mismatch = {k for k in both if (by_key[k].get("status") or VOTE_CONFIRMED) != VOTE_CONFIRMED}
+        candidate_mismatch = {
+            k for k in both
+            if sorted(int(c) for c in by_key[k].get("candidate_ids") or []) != sorted(chain[k]["candidate_ids"])
+        }
+
+        live = {}
+        for r in records:
+            if r.get("status") != VOTE_FAILED and r.get("voter_id"):
+                live[r["voter_id"]] = live.get(r["voter_id"], 0) + 1
+        duplicate_voters = sorted(v for v, n in live.items() if n > 1)
+
+        report = {
+            "contract": self.address,
+            "head_block": head,
+            "chain_ballots": len(chain_keys),
+            "db_records": len(records),
+            "not_yet_sent": len(unsent),
+            "unattributed_records": unattributed,
+            "missing_in_db": sorted(missing_in_db),
+            "missing_on_chain": sorted(missing_on_chain),
+            "status_mismatch": sorted(status_mismatch),
+            "candidate_mismatch": sorted(candidate_mismatch),
+            "duplicate_voters": duplicate_voters,
+        }
+        if repair:
+            report["repairs"] = self._repair(chain, by_key, report, head)
+        report["elapsed_s"] = round(time.perf_counter() - started, 3)
+        return report
+
+    # ─── Repairs ──────────────────────────────────────────────────────────────
+    def _repair(self, chain: dict, by_key: dict, report: dict, head: int) -> dict:
+        now = datetime.datetime.utcnow()
+        ops = []
+
+        wallets = {voter for _, voter in report["missing_in_db"]}
+        voter_ids = {}
+        # Ballots come from the linked wallet, or from the custodial account in HD-wallet mode
+        for u in self.users.find(
+            {"$or": [{"wallet_address": {"$in": list(wallets)}}, {"custodial_address": {"$in": list(wallets)}}]},
+            {"wallet_address": 1, "custodial_address": 1, "voter_id": 1},
+        ):
+            for field in ("wallet_address", "custodial_address"):
+                if u.get(field):
+                    voter_ids[u[field].lower()] = u.get("voter_id")
+        unresolved = 0
+        for tx_hash, voter in report["missing_in_db"]:
+            voter_id = voter_ids.get(voter)
+            if not voter_id:
+                unresolved += 1
+                continue
+            ballot = chain[(tx_hash, voter)]
+            # votes is unique per (election_id, voter_id): take over the voter's unconfirmed
+            # record (failed, or pending on a lost transaction) rather than insert beside it
+            ops.append(UpdateOne(
+                {**self.votes_filter, "voter_id": voter_id,
+                 "$or": [{"status": {"$ne": VOTE_CONFIRMED}}, {"tx_hash": None}]},
+                {"$set": {
+                    "election_id": self.election_id,
+                    "voter_id": voter_id,
+                    "candidate_ids": ballot["candidate_ids"],
+                    "tx_hash": tx_hash,
+                    "voter_address": Web3.to_checksum_address(voter),
+                    "contract_address": self.address,
+                    "status": VOTE_CONFIRMED,
+                    "block_number": ballot["block_number"],
+                    "reconciled_at": now,
+                },
+                 "$unset": {"error": ""},
+                 "$setOnInsert": {"ticket": None, "timestamp": now}},
+                upsert=True,
+            ))
+
+        for key in set(report["status_mismatch"]) | set(report["candidate_mismatch"]):
+            ballot = chain[key]
+            ops.append(UpdateOne({"_id": by_key[key]["_id"]}, {
+                "$set": {
+                    "status": VOTE_CONFIRMED,
+                    "candidate_ids": ballot["candidate_ids"],
+                    "block_number": ballot["block_number"],
+                    "reconciled_at": now,
+                },
+                "$unset": {"error": ""},
+            }))
+
+        # Only blocks past the reorg window are final enough to fail a record over
+        failed = 0
+        for key in report["missing_on_chain"]:
+            record = by_key[key]
+            if record.get("block_number") is not None and record["block_number"] > head - REORG_DEPTH:
+                continue
+            failed += 1
+            ops.append(UpdateOne({"_id": record["_id"]}, {"$set": {
+                "status": VOTE_FAILED,
+                "error": "Ballot not found on chain",
+                "reconciled_at": now,
+            }}))
+
+        conflicts = 0
+        if ops:
+            try:
+                self.votes.bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                # Voters already holding a confirmed record for another ballot; the other repairs still apply
+                errors = e.details.get("writeErrors", [])
+                conflicts = sum(1 for err in errors if err.get("code") == 11000)
+                if conflicts < len(errors):
+                    raise
+        return {
+            "inserted": len(report["missing_in_db"]) - unresolved - conflicts,
+            "unresolved_voters": unresolved,
+            "conflicting_voters": conflicts,
+            "corrected": len(set(report["status_mismatch"]) | set(report["candidate_mismatch"])),
+            "failed": failed,
+        }
+
+
+if __name__ == "__main__":
+    from pymongo import MongoClient
+
+    database = MongoClient(os.getenv("MONGO_URI"))[os.getenv("DB_NAME")]
+
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    report_path = None
+    if "--report" in sys.argv:
+        report_path = sys.argv[sys.argv.index("--report") + 1]
+        args = [a for a in args if a != report_path]
+    election_id = args[0] if args else "default"
+
+    key = "active_contract" if election_id == "default" else f"election:{election_id}"
+    config = database["blockchain_config"].find_one({"key": key})
+    if not config:
+        print(f"❌ No contract registered under {key} in blockchain_config")
+        sys.exit(1)
+
+    result = Reconciler(database, config["address"], election_id).reconcile(repair="--repair" in sys.argv)
+
+    print(f"Election {election_id} ({result['contract']}) at block {result['head_block']}: "
+          f"{result['chain_ballots']} ballots on chain, {result['db_records']} records "
+          f"({result['not_yet_sent']} not sent yet) in {result['elapsed_s']}s")
+    for category in ("missing_in_db", "missing_on_chain", "status_mismatch", "candidate_mismatch", "duplicate_voters"):
+        entries = result[category]
+        print(f"  {category:<18} {len(entries)}")
+        for entry in entries[:SAMPLE_SIZE]:
+            print(f"      {entry}")
+    if "repairs" in result:
+        print(f"  repairs            {result['repairs']}")
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(result, f, indent=2, default=str)
+        print(f"✅ Full report written to {report_path}")
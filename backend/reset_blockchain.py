@@ -8,7 +8,7 @@ MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
 
 def reset_blockchain_data():
-    """Wipe blockchain-related configuration and votes from MongoDB."""
+    """Wipe blockchain-related configuration, votes and everything derived from the contracts from MongoDB."""
     print(f"🔄 Resetting blockchain data in database: {DB_NAME}")
     
     try:
@@ -27,6 +27,18 @@ def reset_blockchain_data():
         vote_result = votes.delete_many({})
         print(f"  ✓ Cleared votes: {vote_result.deleted_count} items removed.")
         
+        # Journals and projections of the old contracts; a new chain may reuse their addresses
+        for name in ["candidate_sync", "chain_checkpoints", "indexed_ballots",
+                     "candidate_tallies", "position_tallies", "ledger_batches"]:
+            result = db[name].delete_many({})
+            print(f"  ✓ Cleared {name}: {result.deleted_count} items removed.")
+        
+        # On-chain candidate ids recorded on applications
+        app_result = db["candidate_applications"].update_many(
+            {"onchain": {"$exists": True}}, {"$unset": {"onchain": ""}}
+        )
+        print(f"  ✓ Cleared on-chain ids from {app_result.modified_count} candidate applications.")
+        
         print("\n✅ Blockchain data reset successfully!")
         client.close()
         
@@ -45,6 +45,37 @@ def setup_database():
         # Index for created_at (for sorting)
         users.create_index([("created_at", DESCENDING)])
         print("  ✓ Created at index created")
+
+        # Keyset pagination and filters of /api/voters
+        users.create_index([("user_type", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+        users.create_index([("user_type", ASCENDING), ("branch_name", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+        users.create_index([("user_type", ASCENDING), ("has_account", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+        users.create_index([("user_type", ASCENDING), ("full_name", ASCENDING)])
+        print("  ✓ Voter list indexes created")
+
+        # Blob references, checked before a deleted voter's blobs are removed
+        users.create_index([("photo_ref", ASCENDING)], sparse=True)
+        users.create_index([("fingerprint_ref", ASCENDING)], sparse=True)
+        print("  ✓ Blob reference indexes created")
+
+        # One ballot record per voter per election (has-voted lookups)
+        votes = db["votes"]
+        votes.create_index([("election_id", ASCENDING), ("voter_id", ASCENDING)], unique=True)
+        print("  ✓ Votes voter index created")
+
+        # Candidate details joined to on-chain candidates by contract and candidate id
+        candidate_applications = db["candidate_applications"]
+        candidate_applications.create_index([("onchain.contract", ASCENDING), ("onchain.candidate_id", ASCENDING)])
+        candidate_applications.create_index([("status", ASCENDING), ("full_name", ASCENDING)])
+        print("  ✓ Candidate application indexes created")
+
+        # Candidate sync journal: one entry per (contract, deployment, application)
+        candidate_sync = db["candidate_sync"]
+        candidate_sync.create_index(
+            [("contract", ASCENDING), ("deployment", ASCENDING), ("application_id", ASCENDING)], unique=True
+        )
+        candidate_sync.create_index([("contract", ASCENDING), ("deployment", ASCENDING), ("state", ASCENDING)])
+        print("  ✓ Candidate sync journal indexes created")
         
         print("\n✅ Database setup completed successfully!")
         print(f"\n📊 Collection Stats:")
@@ -0,0 +1,107 @@
+"""
+signatures.py – Wallet signature recovery off the request threads.
+
+ECDSA public-key recovery is CPU-bound Python that holds the GIL, so a burst
+of MetaMask logins or ballots serializes every request thread on it. Recovery
+runs here in a process pool of SIGNATURE_WORKERS processes instead, each
+reusing one Account instance, with a batch API that ships signatures to the
+workers in chunks.
+
+Messages are personal_sign text, or EIP-712 typed data dicts (relayed
+ballots, see blockchain.ballot_typed_data()).
+
+With SIGNATURE_WORKERS=0, or where the forkserver start method is not
+available (Windows), recovery runs inline in the calling thread.
+
+Benchmark: python bench_signatures.py
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+try:
+    from eth_account.messages import encode_typed_data
+except ImportError:  # eth-account < 0.10
+    from eth_account.messages import encode_structured_data
+
+    def encode_typed_data(full_message):
+        return encode_structured_data(full_message)
+
+SIGNATURE_WORKERS = int(os.getenv("SIGNATURE_WORKERS", os.cpu_count() or 1))
+# Signatures per task sent to a worker by the batch API
+SIGNATURE_CHUNK_SIZE = int(os.getenv("SIGNATURE_CHUNK_SIZE", 64))
+
+# One Account per process (the parent and each worker)
+_account = Account()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _recover(message, signature: str):
+    """Signer address of a personal_sign text or typed data dict, or None if the signature is malformed."""
+    try:
+        if isinstance(message, dict):
+            return _account.recover_message(encode_typed_data(full_message=message), signature=signature)
+        return _account.recover_message(encode_defunct(text=message), signature=signature)
+    except Exception:
+        return None
+
+
+def _recover_chunk(pairs: list) -> list:
+    return [_recover(message, signature) for message, signature in pairs]
+
+
+def _pool():
+    global _executor
+    if _executor is not None or SIGNATURE_WORKERS <= 0:
+        return _executor
+    with _executor_lock:
+        if _executor is None and "forkserver" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("forkserver")
+            # Workers only need this module; the default preload would re-import the app's __main__
+            ctx.set_forkserver_preload([__name__])
+            _executor = ProcessPoolExecutor(max_workers=SIGNATURE_WORKERS, mp_context=ctx)
+        return _executor
+
+
+def recover_signer(message, signature: str):
+    """Recover the address that signed message (personal_sign text or typed data). None if the signature is malformed."""
+    pool = _pool()
+    if pool is None:
+        return _recover(message, signature)
+    return pool.submit(_recover, message, signature).result()
+
+
+def recover_signers(pairs: list) -> list:
+    """Batch form of recover_signer: pairs is a list of (message, signature); results keep its order."""
+    pool = _pool()
+    if pool is None or len(pairs) <= 1:
+        return _recover_chunk(pairs)
+    chunks = [pairs[i:i + SIGNATURE_CHUNK_SIZE] for i in range(0, len(pairs), SIGNATURE_CHUNK_SIZE)]
+    return [address for chunk in pool.map(_recover_chunk, chunks) for address in chunk]
+
+
+def verify_signatures(items: list) -> list:
+    """
+    items: list of (message, signature, expected_address).
+    Returns one bool per item: whether it was signed by expected_address.
+    """
+    signers = recover_signers([(message, signature) for message, signature, _ in items])
+    return [
+        signer is not None and signer.lower() == (expected or "").lower()
+        for signer, (_, _, expected) in zip(signers, items)
+    ]
+
+
+def shutdown():
+    """Stop the worker processes (benchmarks, tests)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
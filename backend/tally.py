@@ -0,0 +1,330 @@
+"""
+tally.py – Vectorized recount of an election from its ballot event logs.
+
+The contract only keeps final per-candidate counters. TallyEngine rebuilds the
+count from the raw VoteCast/BallotCast logs instead: every selection (one voter
+choosing one candidate) becomes a row of NumPy arrays, and every figure is a
+bincount or grouped reduction over those rows:
+
+    candidate_tallies()  votes per candidate
+    position_tallies()   selections per position and ballots touching it
+    ties()               positions whose top count is shared
+    crosstab(labels)     candidate x group counts, e.g. by voter branch_name
+    hourly()             candidate x hour-of-casting counts
+    verify()             recount vs. the on-chain counters
+
+Voter attributes are joined from `users` by linked wallet or custodial address.
+
+Usage:
+    python tally.py [election_id] [--by branch_name] [--hourly]
+Benchmark (synthetic selections, no chain): python bench_tally.py
+"""
+
+import datetime
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+from web3 import Web3
+
+# Before the settings below and those of the modules imported next are read
+load_dotenv()
+
+import blockchain
+from reconcile import RECONCILE_CHUNK_SIZE, RECONCILE_WORKERS
+
+# Voter fields a breakdown may group by
+CROSSTAB_FIELDS = ["branch_name"]
+
+
+# ─── Loading ──────────────────────────────────────────────────────────────────
+def load_selections(contract_address: str, to_block: int = None, chunk_size: int = RECONCILE_CHUNK_SIZE,
+                    workers: int = RECONCILE_WORKERS) -> dict:
+    """
+    Every ballot selection of a contract as parallel arrays:
+    {"voter": int32 index into "voters" per row, "candidate_id": int64, "block_number": int64,
+    "voters": lower-case addresses}.
+    """
+    address = Web3.to_checksum_address(contract_address)
+    contract = blockchain._get_contract(address)
+    events = {e["name"] for e in contract.abi if e.get("type") == "event"}
+    topics = {
+        blockchain._event_topic(contract.abi, name): name
+        for name in ("VoteCast", "BallotCast") if name in events
+    }
+    w3 = blockchain.get_web3()
+    if to_block is None:
+        to_block = w3.eth.block_number
+
+    def get_logs(block_range):
+        return w3.eth.get_logs({
+            "address": address, "fromBlock": block_range[0], "toBlock": block_range[1], "topics": [list(topics)],
+        })
+
+    ranges = [(start, min(start + chunk_size - 1, to_block)) for start in range(0, to_block + 1, chunk_size)]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        chunks = list(pool.map(get_logs, ranges))
+
+    return decode_selections([log for chunk in chunks for log in chunk], topics)
+
+
+def _uint_words(raw: bytes) -> np.ndarray:
+    """32-byte big-endian ABI words as int64 (ids, lengths and offsets here fit in 64 bits)."""
+    words = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 32)
+    return np.ascontiguousarray(words[:, 24:]).view(">u8").ravel().astype(np.int64)
+
+
+def decode_selections(logs: list, topics: dict) -> dict:
+    """
+    VoteCast / BallotCast logs (topics: {topic0 hex: event name}) to selection
+    arrays. Each log is touched once to gather its raw topic and data bytes;
+    voter encoding and ABI decoding then run over whole byte buffers.
+    """
+    n = len(logs)
+    if n == 0:
+        return {"voter": np.zeros(0, np.int32), "candidate_id": np.zeros(0, np.int64),
+                "block_number": np.zeros(0, np.int64), "voters": []}
+
+    vote_topic = next((bytes.fromhex(t[2:]) for t, name in topics.items() if name == "VoteCast"), None)
+    topic0 = np.frombuffer(b"".join(bytes(log["topics"][0]) for log in logs), dtype=np.uint8).reshape(n, 32)
+    is_vote = (topic0 == np.frombuffer(vote_topic, dtype=np.uint8)).all(axis=1) if vote_topic else np.zeros(n, bool)
+    blocks = np.fromiter((log["blockNumber"] for log in logs), dtype=np.int64, count=n)
+
+    # Voters (last 20 bytes of topic 1) dictionary-encoded in one np.unique over fixed-width keys
+    raw_voters = np.frombuffer(b"".join(bytes(log["topics"][1])[12:] for log in logs), dtype=np.dtype((np.void, 20)))
+    unique, codes = np.unique(raw_voters, return_inverse=True)
+    codes = codes.astype(np.int32).ravel()
+
+    # VoteCast: one selection, the candidate id is topic 2
+    vote_rows = np.flatnonzero(is_vote)
+    vote_ids = _uint_words(b"".join(bytes(logs[i]["topics"][2]) for i in vote_rows)) if len(vote_rows) else np.zeros(0, np.int64)
+
+    # BallotCast: data is (uint256[] candidateIds, uint256 timestamp); locate every array in the joined buffer
+    ballot_rows = np.flatnonzero(~is_vote)
+    if len(ballot_rows):
+        data = [bytes(logs[i]["data"]) for i in ballot_rows]
+        words = _uint_words(b"".join(data))
+        sizes = np.fromiter((len(d) // 32 for d in data), dtype=np.int64, count=len(data))
+        base = np.cumsum(sizes) - sizes
+        length_at = base + words[base] // 32
+        counts = words[length_at]
+        first = length_at + 1
+        offsets = np.cumsum(counts) - counts
+        ballot_ids = words[np.repeat(first - offsets, counts) + np.arange(int(counts.sum()))]
+    else:
+        counts = np.zeros(0, np.int64)
+        ballot_ids = np.zeros(0, np.int64)
+
+    return {
+        "voter": np.concatenate([codes[vote_rows], np.repeat(codes[ballot_rows], counts)]).astype(np.int32),
+        "candidate_id": np.concatenate([vote_ids, ballot_ids]),
+        "block_number": np.concatenate([blocks[vote_rows], np.repeat(blocks[ballot_rows], counts)]),
+        "voters": ["0x" + v.tobytes().hex() for v in unique],
+    }
+
+
+def block_hours(block_numbers: np.ndarray, workers: int = RECONCILE_WORKERS) -> np.ndarray:
+    """Hour bucket (unix seconds // 3600) of each row's block; one eth_getBlock per distinct block."""
+    unique, inverse = np.unique(block_numbers, return_inverse=True)
+    w3 = blockchain.get_web3()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        stamps = list(pool.map(lambda n: w3.eth.get_block(int(n))["timestamp"], unique))
+    return (np.array(stamps, dtype=np.int64) // 3600)[inverse]
+
+
+def voter_attribute(users, voters: list, field: str) -> tuple:
+    """
+    Join users[field] onto voting wallets. Returns (groups, code) where code[v]
+    indexes groups for voters[v]; unlinked wallets fall in the None group.
+    """
+    labels = {}
+    for u in users.find(
+        {"$or": [{"wallet_address": {"$in": voters}}, {"custodial_address": {"$in": voters}}]},
+        {"wallet_address": 1, "custodial_address": 1, field: 1},
+    ):
+        for key in ("wallet_address", "custodial_address"):
+            if u.get(key):
+                labels[u[key].lower()] = u.get(field)
+    group_index = {}
+    code = np.array([group_index.setdefault(labels.get(w), len(group_index)) for w in voters], dtype=np.int32)
+    return list(group_index), code
+
+
+# ─── Engine ───────────────────────────────────────────────────────────────────
+class TallyEngine:
+    """Recount over selection arrays against the contract's candidate list."""
+
+    def __init__(self, candidates: list, voter: np.ndarray, candidate_ids: np.ndarray, hours: np.ndarray = None):
+        self.candidates = candidates
+        ids = np.array([c["id"] for c in candidates], dtype=np.int64)
+
+        # Candidate id -> column; ids the contract never issued map to -1 and are dropped
+        lookup = np.full(int(ids.max(initial=0)) + 1, -1, dtype=np.int64)
+        lookup[ids] = np.arange(len(ids))
+        in_range = (candidate_ids >= 0) & (candidate_ids < len(lookup))
+        column = np.full(len(candidate_ids), -1, dtype=np.int64)
+        column[in_range] = lookup[candidate_ids[in_range]]
+        valid = column >= 0
+
+        self.unknown_selections = int((~valid).sum())
+        self.column = column[valid]
+        self.voter = voter[valid]
+        self.hours = hours[valid] if hours is not None else None
+        position_index = {}
+        self.candidate_position = np.array(
+            [position_index.setdefault(c["position"], len(position_index)) for c in candidates], dtype=np.int64
+        )
+        self.positions = list(position_index)
+        self.voters = None
+
+    @classmethod
+    def from_chain(cls, contract_address: str, hourly: bool = False) -> "TallyEngine":
+        selections = load_selections(contract_address)
+        hours = block_hours(selections["block_number"]) if hourly else None
+        engine = cls(blockchain.get_candidates(contract_address), selections["voter"], selections["candidate_id"], hours)
+        engine.voters = selections["voters"]
+        return engine
+
+    # ─── Tallies ──────────────────────────────────────────────────────────────
+    def candidate_tallies(self) -> np.ndarray:
+        return np.bincount(self.column, minlength=len(self.candidates))
+
+    def ballot_count(self) -> int:
+        """Distinct voters with at least one counted selection (one ballot each per contract)."""
+        return int(np.count_nonzero(np.bincount(self.voter)))
+
+    def position_tallies(self) -> dict:
+        """{position: {"selections", "ballots"}}; ballots counts distinct voters who chose someone there."""
+        position = self.candidate_position[self.column]
+        selections = np.bincount(position, minlength=len(self.positions))
+        # Distinct (position, voter) pairs
+        stride = np.int64(self.voter.max(initial=0)) + 1
+        pairs = np.unique(position * stride + self.voter)
+        ballots = np.bincount(pairs // stride, minlength=len(self.positions))
+        return {
+            pos: {"selections": int(selections[i]), "ballots": int(ballots[i])}
+            for i, pos in enumerate(self.positions)
+        }
+
+    def ties(self, tallies: np.ndarray = None) -> dict:
+        """{position: [tied candidate ids]} for positions whose non-zero top count is shared."""
+        tallies = self.candidate_tallies() if tallies is None else tallies
+        top = np.zeros(len(self.positions), dtype=np.int64)
+        np.maximum.at(top, self.candidate_position, tallies)
+        at_top = (tallies == top[self.candidate_position]) & (tallies > 0)
+        shared = np.bincount(self.candidate_position[at_top], minlength=len(self.positions)) > 1
+        return {
+            pos: [self.candidates[j]["id"] for j in np.flatnonzero(at_top & (self.candidate_position == i))]
+            for i, pos in enumerate(self.positions) if shared[i]
+        }
+
+    def crosstab(self, groups: list, voter_group: np.ndarray) -> tuple:
+        """
+        Candidate counts per voter group, e.g. from voter_attribute().
+        voter_group[v] indexes groups for voter code v. Returns (groups, counts)
+        with counts[g, j] = votes for candidate j from group g.
+        """
+        n = len(self.candidates)
+        codes = voter_group[self.voter].astype(np.int64)
+        counts = np.bincount(codes * n + self.column, minlength=len(groups) * n).reshape(len(groups), n)
+        return groups, counts
+
+    def hourly(self) -> tuple:
+        """(hour buckets, counts[h, j]) by the hour each selection was mined. Needs hours."""
+        if self.hours is None:
+            raise ValueError("TallyEngine was built without block hours")
+        hours, codes = np.unique(self.hours, return_inverse=True)
+        codes = codes.reshape(-1)
+        n = len(self.candidates)
+        return hours, np.bincount(codes * n + self.column, minlength=len(hours) * n).reshape(len(hours), n)
+
+    # ─── Output ───────────────────────────────────────────────────────────────
+    def verify(self, total_votes: int) -> dict:
+        """Compare the recount with the contract's vote_count per candidate and totalVotes."""
+        tallies = self.candidate_tallies()
+        mismatches = [
+            {"id": c["id"], "on_chain": c["vote_count"], "recount": int(tallies[j])}
+            for j, c in enumerate(self.candidates) if int(tallies[j]) != c["vote_count"]
+        ]
+        return {
+            "matches": not mismatches and self.ballot_count() == total_votes and not self.unknown_selections,
+            "candidate_mismatches": mismatches,
+            "total_votes_on_chain": total_votes,
+            "ballots_recounted": self.ballot_count(),
+            "unknown_selections": self.unknown_selections,
+        }
+
+    def results(self, voting_open: bool) -> dict:
+        """Results payload in the shape of blockchain.get_results(), from the recount."""
+        tallies = self.candidate_tallies()
+        candidates = [{**c, "vote_count": int(tallies[j])} for j, c in enumerate(self.candidates)]
+        return blockchain.summarize_results(voting_open, self.ballot_count(), candidates)
+
+    def breakdown(self, groups: np.ndarray, counts: np.ndarray) -> list:
+        """crosstab()/hourly() output as [{"group", "total", "candidates": [{id, name, position, vote_count}]}]."""
+        return [
+            {
+                "group": g,
+                "total": int(row.sum()),
+                "candidates": [
+                    {"id": c["id"], "name": c["name"], "position": c["position"], "vote_count": int(row[j])}
+                    for j, c in enumerate(self.candidates)
+                ],
+            }
+            for g, row in zip(groups, counts)
+        ]
+
+
+def recount(db, contract_address: str, by: str = None, hourly: bool = False) -> dict:
+    """Recount one contract from its logs, checked against the on-chain counters."""
+    engine = TallyEngine.from_chain(contract_address, hourly=hourly)
+    status = blockchain.get_status(contract_address)
+    out = {
+        "results": engine.results(status["voting_open"]),
+        "positions": engine.position_tallies(),
+        "ties": engine.ties(),
+        "verification": engine.verify(status["total_votes"]),
+    }
+    if by:
+        out["by"] = by
+        out["breakdown"] = engine.breakdown(*engine.crosstab(*voter_attribute(db["users"], engine.voters, by)))
+    if hourly:
+        hours, counts = engine.hourly()
+        out["hourly"] = engine.breakdown(
+            [datetime.datetime.utcfromtimestamp(int(h) * 3600).isoformat() + "Z" for h in hours], counts
+        )
+    return out
+
+
+if __name__ == "__main__":
+    from pymongo import MongoClient
+
+    database = MongoClient(os.getenv("MONGO_URI"))[os.getenv("DB_NAME")]
+
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    field = None
+    if "--by" in sys.argv:
+        field = sys.argv[sys.argv.index("--by") + 1]
+        args = [a for a in args if a != field]
+    election_id = args[0] if args else "default"
+
+    key = "active_contract" if election_id == "default" else f"election:{election_id}"
+    config = database["blockchain_config"].find_one({"key": key})
+    if not config:
+        print(f"❌ No contract registered under {key} in blockchain_config")
+        sys.exit(1)
+
+    report = recount(database, config["address"], by=field, hourly="--hourly" in sys.argv)
+    check = report["verification"]
+    print(f"Election {election_id} ({config['address']}): {check['ballots_recounted']} ballots recounted, "
+          f"{check['total_votes_on_chain']} on chain – {'✅ match' if check['matches'] else '❌ MISMATCH'}")
+    for mismatch in check["candidate_mismatches"]:
+        print(f"  candidate {mismatch['id']}: on chain {mismatch['on_chain']}, recount {mismatch['recount']}")
+    for pos in report["results"]["results_by_position"]:
+        print(f"  {pos['position']}" + ("  (tie)" if pos["position"] in report["ties"] else ""))
+        for c in pos["candidates"]:
+            print(f"      {c['name']:<30} {c['vote_count']:>8}")
+    for row in report.get("breakdown", []) + report.get("hourly", []):
+        print(f"  {row['group'] or '(unknown)'}: {row['total']} selections")
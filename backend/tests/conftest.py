@@ -0,0 +1,66 @@
+"""
+Shared fixtures. Contracts run on an in-process eth-tester chain
+(GANACHE_URL=tester://) and MongoDB is mongomock, so no node or server is
+needed; tests that need a missing package are skipped.
+
+    pip install -r requirements.txt -r requirements-dev.txt
+    python -m pytest
+"""
+
+import os
+import sys
+
+import pytest
+
+# Read at import by the backend modules, so set before any of them is imported
+os.environ.update({
+    "GANACHE_URL": "tester://",
+    "TESTER_ACCOUNTS": "10",
+    "SIGNATURE_WORKERS": "0",
+    "WALLET_MNEMONIC": "",
+    "ADMIN_PRIVATE_KEY": "",
+    "VIEW_CACHE_BLOCK_TTL": "0",
+    "MONGO_URI": "mongodb://localhost:27017",
+    "DB_NAME": "electra_test",
+    "JWT_SECRET": "test-secret",
+    "VOTE_SUBMISSION_MODE": "sync",
+    "RESULTS_SOURCE": "chain",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CANDIDATES = [
+    {"name": "Asha", "position": "Chairman", "symbol": "Lamp"},
+    {"name": "Bala", "position": "Chairman", "symbol": "Star"},
+    {"name": "Chitra", "position": "Secretary", "symbol": "Tree"},
+]
+
+
+@pytest.fixture(scope="session")
+def chain():
+    """The blockchain module on the tester chain, with Election compiled."""
+    pytest.importorskip("eth_tester")
+    pytest.importorskip("web3")
+    import blockchain
+    try:
+        blockchain.build_artifact("Election")
+    except Exception as e:
+        pytest.skip(f"Election.sol could not be compiled: {e}")
+    return blockchain
+
+
+@pytest.fixture
+def election(chain):
+    """A new Election contract holding CANDIDATES (voting still closed)."""
+    address = chain.deploy_contract("Election")["contract_address"]
+    results = chain.add_candidates_batch(address, CANDIDATES)
+    assert [r["candidate_id"] for r in results] == [1, 2, 3]
+    return address
+
+
+@pytest.fixture
+def db():
+    """An empty mongomock database."""
+    mongomock = pytest.importorskip("mongomock")
+    client = mongomock.MongoClient()
+    client.drop_database("electra_test")
+    return client["electra_test"]
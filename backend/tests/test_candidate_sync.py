@@ -0,0 +1,119 @@
+import datetime
+
+import pytest
+
+from conftest import CANDIDATES
+
+
+@pytest.fixture
+def candidate_sync(chain):
+    pytest.importorskip("dotenv")
+    import candidate_sync
+    return candidate_sync
+
+
+@pytest.fixture
+def config(chain, db, candidate_sync):
+    """A freshly deployed, empty election with CANDIDATES approved."""
+    address = chain.deploy_contract("Election")["contract_address"]
+    cfg = {"_id": "election:e1", "key": "election:e1", "address": address,
+           "deployment_id": "d1", "election_id": "e1"}
+    db.blockchain_config.insert_one(dict(cfg))
+    candidate_sync.ensure_indexes(db.candidate_sync)
+    start = datetime.datetime(2026, 1, 1)
+    db.candidate_applications.insert_many([
+        {"full_name": c["name"], "position": c["position"], "symbol": c["symbol"],
+         "status": "Approved", "applied_at": start + datetime.timedelta(minutes=i)}
+        for i, c in enumerate(CANDIDATES)
+    ])
+    return cfg
+
+
+def _on_chain(chain, address):
+    return [(c["id"], c["name"]) for c in chain.get_candidates(address)]
+
+
+EXPECTED = [(1, "Asha"), (2, "Bala"), (3, "Chitra")]
+
+
+def _crash(monkeypatch, chain, name, after_real_call):
+    """Make blockchain.<name> raise, after doing its work if after_real_call."""
+    real = getattr(chain, name)
+
+    def crashing(*args, **kwargs):
+        if after_real_call:
+            real(*args, **kwargs)
+        raise RuntimeError("worker died")
+
+    monkeypatch.setattr(chain, name, crashing)
+
+
+def test_full_run_confirms_every_candidate(chain, db, config, candidate_sync):
+    summary = candidate_sync.CandidateSync(db, config).run()
+    assert summary["confirmed"] == 3
+    assert _on_chain(chain, config["address"]) == EXPECTED
+    for app, (cid, _) in zip(db.candidate_applications.find().sort("applied_at", 1), EXPECTED):
+        assert app["onchain"] == [{"contract": config["address"], "candidate_id": cid}]
+
+    again = candidate_sync.CandidateSync(db, config).run()
+    assert (again["confirmed"], again["already_synced"]) == (0, 3)
+    assert _on_chain(chain, config["address"]) == EXPECTED
+
+
+def test_resume_matches_pending_entries_from_logs(chain, db, config, candidate_sync, monkeypatch):
+    # Sent, but the run died before the tx hashes were journaled
+    _crash(monkeypatch, chain, "submit_candidates", after_real_call=True)
+    sync = candidate_sync.CandidateSync(db, config)
+    with pytest.raises(RuntimeError):
+        sync.run()
+    monkeypatch.undo()
+    assert sync.status()["pending"] == 3
+
+    summary = sync.run()
+    assert summary["already_synced"] == 3
+    assert sync.status() == {"pending": 0, "sent": 0, "confirmed": 3, "failed": 0}
+    assert _on_chain(chain, config["address"]) == EXPECTED
+
+
+def test_resume_confirms_sent_entries_from_receipts(chain, db, config, candidate_sync, monkeypatch):
+    _crash(monkeypatch, chain, "confirm_candidates", after_real_call=False)
+    sync = candidate_sync.CandidateSync(db, config)
+    with pytest.raises(RuntimeError):
+        sync.run()
+    monkeypatch.undo()
+    assert sync.status()["sent"] == 3
+
+    sync.run()
+    assert sync.status()["confirmed"] == 3
+    assert _on_chain(chain, config["address"]) == EXPECTED
+
+
+def test_unsent_pending_entries_are_sent_again(chain, db, config, candidate_sync, monkeypatch):
+    _crash(monkeypatch, chain, "submit_candidates", after_real_call=False)
+    sync = candidate_sync.CandidateSync(db, config)
+    with pytest.raises(RuntimeError):
+        sync.run()
+    monkeypatch.undo()
+
+    summary = sync.run()
+    assert summary["confirmed"] == 3
+    assert _on_chain(chain, config["address"]) == EXPECTED
+
+
+def test_new_deployment_starts_a_new_journal(chain, db, config, candidate_sync):
+    candidate_sync.CandidateSync(db, config).run()
+    redeployed = candidate_sync.CandidateSync(db, {**config, "deployment_id": "d2"})
+    assert redeployed.status() == {"pending": 0, "sent": 0, "confirmed": 0, "failed": 0}
+
+    # The contract at the address already holds the candidates: adopted, not added again
+    summary = redeployed.run()
+    assert (summary["confirmed"], summary["already_synced"]) == (0, 3)
+    assert _on_chain(chain, config["address"]) == EXPECTED
+
+
+def test_concurrent_run_is_refused(db, config, candidate_sync):
+    db.blockchain_config.update_one({"_id": config["_id"]}, {"$set": {"candidate_sync_lease": {
+        "owner": "other", "expires_at": datetime.datetime.utcnow() + datetime.timedelta(minutes=5),
+    }}})
+    with pytest.raises(candidate_sync.SyncInProgress):
+        candidate_sync.CandidateSync(db, config).run()
@@ -0,0 +1,130 @@
+import datetime
+import os
+
+import pytest
+
+
+@pytest.fixture
+def ledger():
+    pytest.importorskip("eth_abi")
+    pytest.importorskip("pymongo")
+    pytest.importorskip("web3")
+    import ledger
+    return ledger
+
+
+def _leaves(ledger, n):
+    return [
+        ledger.leaf_hash("0x" + os.urandom(20).hex(), [3, 1], os.urandom(16).hex())
+        for _ in range(n)
+    ]
+
+
+def _record(ledger, db, address, n):
+    return [
+        ledger.record_ballot(
+            db.votes, address, f"voter-{i}", "0x" + os.urandom(20).hex(), [3, 1],
+            os.urandom(16).hex(), "0x", election_id="e1",
+        )
+        for i in range(n)
+    ]
+
+
+def _seal(ledger, anchorer, address, expired=True):
+    """Seal the waiting ballots the way anchor_once does, without sending anything."""
+    batch_id, entries = anchorer._claim(force=True)
+    root, _ = ledger.build_tree([bytes.fromhex(e["leaf"][2:]) for e in entries])
+    batch = {
+        "batch_id": batch_id, "contract": address, "root": "0x" + root.hex(), "size": len(entries),
+        "status": "anchoring", "tx_hash": None, "from_block": 0,
+        "lease_until": datetime.datetime.utcnow() - datetime.timedelta(seconds=1 if expired else -300),
+        "created_at": datetime.datetime.utcnow(),
+    }
+    anchorer.batches.insert_one(batch)
+    return batch
+
+
+def _anchored_count(chain, address):
+    return chain._get_contract(address).functions.anchoredBallots().call()
+
+
+@pytest.mark.parametrize("n", range(1, 10))
+def test_every_leaf_proves_against_the_root(ledger, n):
+    leaves = _leaves(ledger, n)
+    root, proofs = ledger.build_tree(leaves)
+    assert all(ledger.verify_proof(leaf, proof, root) for leaf, proof in zip(leaves, proofs))
+    # A proof does not carry over to another leaf
+    assert not ledger.verify_proof(_leaves(ledger, 1)[0], proofs[0], root)
+
+
+def test_empty_tree_is_rejected(ledger):
+    with pytest.raises(ValueError):
+        ledger.build_tree([])
+
+
+def test_anchored_proofs_verify_on_chain(chain, election, db, ledger):
+    _record(ledger, db, election, 5)
+    anchorer = ledger.LedgerAnchorer(db.votes, db.ledger_batches)
+    assert anchorer.anchor_once(force=True) == 5
+
+    batch = db.ledger_batches.find_one()
+    assert batch["status"] == "anchored"
+    assert _anchored_count(chain, election) == 5
+    for entry in db.votes.find():
+        assert entry["status"] == "confirmed"
+        proof = [bytes.fromhex(p[2:]) for p in entry["proof"]]
+        assert ledger.verify_proof(bytes.fromhex(entry["leaf"][2:]), proof, bytes.fromhex(batch["root"][2:]))
+        assert chain.verify_ballot_proof(election, entry["batch_index"], entry["leaf"], entry["proof"])
+
+    proof = ledger.get_inclusion_proof(db.votes, db.ledger_batches, "voter-0", election)
+    assert proof["anchored"] and proof["root"] == batch["root"]
+
+
+def test_recovery_settles_a_sent_batch_without_anchoring_it_again(chain, election, db, ledger):
+    _record(ledger, db, election, 3)
+    anchorer = ledger.LedgerAnchorer(db.votes, db.ledger_batches)
+    batch = _seal(ledger, anchorer, election)
+    # The previous anchorer sent the root and saved the hash, then died
+    tx_hash = chain.send_ballot_root(election, batch["root"], batch["size"])
+    db.ledger_batches.update_one({"batch_id": batch["batch_id"]}, {"$set": {"tx_hash": tx_hash}})
+    chain.wait_for_receipts([tx_hash])
+
+    assert anchorer.anchor_once(force=True) == 3
+    assert _anchored_count(chain, election) == 3
+    assert db.ledger_batches.count_documents({}) == 1
+    assert db.ledger_batches.find_one()["status"] == "anchored"
+    assert db.votes.count_documents({"status": "confirmed", "tx_hash": tx_hash}) == 3
+
+
+def test_recovery_finds_a_root_sent_before_its_hash_was_saved(chain, election, db, ledger):
+    _record(ledger, db, election, 2)
+    anchorer = ledger.LedgerAnchorer(db.votes, db.ledger_batches)
+    batch = _seal(ledger, anchorer, election)
+    chain.wait_for_receipts([chain.send_ballot_root(election, batch["root"], batch["size"])])
+
+    assert anchorer.recover_once() == 2
+    assert _anchored_count(chain, election) == 2
+    assert db.votes.count_documents({"status": "confirmed"}) == 2
+
+
+def test_recovery_releases_a_root_that_was_never_sent(chain, election, db, ledger):
+    _record(ledger, db, election, 2)
+    anchorer = ledger.LedgerAnchorer(db.votes, db.ledger_batches)
+    batch = _seal(ledger, anchorer, election)
+
+    assert anchorer.recover_once() == 0
+    assert db.ledger_batches.find_one({"batch_id": batch["batch_id"]})["status"] == "failed"
+    assert db.votes.count_documents({"status": "recorded", "batch_id": None}) == 2
+    # Released ballots are sealed into a new batch and anchored once
+    assert anchorer.anchor_once(force=True) == 2
+    assert _anchored_count(chain, election) == 2
+
+
+def test_unexpired_lease_is_left_alone(chain, election, db, ledger):
+    _record(ledger, db, election, 1)
+    anchorer = ledger.LedgerAnchorer(db.votes, db.ledger_batches)
+    _seal(ledger, anchorer, election, expired=False)
+
+    assert anchorer.anchor_once(force=True) == 0
+    assert db.ledger_batches.find_one()["status"] == "anchoring"
+    assert _anchored_count(chain, election) == 0
@@ -0,0 +1,65 @@
+import pytest
+
+
+@pytest.fixture
+def sender(chain):
+    """A node account nothing else in the suite sends from."""
+    return chain.get_web3().eth.accounts[-1]
+
+
+def _transfer(chain, sender, nonce=None):
+    w3 = chain.get_web3()
+    tx = {"from": sender, "to": w3.eth.accounts[0], "value": 1, "gas": 21_000}
+    if nonce is not None:
+        tx["nonce"] = nonce
+    return w3.eth.send_transaction(tx)
+
+
+def test_reservations_are_consecutive_from_the_chain_count(chain, sender):
+    nonces = chain._NonceManager()
+    start = chain.get_web3().eth.get_transaction_count(sender, "pending")
+    reserved = [nonces.reserve(sender) for _ in range(3)]
+    for _ in reserved:
+        nonces.release(sender)
+    assert reserved == [start, start + 1, start + 2]
+
+
+def test_resync_rereads_the_node_after_an_outside_send(chain, sender):
+    nonces = chain._NonceManager()
+    first = nonces.reserve(sender)
+    _transfer(chain, sender, nonce=first)
+    nonces.release(sender)
+    # Sent behind the manager's back: its local counter is now one behind the node
+    _transfer(chain, sender)
+
+    nonces.resync(sender)
+    nonce = nonces.reserve(sender)
+    nonces.release(sender)
+    assert nonce == chain.get_web3().eth.get_transaction_count(sender, "pending")
+    assert nonce == first + 2
+
+
+def test_no_reread_while_a_reserved_nonce_is_being_sent(chain, sender):
+    nonces = chain._NonceManager()
+    first = nonces.reserve(sender)
+    nonces.resync(sender)
+    # The node does not know about `first` yet; re-reading now would hand it out again
+    second = nonces.reserve(sender)
+    nonces.release(sender)
+    nonces.release(sender)
+    assert second == first + 1
+
+
+def test_failed_send_resyncs_and_releases(chain, sender, monkeypatch):
+    nonces = chain._NonceManager()
+    monkeypatch.setattr(chain, "_nonces", nonces)
+    start = chain.get_web3().eth.get_transaction_count(sender, "pending")
+
+    def fail(nonce):
+        raise ValueError("rejected")
+
+    with pytest.raises(ValueError):
+        chain._send_with_nonce(sender, fail)
+    # The failed nonce is not skipped: the counter was re-read from the node
+    tx_hash = chain._send_with_nonce(sender, lambda nonce: _transfer(chain, sender, nonce))
+    assert chain.get_web3().eth.get_transaction(tx_hash)["nonce"] == start
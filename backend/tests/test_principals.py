@@ -0,0 +1,113 @@
+import pytest
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def principals(monkeypatch):
+    pytest.importorskip("bson")
+    import principals
+    clock = _Clock()
+    monkeypatch.setattr(principals, "time", clock)
+    principals.clock = clock
+    return principals
+
+
+@pytest.fixture
+def users(db):
+    ids = db.users.insert_many([
+        {"name": f"Voter {i}", "voter_id": f"V{i}", "user_type": "voter", "password": "hash"}
+        for i in range(3)
+    ]).inserted_ids
+    return db.users, ids
+
+
+def test_repeat_lookups_hit_the_cache(principals, users):
+    collection, ids = users
+    cache = principals.PrincipalCache(collection, ttl=30, size=10)
+    first = cache.get(ids[0])
+    assert first["voter_id"] == "V0"
+    assert "password" not in first
+    assert cache.get(str(ids[0])) == first
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+    # Callers get copies; mutating one does not leak into the cache
+    first["name"] = "changed"
+    assert cache.get(ids[0])["name"] == "Voter 0"
+
+
+def test_unknown_and_malformed_ids(principals, users):
+    collection, _ = users
+    cache = principals.PrincipalCache(collection, ttl=30, size=10)
+    assert cache.get("0" * 24) is None
+    assert cache.get("not-an-id") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_by_user_id(principals, users):
+    collection, ids = users
+    cache = principals.PrincipalCache(collection, ttl=30, size=10)
+    cache.get(ids[0])
+    collection.update_one({"_id": ids[0]}, {"$set": {"name": "Renamed"}})
+    assert cache.get(ids[0])["name"] == "Voter 0"
+
+    cache.invalidate(user_id=ids[0])
+    assert cache.get(ids[0])["name"] == "Renamed"
+
+
+def test_invalidate_by_voter_id(principals, users):
+    collection, ids = users
+    cache = principals.PrincipalCache(collection, ttl=30, size=10)
+    cache.get(ids[1])
+    collection.update_one({"_id": ids[1]}, {"$set": {"wallet_address": "0xabc"}})
+
+    cache.invalidate(voter_id="V1")
+    assert cache.get(ids[1])["wallet_address"] == "0xabc"
+    # A deleted user is gone as soon as its entry is dropped
+    collection.delete_one({"_id": ids[1]})
+    cache.invalidate(voter_id="V1")
+    assert cache.get(ids[1]) is None
+
+
+def test_entries_expire_after_ttl(principals, users):
+    collection, ids = users
+    cache = principals.PrincipalCache(collection, ttl=30, size=10)
+    cache.get(ids[0])
+    collection.update_one({"_id": ids[0]}, {"$set": {"name": "Renamed"}})
+
+    principals.clock.now += 29
+    assert cache.get(ids[0])["name"] == "Voter 0"
+    principals.clock.now += 2
+    assert cache.get(ids[0])["name"] == "Renamed"
+
+
+def test_least_recently_used_entry_is_evicted(principals, users):
+    collection, ids = users
+    cache = principals.PrincipalCache(collection, ttl=30, size=2)
+    cache.get(ids[0])
+    cache.get(ids[1])
+    cache.get(ids[0])
+    cache.get(ids[2])
+    assert cache.stats()["entries"] == 2
+
+    misses = cache.misses
+    cache.get(ids[0])
+    assert cache.misses == misses
+    cache.get(ids[1])
+    assert cache.misses == misses + 1
+    # Re-fetching ids[1] evicted ids[2]; its voter_id no longer maps to a cached user
+    cache.invalidate(voter_id="V2")
+    assert cache.stats()["entries"] == 2
+
+
+def test_zero_ttl_disables_the_cache(principals, users):
+    collection, ids = users
+    cache = principals.PrincipalCache(collection, ttl=0, size=10)
+    cache.get(ids[0])
+    cache.get(ids[0])
+    assert cache.stats() == {"entries": 0, "hits": 0, "misses": 2}
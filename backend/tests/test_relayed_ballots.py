@@ -0,0 +1,67 @@
+import pytest
+
+BALLOT = [1, 3]  # one Chairman, one Secretary
+
+
+def _sign(data: dict, account) -> str:
+    from eth_account import Account
+    from web3 import Web3
+    from signatures import encode_typed_data
+    signed = Account.sign_message(encode_typed_data(full_message=data), account.key)
+    return Web3.to_hex(signed.signature)
+
+
+@pytest.fixture
+def voters():
+    from eth_account import Account
+    return [Account.create() for _ in range(3)]
+
+
+def test_typed_ballot_signature_is_bound_to_its_contract(chain, election, voters):
+    import signatures
+    other = chain.deploy_contract("Election")["contract_address"]
+    data = chain.ballot_typed_data(election, BALLOT)
+    signature = _sign(data, voters[0])
+
+    assert signatures.verify_signatures([
+        (data, signature, voters[0].address),
+        (data, signature, voters[1].address),
+        (chain.ballot_typed_data(other, BALLOT), signature, voters[0].address),
+        (chain.ballot_typed_data(election, [1, 2]), signature, voters[0].address),
+    ]) == [True, False, False, False]
+
+
+def test_cast_ballots_checks_signatures_on_chain(chain, election, voters):
+    assert chain.supports_relay(election)
+    chain.start_voting(election)
+    signature = _sign(chain.ballot_typed_data(election, BALLOT), voters[0])
+    ballots = [
+        {"voter": voters[0].address, "candidate_ids": BALLOT, "signature": signature},
+        # Another voter replaying the first voter's signature
+        {"voter": voters[1].address, "candidate_ids": BALLOT, "signature": signature},
+        # The same signed ballot relayed a second time
+        {"voter": voters[0].address, "candidate_ids": BALLOT, "signature": signature},
+    ]
+    tx_hash = chain.submit_ballot_batch(election, ballots)
+    assert chain.wait_for_receipts([tx_hash])[tx_hash]["status"] == 1
+
+    outcomes = chain.get_ballot_outcomes(election, tx_hash)
+    assert outcomes[voters[1].address.lower()] == {"accepted": False, "reason": "Invalid signature"}
+    # The duplicate's rejection is the later event, but the voter's ballot was counted once
+    assert chain.check_has_voted(election, voters[0].address)
+    assert not chain.check_has_voted(election, voters[1].address)
+    assert [c["vote_count"] for c in chain.get_candidates(election)] == [1, 0, 1]
+
+
+def test_cast_ballots_is_admin_only(chain, election, voters):
+    chain.start_voting(election)
+    signature = _sign(chain.ballot_typed_data(election, BALLOT), voters[0])
+    outsider = chain.get_web3().eth.accounts[5]
+    assert outsider.lower() != chain._admin_address().lower()
+
+    fn = chain._get_contract(election).functions.castBallots(
+        [voters[0].address], [BALLOT], [bytes.fromhex(signature[2:])],
+    )
+    with pytest.raises(Exception):
+        fn.transact({"from": outsider, "gas": 500_000})
+    assert not chain.check_has_voted(election, voters[0].address)
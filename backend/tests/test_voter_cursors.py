@@ -0,0 +1,92 @@
+import datetime
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def app_module():
+    pytest.importorskip("flask")
+    pytest.importorskip("web3")
+    mongomock = pytest.importorskip("mongomock")
+    import mongomock.gridfs
+    mongomock.gridfs.enable_gridfs_integration()
+    with mongomock.patch(servers=(("localhost", 27017),)):
+        import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    users = app_module.users
+    users.delete_many({})
+    app_module.principal_cache.clear()
+    admin_id = users.insert_one({"user_type": "admin", "email": "admin@example.com"}).inserted_id
+    token = app_module.generate_token(admin_id)
+    test_client = app_module.app.test_client()
+    test_client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return test_client
+
+
+def _add_voters(app_module):
+    """Ten voters: pairs sharing a created_at (to the millisecond), then three without one."""
+    base = datetime.datetime(2026, 1, 1)
+    docs = [
+        {"user_type": "voter", "voter_id": f"V{i}", "full_name": f"Voter {i}",
+         "branch_name": "CSE" if i % 2 else "ECE", "created_at": base + datetime.timedelta(minutes=i // 2)}
+        for i in range(7)
+    ]
+    docs += [{"user_type": "voter", "voter_id": f"V{i}", "full_name": f"Voter {i}"} for i in range(7, 10)]
+    app_module.users.insert_many(docs)
+    return docs
+
+
+def _expected_order(docs):
+    with_date = sorted((d for d in docs if "created_at" in d), key=lambda d: (d["created_at"], d["_id"]), reverse=True)
+    without = sorted((d for d in docs if "created_at" not in d), key=lambda d: d["_id"], reverse=True)
+    return [d["voter_id"] for d in with_date + without]
+
+
+def _pages(client, limit, **params):
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = {"limit": limit, **params}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/api/voters", query_string=query)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        seen += [v["voter_id"] for v in body["voters"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return seen, pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 10, 11])
+def test_pages_cover_every_voter_once_in_order(app_module, client, limit):
+    docs = _add_voters(app_module)
+    seen, pages = _pages(client, limit)
+    assert seen == _expected_order(docs)
+    assert pages == max(1, -(-len(docs) // limit))
+
+
+def test_cursor_pages_respect_filters(app_module, client):
+    docs = _add_voters(app_module)
+    seen, _ = _pages(client, 2, branch="CSE")
+    assert seen == _expected_order([d for d in docs if d.get("branch_name") == "CSE"])
+
+
+def test_cursor_round_trip(app_module):
+    from bson import ObjectId
+    oid = ObjectId()
+    created_at = datetime.datetime(2026, 3, 4, 5, 6, 7, 123000)
+    query = app_module._voter_cursor_query(app_module._encode_voter_cursor({"_id": oid, "created_at": created_at}))
+    assert {"created_at": created_at, "_id": {"$lt": oid}} in query["$or"]
+
+    query = app_module._voter_cursor_query(app_module._encode_voter_cursor({"_id": oid}))
+    assert query == {"created_at": None, "_id": {"$lt": oid}}
+
+
+def test_malformed_cursor_is_rejected(client):
+    response = client.get("/api/voters", query_string={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,327 @@
+"""
+vote_pipeline.py – Background confirmation of asynchronously submitted ballots.
+
+In async submission mode /api/blockchain/cast-vote sends the castBallot
+transaction, records the ballot as "pending" and returns immediately.
+ReceiptPoller then confirms pending hashes in batches and moves each
+`votes` record to "confirmed" or "failed". A hash still without a receipt
+PENDING_TX_TIMEOUT seconds after it was sent is looked up on the node: if
+the node no longer knows it (dropped, or replaced under the same nonce) the
+ballot fails, otherwise it is re-checked every PENDING_RECHECK_INTERVAL
+seconds outside the oldest-first window, so it cannot hold up newer ballots.
+
+In relayed mode the ballot is stored as "queued" with the voter's signature.
+BallotRelayer submits queued ballots in batches through castBallots (one
+transaction, many voters) and marks them "pending" under the batch tx hash;
+ReceiptPoller then settles each voter from that transaction's events. A
+claimed batch carries a claimed_at lease: ballots whose batch never got a tx
+hash within RELAY_CLAIM_TIMEOUT seconds (the relayer died mid-batch) are
+confirmed if the voter has voted on chain, and queued again otherwise. A
+batch that reverted or was dropped is queued again as well, since its
+voters' signatures are still good; ballots the contract rejects on their own
+(BallotRejected) fail, and so does a ballot on its RELAY_MAX_ATTEMPTS-th try.
+
+Ledger mode (see ledger.py) records ballots as "recorded" and confirms
+them once the Merkle root of their batch is anchored.
+"""
+
+import datetime
+import os
+import threading
+import time
+import uuid
+
+from pymongo import UpdateMany, UpdateOne
+
+import blockchain
+import signatures
+
+VOTE_QUEUED = "queued"
+VOTE_PENDING = "pending"
+VOTE_CONFIRMED = "confirmed"
+VOTE_FAILED = "failed"
+# Ledger mode: appended to the off-chain ledger, Merkle root not anchored yet
+VOTE_RECORDED = "recorded"
+
+PENDING_TX_TIMEOUT = float(os.getenv("PENDING_TX_TIMEOUT", 300))
+PENDING_RECHECK_INTERVAL = float(os.getenv("PENDING_RECHECK_INTERVAL", 60))
+# Longer than RECEIPT_TIMEOUT so a batch sent just before a crash is mined before its ballots are recovered
+RELAY_CLAIM_TIMEOUT = float(os.getenv("RELAY_CLAIM_TIMEOUT", 300))
+RELAY_MAX_ATTEMPTS = int(os.getenv("RELAY_MAX_ATTEMPTS", 3))
+
+
+def _requeue_updates(query: dict, error: str, max_attempts: int, now) -> list:
+    """Updates that queue relayed ballots again, or fail those on their last attempt."""
+    last = max_attempts - 1
+    return [
+        UpdateMany({**query, "relay_attempts": {"$gte": last}}, {
+            "$set": {"status": VOTE_FAILED, "error": error, "confirmed_at": now},
+            "$unset": {"batch_id": "", "claimed_at": "", "recheck_at": ""},
+        }),
+        UpdateMany({**query, "relay_attempts": {"$not": {"$gte": last}}}, {
+            "$set": {"status": VOTE_QUEUED}, "$inc": {"relay_attempts": 1},
+            "$unset": {"batch_id": "", "tx_hash": "", "sent_at": "", "claimed_at": "", "recheck_at": ""},
+        }),
+    ]
+
+
+class ReceiptPoller:
+    """Daemon thread that resolves pending vote transactions in batches."""
+
+    def __init__(self, votes, interval: float = 1.0, batch_size: int = 200,
+                 pending_timeout: float = PENDING_TX_TIMEOUT, recheck_interval: float = PENDING_RECHECK_INTERVAL,
+                 max_relay_attempts: int = RELAY_MAX_ATTEMPTS):
+        self.votes = votes
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pending_timeout = pending_timeout
+        self.recheck_interval = recheck_interval
+        self.max_relay_attempts = max_relay_attempts
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the poller thread once per process."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="receipt-poller", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                resolved = self.poll_once()
+            except Exception as e:
+                print(f"[vote_pipeline] receipt poll failed: {e}")
+                resolved = 0
+            # Drain a backlog without sleeping; otherwise wait for the next block
+            if resolved < self.batch_size:
+                blockchain.wait_for_new_block(self.interval)
+
+    def poll_once(self) -> int:
+        """Resolve up to batch_size pending ballots. Returns how many were settled or set aside."""
+        now = datetime.datetime.utcnow()
+        pending = list(
+            # Relayed ballots are pending without a tx_hash until their batch has been sent
+            self.votes.find(
+                {"status": VOTE_PENDING, "tx_hash": {"$ne": None},
+                 "$or": [{"recheck_at": None}, {"recheck_at": {"$lte": now}}]},
+                {"tx_hash": 1, "batch_id": 1, "contract_address": 1, "timestamp": 1, "sent_at": 1},
+            )
+            .sort("timestamp", 1)
+            .limit(self.batch_size)
+        )
+        if not pending:
+            return 0
+
+        statuses = blockchain.get_receipt_statuses(list({v["tx_hash"] for v in pending}))
+        relayed = {v["tx_hash"]: v.get("contract_address") for v in pending if v.get("batch_id")}
+
+        ops = []
+        for tx_hash, receipt in statuses.items():
+            if tx_hash in relayed:
+                if receipt["status"] == 1:
+                    ops.extend(self._relayed_updates(relayed[tx_hash], tx_hash, receipt, now))
+                else:
+                    # The whole batch reverted; each voter's ballot gets another batch
+                    print(f"[vote_pipeline] castBallots batch {tx_hash} reverted; requeueing its ballots")
+                    ops.extend(_requeue_updates({"tx_hash": tx_hash, "status": VOTE_PENDING},
+                                                "castBallots batch reverted", self.max_relay_attempts, now))
+                continue
+            ops.append(UpdateOne(
+                {"tx_hash": tx_hash, "status": VOTE_PENDING},
+                {"$set": {
+                    "status": VOTE_CONFIRMED if receipt["status"] == 1 else VOTE_FAILED,
+                    "block_number": receipt["block_number"],
+                    "confirmed_at": now,
+                }, "$unset": {"recheck_at": ""}},
+            ))
+
+        cutoff = now - datetime.timedelta(seconds=self.pending_timeout)
+        expired = list({
+            v["tx_hash"] for v in pending
+            if v["tx_hash"] not in statuses and (v.get("sent_at") or v["timestamp"]) <= cutoff
+        })
+        ops.extend(self._expired_updates(expired, set(relayed), now))
+
+        if ops:
+            self.votes.bulk_write(ops, ordered=False)
+        return len(statuses) + len(expired)
+
+    def _expired_updates(self, tx_hashes: list, relayed: set, now) -> list:
+        """Fail (or, for relayed batches, requeue) hashes the node dropped; push the rest out of the window."""
+        if not tx_hashes:
+            return []
+        known = blockchain.get_known_transactions(tx_hashes)
+        recheck_at = now + datetime.timedelta(seconds=self.recheck_interval)
+        ops = []
+        for tx_hash in tx_hashes:
+            if tx_hash in known:
+                ops.append(UpdateOne({"tx_hash": tx_hash, "status": VOTE_PENDING}, {"$set": {"recheck_at": recheck_at}}))
+                continue
+            print(f"[vote_pipeline] {tx_hash} was dropped or replaced")
+            if tx_hash in relayed:
+                # The voters' signatures are still good: the relayer sends them again in a new batch
+                ops.extend(_requeue_updates({"tx_hash": tx_hash, "status": VOTE_PENDING},
+                                            "Transaction dropped or replaced", self.max_relay_attempts, now))
+                continue
+            ops.append(UpdateMany({"tx_hash": tx_hash, "status": VOTE_PENDING}, {
+                "$set": {"status": VOTE_FAILED, "error": "Transaction dropped or replaced", "confirmed_at": now},
+                "$unset": {"recheck_at": ""},
+            }))
+        return ops
+
+    def _relayed_updates(self, contract_address, tx_hash, receipt, now) -> list:
+        """One update per voter in a castBallots batch, from its VoteCast/BallotRejected events."""
+        outcomes = blockchain.get_ballot_outcomes(contract_address, tx_hash)
+        ops = []
+        for v in self.votes.find({"tx_hash": tx_hash, "status": VOTE_PENDING}, {"voter_address": 1}):
+            outcome = outcomes.get((v.get("voter_address") or "").lower())
+            accepted = bool(outcome and outcome["accepted"])
+            update = {
+                "status": VOTE_CONFIRMED if accepted else VOTE_FAILED,
+                "block_number": receipt["block_number"],
+                "confirmed_at": now,
+            }
+            if not accepted:
+                update["error"] = outcome["reason"] if outcome else "Ballot missing from batch"
+            ops.append(UpdateOne({"_id": v["_id"], "status": VOTE_PENDING}, {"$set": update}))
+        return ops
+
+
+class BallotRelayer:
+    """Daemon thread that relays queued, voter-signed ballots in castBallots batches."""
+
+    def __init__(self, votes, interval: float = 1.0, batch_size: int = 25, max_attempts: int = RELAY_MAX_ATTEMPTS,
+                 claim_timeout: float = RELAY_CLAIM_TIMEOUT):
+        self.votes = votes
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.claim_timeout = claim_timeout
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the relayer thread once per process."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="ballot-relayer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                relayed = self.relay_once()
+            except Exception as e:
+                print(f"[vote_pipeline] relay failed: {e}")
+                relayed = 0
+            if relayed < self.batch_size:
+                time.sleep(self.interval)
+
+    def _claim(self) -> list:
+        """Atomically take up to batch_size queued ballots for this process."""
+        candidates = [
+            v["_id"] for v in self.votes.find({"status": VOTE_QUEUED}, {"_id": 1})
+            .sort("timestamp", 1).limit(self.batch_size)
+        ]
+        if not candidates:
+            return []
+        batch_id = uuid.uuid4().hex
+        self.votes.update_many(
+            {"_id": {"$in": candidates}, "status": VOTE_QUEUED},
+            {"$set": {"status": VOTE_PENDING, "batch_id": batch_id, "claimed_at": datetime.datetime.utcnow()}},
+        )
+        return list(self.votes.find({"batch_id": batch_id}))
+
+    def _requeue(self, ids: list, error: str):
+        """Queue claimed ballots for another attempt, or fail the ones that keep failing."""
+        self.votes.bulk_write(_requeue_updates(
+            {"_id": {"$in": ids}, "status": VOTE_PENDING}, error, self.max_attempts, datetime.datetime.utcnow()
+        ), ordered=False)
+
+    def recover_expired_claims(self) -> int:
+        """
+        Settle ballots claimed more than claim_timeout ago whose batch was never
+        recorded as sent: confirmed if the voter's ballot is on chain, requeued
+        otherwise. Returns how many were recovered.
+        """
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=self.claim_timeout)
+        stale = list(self.votes.find(
+            {"status": VOTE_PENDING, "batch_id": {"$ne": None}, "tx_hash": None,
+             "$or": [{"claimed_at": None}, {"claimed_at": {"$lte": cutoff}}]},
+            {"contract_address": 1, "voter_address": 1},
+        ).limit(self.batch_size))
+        if not stale:
+            return 0
+
+        voted, requeue = [], []
+        for v in stale:
+            try:
+                on_chain = blockchain.check_has_voted(v["contract_address"], v["voter_address"])
+            except Exception as e:
+                print(f"[vote_pipeline] hasVoted check for {v['voter_address']} failed: {e}")
+                continue
+            (voted if on_chain else requeue).append(v["_id"])
+
+        if voted:
+            # Mined in the lost batch; the tx hash is unknown but the ballot counts
+            self.votes.update_many(
+                {"_id": {"$in": voted}, "status": VOTE_PENDING, "tx_hash": None},
+                {"$set": {"status": VOTE_CONFIRMED, "confirmed_at": datetime.datetime.utcnow()},
+                 "$unset": {"claimed_at": ""}},
+            )
+        if requeue:
+            self._requeue(requeue, "Relay batch was never sent")
+        print(f"[vote_pipeline] recovered {len(voted)} on-chain and {len(requeue)} requeued ballots from stale claims")
+        return len(voted) + len(requeue)
+
+    def _drop_bad_signatures(self, batch: list) -> list:
+        """
+        Check the whole batch's signatures in one call to the worker pool and
+        fail the ones the contract would reject, so they cost no gas.
+        """
+        valid = signatures.verify_signatures([
+            (blockchain.ballot_typed_data(v["contract_address"], v["candidate_ids"]), v["signature"], v["voter_address"])
+            for v in batch
+        ])
+        bad = [v["_id"] for v, ok in zip(batch, valid) if not ok]
+        if bad:
+            self.votes.update_many(
+                {"_id": {"$in": bad}},
+                {"$set": {"status": VOTE_FAILED, "error": "Invalid signature"}, "$unset": {"batch_id": "", "claimed_at": ""}},
+            )
+        return [v for v, ok in zip(batch, valid) if ok]
+
+    def relay_once(self) -> int:
+        """Submit one batch. Returns how many ballots were relayed."""
+        self.recover_expired_claims()
+        claimed = self._claim()
+        if not claimed:
+            return 0
+
+        by_contract = {}
+        for v in claimed:
+            by_contract.setdefault(v["contract_address"], []).append(v)
+
+        for contract_address, batch in by_contract.items():
+            batch = self._drop_bad_signatures(batch)
+            if not batch:
+                continue
+            ids = [v["_id"] for v in batch]
+            try:
+                tx_hash = blockchain.submit_ballot_batch(contract_address, [
+                    {"voter": v["voter_address"], "candidate_ids": v["candidate_ids"], "signature": v["signature"]}
+                    for v in batch
+                ])
+            except Exception as e:
+                print(f"[vote_pipeline] castBallots batch of {len(batch)} failed: {e}")
+                self._requeue(ids, str(e))
+                continue
+            self.votes.update_many(
+                {"_id": {"$in": ids}},
+                {"$set": {"tx_hash": tx_hash, "batch_size": len(batch), "sent_at": datetime.datetime.utcnow()}},
+            )
+        return len(claimed)
@@ -0,0 +1,148 @@
+"""
+voted_set.py – In-process index of voters who have a ballot record.
+
+Has-voted checks in /api/blockchain/voter-status and /api/blockchain/cast-vote
+are answered from a bitmap per election (one bit per numeric voter id below
+VOTED_SET_CAPACITY; other ids go to a plain set) instead of a `votes` query.
+Each worker warms the bitmaps from `votes` at startup and then follows new
+records through a change stream, or, on a standalone mongod without change
+streams, by polling for _ids above the last one seen every
+VOTED_SET_REFRESH_INTERVAL seconds. Records written by this worker are added
+directly.
+
+Bits are only ever set, so a clear bit means "no record" (modulo the refresh
+lag, which the unique (election_id, voter_id) index on `votes` backs up) and
+a set bit means "has a record, possibly failed": callers then read the record
+itself, which they need for its status anyway.
+"""
+
+import datetime
+import os
+import threading
+import time
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+
+# Voter ids are 4-digit numbers; one bit each
+VOTED_SET_CAPACITY = int(os.getenv("VOTED_SET_CAPACITY", 10000))
+VOTED_SET_REFRESH_INTERVAL = float(os.getenv("VOTED_SET_REFRESH_INTERVAL", 1.0))
+# ObjectIds from several workers are only roughly ordered; polls re-read this far back
+POLL_OVERLAP = datetime.timedelta(seconds=10)
+
+DEFAULT_ELECTION_ID = "default"
+
+
+class VotedSet:
+    """Per-election voted bitmaps kept current by a daemon thread."""
+
+    def __init__(self, votes, capacity: int = VOTED_SET_CAPACITY, interval: float = VOTED_SET_REFRESH_INTERVAL):
+        self.votes = votes
+        self.capacity = capacity
+        self.interval = interval
+        self._bitmaps = {}   # election_id -> bytearray
+        self._others = {}    # election_id -> set of non-numeric / out-of-range ids
+        self._last_id = None
+        self._warm = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._bits_lock = threading.Lock()
+
+    def start(self):
+        """Warm from `votes` and start following new records, once per process."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="voted-set", daemon=True)
+            self._thread.start()
+
+    # ─── Membership ───────────────────────────────────────────────────────────
+    def add(self, election_id, voter_id):
+        election_id = election_id or DEFAULT_ELECTION_ID
+        key = str(voter_id)
+        with self._bits_lock:
+            if key.isdigit() and int(key) < self.capacity:
+                bitmap = self._bitmaps.get(election_id)
+                if bitmap is None:
+                    bitmap = self._bitmaps[election_id] = bytearray((self.capacity + 7) // 8)
+                n = int(key)
+                bitmap[n >> 3] |= 1 << (n & 7)
+            else:
+                self._others.setdefault(election_id, set()).add(key)
+
+    def may_have_voted(self, election_id, voter_id) -> bool:
+        """
+        False only if the voter has no ballot record in this election. Before
+        warm-up completes every answer is True, sending callers to MongoDB.
+        """
+        if not self._warm:
+            return True
+        election_id = election_id or DEFAULT_ELECTION_ID
+        key = str(voter_id)
+        if key.isdigit() and int(key) < self.capacity:
+            bitmap = self._bitmaps.get(election_id)
+            n = int(key)
+            return bitmap is not None and bool(bitmap[n >> 3] & (1 << (n & 7)))
+        return key in self._others.get(election_id, ())
+
+    # ─── Loading ──────────────────────────────────────────────────────────────
+    def _load(self, query: dict) -> int:
+        loaded = 0
+        for doc in self.votes.find(query, {"voter_id": 1, "election_id": 1}).sort("_id", 1):
+            if doc.get("voter_id"):
+                self.add(doc.get("election_id"), doc["voter_id"])
+            self._last_id = doc["_id"]
+            loaded += 1
+        return loaded
+
+    def _since_last(self) -> dict:
+        if self._last_id is None:
+            return {}
+        return {"_id": {"$gt": ObjectId.from_datetime(self._last_id.generation_time - POLL_OVERLAP)}}
+
+    def warm(self):
+        loaded = self._load({})
+        self._warm = True
+        print(f"[voted_set] warmed with {loaded} ballot records")
+
+    def _follow_changes(self):
+        """Apply inserts from a change stream; raises OperationFailure where change streams are unsupported."""
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        with self.votes.watch(pipeline) as stream:
+            # Records inserted between warm-up and opening the stream
+            self._load(self._since_last())
+            for change in stream:
+                doc = change.get("fullDocument") or {}
+                if doc.get("voter_id"):
+                    self.add(doc.get("election_id"), doc["voter_id"])
+
+    def _run(self):
+        while not self._warm:
+            try:
+                self.warm()
+            except Exception as e:
+                print(f"[voted_set] warm-up failed: {e!r}")
+                time.sleep(self.interval)
+
+        use_stream = True
+        while True:
+            if use_stream:
+                try:
+                    self._follow_changes()
+                except OperationFailure as e:
+                    # Standalone mongod: no change streams
+                    print(f"[voted_set] change stream unavailable ({e.code}), polling every {self.interval}s")
+                    use_stream = False
+                except PyMongoError as e:
+                    print(f"[voted_set] change stream interrupted: {e}")
+                    time.sleep(self.interval)
+                except Exception as e:
+                    # Anything else would end the thread and leave the set stale for good
+                    print(f"[voted_set] change stream failed: {e!r}; polling every {self.interval}s")
+                    use_stream = False
+                continue
+            try:
+                self._load(self._since_last())
+            except Exception as e:
+                print(f"[voted_set] refresh failed: {e!r}")
+            time.sleep(self.interval)
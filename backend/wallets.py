@@ -0,0 +1,149 @@
+"""
+wallets.py – Custodial HD-wallet accounts for voters and the admin.
+
+With WALLET_MNEMONIC set, every voter gets a deterministic account derived
+from the mnemonic and their voter_id, so each voter is a distinct on-chain
+address however many voters there are, and transactions are signed here and
+sent with eth_sendRawTransaction instead of relying on accounts unlocked on
+the node.
+
+    admin   m/44'/60'/0'/0/0 (Ganache's accounts[0] when started with the same
+            mnemonic), or ADMIN_PRIVATE_KEY if set
+    voter   m/44'/60'/1'/{a}/{b}, where a and b are two 31-bit halves of
+            sha256(voter_id); 62 bits keep 100k+ voters collision-free
+
+The BIP-39 seed is derived once per process and derived voter keys are kept in
+an LRU of WALLET_KEY_CACHE_SIZE. New voter accounts hold no ether: fund them in
+bulk from the admin with `python wallets.py --fund` (cast-vote also tops up an
+unfunded account on demand).
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from eth_account import Account
+from dotenv import load_dotenv
+from eth_account.hdaccount import key_from_seed, seed_from_mnemonic
+
+# Before the settings below are read (also when run as a script)
+load_dotenv()
+
+WALLET_MNEMONIC = os.getenv("WALLET_MNEMONIC", "")
+WALLET_PASSPHRASE = os.getenv("WALLET_PASSPHRASE", "")
+ADMIN_PRIVATE_KEY = os.getenv("ADMIN_PRIVATE_KEY", "")
+WALLET_KEY_CACHE_SIZE = int(os.getenv("WALLET_KEY_CACHE_SIZE", 10000))
+# Funding transfers sent per confirmation round by --fund
+WALLET_FUNDING_BATCH = int(os.getenv("WALLET_FUNDING_BATCH", 500))
+
+ADMIN_PATH = "m/44'/60'/0'/0/0"
+VOTER_PATH = "m/44'/60'/1'/{}/{}"
+
+_seed = None
+_admin = None
+_lock = threading.Lock()
+# voter_id -> LocalAccount
+_voter_accounts = OrderedDict()
+
+
+def enabled() -> bool:
+    """Whether voters get custodial accounts (WALLET_MNEMONIC is set)."""
+    return bool(WALLET_MNEMONIC)
+
+
+def _get_seed() -> bytes:
+    global _seed
+    if _seed is None:
+        with _lock:
+            if _seed is None:
+                # PBKDF2 with 2048 rounds: far too slow to repeat per voter
+                _seed = seed_from_mnemonic(WALLET_MNEMONIC, WALLET_PASSPHRASE)
+    return _seed
+
+
+def voter_path(voter_id: str) -> str:
+    digest = hashlib.sha256(str(voter_id).encode()).digest()
+    return VOTER_PATH.format(
+        int.from_bytes(digest[:4], "big") & 0x7FFFFFFF,
+        int.from_bytes(digest[4:8], "big") & 0x7FFFFFFF,
+    )
+
+
+def voter_account(voter_id: str):
+    """The voter's custodial LocalAccount. Requires WALLET_MNEMONIC."""
+    if not enabled():
+        raise RuntimeError("Custodial voter accounts need WALLET_MNEMONIC")
+    with _lock:
+        account = _voter_accounts.get(voter_id)
+        if account is not None:
+            _voter_accounts.move_to_end(voter_id)
+            return account
+
+    account = Account.from_key(key_from_seed(_get_seed(), voter_path(voter_id)))
+    with _lock:
+        _voter_accounts[voter_id] = account
+        while len(_voter_accounts) > WALLET_KEY_CACHE_SIZE:
+            _voter_accounts.popitem(last=False)
+    return account
+
+
+def voter_address(voter_id: str) -> str:
+    return voter_account(voter_id).address
+
+
+def admin_account():
+    """Locally held admin LocalAccount, or None to send admin transactions from the node's accounts[0]."""
+    global _admin
+    if _admin is None and (ADMIN_PRIVATE_KEY or enabled()):
+        with _lock:
+            if _admin is None:
+                key = ADMIN_PRIVATE_KEY or key_from_seed(_get_seed(), ADMIN_PATH)
+                _admin = Account.from_key(key)
+    return _admin
+
+
+def fund_registered_voters(users, batch_size: int = WALLET_FUNDING_BATCH) -> dict:
+    """
+    Derive the custodial account of every registered voter, record it as
+    users.custodial_address and fund the unfunded ones from the admin,
+    batch_size transfers per confirmation round.
+    """
+    import blockchain
+    from pymongo import UpdateOne
+
+    voters = list(users.find({"user_type": "voter"}, {"voter_id": 1, "custodial_address": 1}))
+    updates = []
+    addresses = []
+    for v in voters:
+        address = voter_address(v["voter_id"])
+        addresses.append(address)
+        if v.get("custodial_address") != address.lower():
+            updates.append(UpdateOne({"_id": v["_id"]}, {"$set": {"custodial_address": address.lower()}}))
+    if updates:
+        users.bulk_write(updates, ordered=False)
+
+    summary = {"voters": len(voters), "funded": 0, "already_funded": 0, "failed": 0}
+    for start in range(0, len(addresses), batch_size):
+        result = blockchain.fund_accounts(addresses[start:start + batch_size])
+        for k in ("funded", "already_funded", "failed"):
+            summary[k] += result[k]
+        print(f"[wallets] {min(start + batch_size, len(addresses))}/{len(addresses)} voters checked")
+    return summary
+
+
+if __name__ == "__main__":
+    from pymongo import MongoClient
+
+    if not enabled():
+        print("❌ Set WALLET_MNEMONIC to use custodial voter accounts")
+        sys.exit(1)
+    database = MongoClient(os.getenv("MONGO_URI"))[os.getenv("DB_NAME")]
+
+    if "--fund" in sys.argv:
+        print(fund_registered_voters(database["users"]))
+    else:
+        print(f"admin: {admin_account().address}")
+        for voter_id in [a for a in sys.argv[1:] if not a.startswith("--")]:
+            print(f"{voter_id}: {voter_address(voter_id)}  ({voter_path(voter_id)})")
@@ -7,4 +7,20 @@ const api = axios.create({
   },
 });
 
+// Follow /voters next_cursor pages and return every voter matching params
+export const fetchAllVoters = async (params = {}, token = localStorage.getItem("token")) => {
+  const voters = [];
+  let cursor = null;
+  do {
+    const res = await api.get("/voters", {
+      headers: { Authorization: `Bearer ${token}` },
+      params: { limit: 1000, ...params, ...(cursor ? { cursor } : {}) },
+    });
+    if (!res.data.success) return { success: false, message: res.data.message, voters };
+    voters.push(...(res.data.voters || []));
+    cursor = res.data.next_cursor;
+  } while (cursor);
+  return { success: true, voters };
+};
+
 export default api;
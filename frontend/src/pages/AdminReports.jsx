@@ -42,7 +42,10 @@ function AdminReports() {
   const openEdit = async (voterId) => {
     try {
       const token = localStorage.getItem("token");
-      const res = await api.get("/voters", { headers: { Authorization: `Bearer ${token}` } });
+      const res = await api.get("/voters", {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { voter_id: voterId, fields: "voter_id,full_name,address,email,phone_no,branch_name", limit: 1 },
+      });
       const voter = (res.data.voters || []).find(v => v.voter_id === voterId);
       if (voter) {
         setSelectedVoter(voter);
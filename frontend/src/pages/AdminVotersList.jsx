@@ -1,6 +1,6 @@
 import { useEffect, useMemo, useRef, useState } from "react";
 import { useNavigate } from "react-router-dom";
-import api from "../api";
+import api, { fetchAllVoters } from "../api";
 import "../styles/Voterdash.css";
 
 function AdminVotersList() {
@@ -54,14 +54,12 @@ function AdminVotersList() {
 
     try {
       const token = localStorage.getItem("token");
-      const res = await api.get("/voters", {
-        headers: { Authorization: `Bearer ${token}` },
-      });
+      const res = await fetchAllVoters({}, token);
 
-      if (res.data.success) {
-        setVoters(res.data.voters || []);
+      if (res.success) {
+        setVoters(res.voters);
       } else {
-        setMessage(res.data.message || "Failed to fetch voters list");
+        setMessage(res.message || "Failed to fetch voters list");
       }
     } catch (err) {
       setMessage(err.response?.data?.message || "Failed to fetch voters list");
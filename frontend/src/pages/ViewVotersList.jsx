@@ -1,6 +1,6 @@
 import { useState, useEffect, useMemo } from "react";
 import { useNavigate } from "react-router-dom";
-import api from "../api";
+import { fetchAllVoters } from "../api";
 import "../styles/Voterdash.css";
 
 function ViewVotersList() {
@@ -40,12 +40,10 @@ function ViewVotersList() {
   const fetchVoters = async () => {
     try {
       const token = localStorage.getItem("token");
-      const res = await api.get("/voters", {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      
-      if (res.data.success) {
-        setVoters(res.data.voters || []);
+      const res = await fetchAllVoters({ fields: "voter_id,full_name,address,date_of_birth" }, token);
+
+      if (res.success) {
+        setVoters(res.voters);
       }
     } catch (err) {
       setMessage(err.response?.data?.message || "Failed to fetch voters list");
@@ -3,6 +3,21 @@ import { useNavigate } from "react-router-dom";
 import api from "../api";
 import "../styles/Voterdash.css";
 
+// Accepted (202) ballots that are not on chain yet; voter-status is polled until they settle
+const UNSETTLED = ["queued", "pending", "recorded"];
+const SETTLE_POLL_MS = 2000;
+
+// Relayed ballots: EIP-712 types matching Election.sol's DOMAIN_TYPEHASH / BALLOT_TYPEHASH
+const BALLOT_TYPES = {
+    EIP712Domain: [
+        { name: "name", type: "string" },
+        { name: "version", type: "string" },
+        { name: "chainId", type: "uint256" },
+        { name: "verifyingContract", type: "address" },
+    ],
+    Ballot: [{ name: "candidateIds", type: "uint256[]" }],
+};
+
 const backendOrigin = String(api?.defaults?.baseURL || "").replace(/\/api\/?$/, "");
 
 const API = (path, opts = {}) => {
@@ -75,6 +90,29 @@ export default function VotingPage() {
 
     useEffect(() => { fetchData(); }, [fetchData]);
 
+    // Follow a 202-accepted ballot until the backend confirms or fails it
+    const unsettled = UNSETTLED.includes(success?.vote_status);
+    useEffect(() => {
+        if (!unsettled) return undefined;
+        const timer = setInterval(async () => {
+            try {
+                const res = await API("/blockchain/voter-status");
+                const vs = res.data;
+                if (!vs.success || vs.vote_status === success.vote_status) return;
+                if (vs.vote_status === "failed") {
+                    setSuccess(null);
+                    setVoterStatus(vs);
+                    setError(vs.error ? `Your ballot was not recorded: ${vs.error}. Please vote again.` : "Your ballot was not recorded. Please vote again.");
+                } else {
+                    setSuccess(prev => prev && { ...prev, vote_status: vs.vote_status, tx_hash: vs.tx_hash, block_number: vs.block_number });
+                }
+            } catch {
+                // Keep polling; the ballot is already accepted
+            }
+        }, SETTLE_POLL_MS);
+        return () => clearInterval(timer);
+    }, [unsettled, success?.vote_status]);
+
     const handleSelect = (pos, cid) => {
         setSelections(prev => ({ ...prev, [pos]: cid }));
     };
@@ -104,20 +142,38 @@ export default function VotingPage() {
             // Standardize format to avoid space/mismatch issues: [1,2,3]
             const ballotIds = [...selectedIds].sort((a, b) => a - b);
             const selectedCands = candidates.filter(c => selectedIds.includes(c.id));
-            const message = `Casting my vote for Ballot: [${ballotIds.join(",")}]`;
-            console.log("SIGNING MESSAGE:", message);
-            console.log("FOR ADDRESS:", address);
-
-            const signature = await window.ethereum.request({
-                method: "personal_sign",
-                params: [message, address],
-            });
+            let message = `Casting my vote for Ballot: [${ballotIds.join(",")}]`;
+            let signature;
+            let signatureType;
+            if (status?.ballot_signing === "eip712") {
+                // Bound to this election's contract and chain, so the signature cannot be replayed elsewhere
+                const typedData = {
+                    types: BALLOT_TYPES,
+                    primaryType: "Ballot",
+                    domain: status.ballot_domain,
+                    message: { candidateIds: ballotIds },
+                };
+                signature = await window.ethereum.request({
+                    method: "eth_signTypedData_v4",
+                    params: [address, JSON.stringify(typedData)],
+                });
+                signatureType = "eip712";
+                message = undefined;
+            } else {
+                console.log("SIGNING MESSAGE:", message);
+                console.log("FOR ADDRESS:", address);
+                signature = await window.ethereum.request({
+                    method: "personal_sign",
+                    params: [message, address],
+                });
+            }
 
             const res = await API("/blockchain/cast-vote", {
                 method: "post",
                 data: {
                     candidate_ids: selectedIds,
                     signature: signature,
+                    signature_type: signatureType,
                     address: address,
                     message: message
                 },
@@ -127,6 +183,9 @@ export default function VotingPage() {
                 setSuccess({
                     tx_hash: res.data.tx_hash,
                     block_number: res.data.block_number,
+                    ticket: res.data.ticket,
+                    // 201: mined already; 202: queued / pending / recorded, settled by the poll above
+                    vote_status: res.data.vote_status || (res.status === 202 ? "pending" : "confirmed"),
                     candidates: selectedCands
                 });
                 setConfirming(false);
@@ -206,7 +265,11 @@ export default function VotingPage() {
                     <div className="vote-already-card">
                         <div className="vote-already-icon">✅</div>
                         <h2>You have already voted!</h2>
-                        <p>Your multi-position ballot has been securely recorded on the blockchain.</p>
+                        <p>
+                            {UNSETTLED.includes(voterStatus.vote_status)
+                                ? "Your multi-position ballot has been accepted and is awaiting confirmation on the blockchain."
+                                : "Your multi-position ballot has been securely recorded on the blockchain."}
+                        </p>
                         {voterStatus.tx_hash && (
                             <div className="vote-tx-box">
                                 <span className="vote-tx-label">Transaction Hash</span>
@@ -237,8 +300,15 @@ export default function VotingPage() {
                 </header>
                 <main className="vd-main">
                     <div className="vote-success-card">
-                        <div className="vote-success-icon">🗳️</div>
-                        <h2 className="vote-success-title">Ballot Cast Successfully!</h2>
+                        <div className="vote-success-icon">{unsettled ? "⏳" : "🗳️"}</div>
+                        <h2 className="vote-success-title">
+                            {unsettled ? "Ballot Submitted – Awaiting Confirmation" : "Ballot Cast Successfully!"}
+                        </h2>
+                        {unsettled && (
+                            <p style={{ opacity: 0.7, fontSize: 14 }}>
+                                Your ballot has been accepted and is being recorded on the blockchain. This page updates automatically.
+                            </p>
+                        )}
                         <div style={{ margin: "20px 0", textAlign: "left" }}>
                             <p style={{ marginBottom: 10, fontSize: 14, fontWeight: 600 }}>Your Choices:</p>
                             <div style={{ display: "grid", gridTemplateColumns: "1fr 1fr", gap: 8 }}>
@@ -250,10 +320,18 @@ export default function VotingPage() {
                                 ))}
                             </div>
                         </div>
-                        <div className="vote-tx-box">
-                            <span className="vote-tx-label">⛓️ Transaction Hash</span>
-                            <span className="vote-tx-hash">{success.tx_hash}</span>
-                        </div>
+                        {success.tx_hash && (
+                            <div className="vote-tx-box">
+                                <span className="vote-tx-label">⛓️ Transaction Hash</span>
+                                <span className="vote-tx-hash">{success.tx_hash}</span>
+                            </div>
+                        )}
+                        {!success.tx_hash && success.ticket && (
+                            <div className="vote-tx-box">
+                                <span className="vote-tx-label">🎫 Ballot Ticket</span>
+                                <span className="vote-tx-hash">{success.ticket}</span>
+                            </div>
+                        )}
                         {success.block_number && (
                             <div className="vote-tx-box">
                                 <span className="vote-tx-label">📦 Block Number</span>